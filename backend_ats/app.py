@@ -1,21 +1,29 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
-from sqlalchemy import func, case
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import and_
+from sqlalchemy.orm import sessionmaker, selectinload
 
 # Import route registrations
 from architecture.cv_processor import register_routes
+from architecture import embedding_cache, query_cache
+from architecture.job_vectors import refresh_job_vector, load_job_vectors
 from architecture.model import create_embeddings
-from architecture.vectordb import search_similar_chunks_for_filename
-from auth.create_db import create_tables, engine, User, Job, Application, ApplicationStage, seed_jobs_if_empty
-from auth.utils.token_validator import validate_auth_header
-from io import BytesIO
+from architecture.rescore import AUTO_REJECTION_FEEDBACK, PRESELECTION_MIN_PERCENT, start_rescore
+from architecture.similarity import get_resume_scores, get_pair_scores, resume_cv_id
+from architecture.vectordb import delete_job_vector, find_cv_id_by_filename, search_batch, get_client_metrics
+from auth.create_db import (
+    create_tables, engine, User, MetaUser, Job, Application, ApplicationStage, CvJobSimilarity, seed_jobs_if_empty
+)
+from auth import metrics_plots, metrics_rollup
+from auth.metrics_timeseries import application_time_series
+from auth.utils.auth_context import require_auth, require_admin, current_user_id
+from auth.utils.pagination import (
+    NEXT_CURSOR_HEADER, parse_page_args, apply_created_range, apply_keyset_page, split_page
+)
 import base64
 
-AUTO_REJECTION_FEEDBACK = "su curriculum no cumple con los requerimientos tecnicos que la vacante necesita"
-
 # Load environment variables
 load_dotenv()
 
@@ -23,8 +31,8 @@ def create_app():
     """Create and configure the Flask application"""
     app = Flask(__name__)
     
-    # Enable CORS
-    CORS(app)
+    # Enable CORS (expose the pagination cursor to browser clients)
+    CORS(app, expose_headers=[NEXT_CURSOR_HEADER])
     
     # Ensure database tables exist and run lightweight migrations
     try:
@@ -53,60 +61,69 @@ def create_app():
     # Database session factory
     Session = sessionmaker(bind=engine)
 
+    def paged_response(items, next_cursor):
+        """JSON list response carrying the next page cursor in a header"""
+        response = jsonify(items)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return response
+
+    def jobs_page(session):
+        """Jobs newest first, keyset-paginated and filtered by query arguments"""
+        limit, cursor = parse_page_args(request.args)
+        query = apply_created_range(session.query(Job), Job, request.args)
+        jobs, next_cursor = split_page(apply_keyset_page(query, Job, limit, cursor).all(), limit)
+        return paged_response([
+            {
+                "id": job.id,
+                "title_job": job.title_job,
+                "description": job.description,
+                "perfil_ideal": getattr(job, "perfil_ideal", None),
+                "posted_date": job.posted_date.isoformat() if job.posted_date else None,
+                "created_at": job.created_at.isoformat() if job.created_at else None
+            }
+            for job in jobs
+        ], next_cursor)
+
+    def filter_applications(query):
+        """Apply status / job_id / created_from / created_to query arguments"""
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Application.status == status)
+        job_id = request.args.get('job_id')
+        if job_id:
+            try:
+                query = query.filter(Application.job_id == int(job_id))
+            except ValueError:
+                raise ValueError("job_id must be an integer")
+        return apply_created_range(query, Application, request.args)
+
     @app.route('/api/jobs', methods=['GET'])
     def list_jobs():
-        """Return all jobs"""
+        """Return jobs (optionally paginated with limit/cursor)"""
         session = Session()
         try:
-            jobs = session.query(Job).order_by(Job.created_at.desc()).all()
-            return jsonify([
-                {
-                    "id": job.id,
-                    "title_job": job.title_job,
-                    "description": job.description,
-                    "perfil_ideal": getattr(job, "perfil_ideal", None),
-                    "posted_date": job.posted_date.isoformat() if job.posted_date else None,
-                    "created_at": job.created_at.isoformat() if job.created_at else None
-                }
-                for job in jobs
-            ])
+            return jobs_page(session)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         finally:
             session.close()
 
     # Admin: jobs CRUD
     @app.route('/api/admin/jobs', methods=['GET'])
+    @require_admin
     def admin_list_jobs():
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
         session = Session()
         try:
-            jobs = session.query(Job).order_by(Job.created_at.desc()).all()
-            return jsonify([
-                {
-                    "id": job.id,
-                    "title_job": job.title_job,
-                    "description": job.description,
-                    "perfil_ideal": getattr(job, "perfil_ideal", None),
-                    "posted_date": job.posted_date.isoformat() if job.posted_date else None,
-                    "created_at": job.created_at.isoformat() if job.created_at else None
-                }
-                for job in jobs
-            ])
+            return jobs_page(session)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         finally:
             session.close()
 
     @app.route('/api/admin/jobs', methods=['POST'])
+    @require_admin
     def admin_create_job():
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
         from datetime import datetime
 
         from datetime import datetime
@@ -137,7 +154,16 @@ def create_app():
                     job.posted_date = None
             session.add(job)
             session.commit()
-            return jsonify({"success": True, "id": job.id}), 201
+            # Precompute the job vector so reads never embed; CV scores are computed
+            # in the background (scoring streams every stored chunk)
+            rescore_run_id = None
+            if perfil_ideal:
+                try:
+                    refresh_job_vector(job.id, perfil_ideal)
+                except Exception as e:
+                    print(f"⚠️ Could not compute vector for job {job.id}: {e}")
+                rescore_run_id = start_rescore([job.id])
+            return jsonify({"success": True, "id": job.id, "rescore_run_id": rescore_run_id}), 201
         except Exception as e:
             session.rollback()
             return jsonify({"error": str(e)}), 500
@@ -145,13 +171,8 @@ def create_app():
             session.close()
 
     @app.route('/api/admin/jobs/<int:job_id>', methods=['PATCH'])
+    @require_admin
     def admin_update_job(job_id: int):
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
         data = request.get_json(silent=True) or {}
         session = Session()
         try:
@@ -162,6 +183,7 @@ def create_app():
                 job.title_job = data['title_job']
             if 'description' in data:
                 job.description = data['description']
+            perfil_changed = 'perfil_ideal' in data and data['perfil_ideal'] != job.perfil_ideal
             if 'perfil_ideal' in data:
                 setattr(job, 'perfil_ideal', data['perfil_ideal'])
             if 'posted_date' in data:
@@ -175,7 +197,16 @@ def create_app():
                 else:
                     job.posted_date = None
             session.commit()
-            return jsonify({"success": True})
+            # Replace (or drop) the stored vector when the profile text changes, then
+            # recompute the scores and preselection of its applications in the background
+            rescore_run_id = None
+            if perfil_changed:
+                try:
+                    refresh_job_vector(job.id, job.perfil_ideal)
+                except Exception as e:
+                    print(f"⚠️ Could not refresh vector for job {job.id}: {e}")
+                rescore_run_id = start_rescore([job.id])
+            return jsonify({"success": True, "rescore_run_id": rescore_run_id})
         except Exception as e:
             session.rollback()
             return jsonify({"error": str(e)}), 500
@@ -183,13 +214,8 @@ def create_app():
             session.close()
 
     @app.route('/api/admin/jobs/<int:job_id>', methods=['DELETE'])
+    @require_admin
     def admin_delete_job(job_id: int):
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
         session = Session()
         try:
             job = session.query(Job).filter(Job.id == job_id).first()
@@ -197,6 +223,7 @@ def create_app():
                 return jsonify({"error": "Job not found"}), 404
             session.delete(job)
             session.commit()
+            delete_job_vector(job_id)
             return jsonify({"success": True})
         except Exception as e:
             session.rollback()
@@ -204,15 +231,40 @@ def create_app():
         finally:
             session.close()
 
+    @app.route('/api/admin/jobs/rescore', methods=['POST'])
+    @app.route('/api/admin/jobs/<int:job_id>/rescore', methods=['POST'])
+    @require_admin
+    def admin_rescore_applications(job_id: int = None):
+        """Admin: re-run preselection for the applications of one job (or of all jobs)"""
+        if job_id is not None:
+            session = Session()
+            try:
+                if session.query(Job.id).filter(Job.id == job_id).first() is None:
+                    return jsonify({"error": "Job not found"}), 404
+            finally:
+                session.close()
+
+        run_id = start_rescore([job_id] if job_id is not None else None)
+        return jsonify({
+            "success": True,
+            "run_id": run_id,
+            "status_url": f"/api/admin/rescore/{run_id}"
+        }), 202
+
+    @app.route('/api/admin/rescore/<string:run_id>', methods=['GET'])
+    @require_admin
+    def admin_rescore_status(run_id: str):
+        """Admin: progress and throughput of a re-score run"""
+        from architecture.rescore import get_rescore_status
+        run = get_rescore_status(run_id)
+        if run is None:
+            return jsonify({"error": "Re-score run not found"}), 404
+        return jsonify(run)
+
     @app.route('/api/applications', methods=['POST'])
+    @require_auth
     def create_application():
         """Create a new application for the authenticated user and initialize timeline"""
-        # Validate auth
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-
         data = request.get_json(silent=True) or {}
         job_id = data.get('job_id')
         if not job_id:
@@ -220,9 +272,9 @@ def create_app():
 
         session = Session()
         try:
-            # Find user by email (sub)
-            email = auth_result['payload'].get('sub')
-            user = session.query(User).filter(User.email == email).first()
+            # Preselection needs the user's profile (resume); load it by primary key
+            user_id = current_user_id(session)
+            user = session.get(User, user_id) if user_id is not None else None
             if not user:
                 return jsonify({"error": "User not found"}), 404
 
@@ -242,19 +294,10 @@ def create_app():
             similarity_score = None
             try:
                 perfil_ideal_text = getattr(job, 'perfil_ideal', None)
-                # get resume filename from meta_users if available
-                meta = getattr(user, 'meta_user', None)
-                resume_filename = None
-                if meta is not None:
-                    resume_filename = getattr(meta, 'resume_pdf', None)
-                if perfil_ideal_text and resume_filename:
-                    emb = create_embeddings([perfil_ideal_text])
-                    if emb and len(emb[0]) > 0:
-                        results = search_similar_chunks_for_filename(emb[0], resume_filename, limit=5)
-                        if results:
-                            similarity_score = max(r.get('similarity', 0.0) for r in results)
-                        else:
-                            similarity_score = 0.0
+                # get the resume's cv_id from meta_users if available
+                cv_id = resume_cv_id(getattr(user, 'meta_user', None))
+                if perfil_ideal_text and cv_id:
+                    similarity_score = get_resume_scores(session, cv_id).get(job.id)
             except Exception:
                 # If embedding/search fails, skip gating gracefully
                 similarity_score = None
@@ -267,11 +310,11 @@ def create_app():
             from datetime import datetime
             now = datetime.utcnow()
 
-            # Determine if should auto-reject based on 80% threshold
+            # Determine if should auto-reject based on the preselection threshold (80% by default)
             auto_reject = False
             if similarity_score is not None:
                 try:
-                    auto_reject = (float(similarity_score) * 100.0) < 80.0
+                    auto_reject = (float(similarity_score) * 100.0) < PRESELECTION_MIN_PERCENT
                 except Exception:
                     auto_reject = False
 
@@ -345,35 +388,28 @@ def create_app():
             session.close()
 
     @app.route('/api/applications', methods=['GET'])
+    @require_auth
     def list_applications():
         """Return applications of the authenticated user with timeline"""
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-
         session = Session()
         try:
-            email = auth_result['payload'].get('sub')
-            user = session.query(User).filter(User.email == email).first()
-            if not user:
+            user_id = current_user_id(session)
+            if user_id is None:
                 return jsonify({"error": "User not found"}), 404
 
-            apps = (
+            # Eager-load job and stages so the page costs a fixed number of queries
+            limit, cursor = parse_page_args(request.args)
+            query = filter_applications(
                 session.query(Application)
-                .filter(Application.user_id == user.id)
-                .all()
+                .options(selectinload(Application.job), selectinload(Application.stages))
+                .filter(Application.user_id == user_id)
             )
+            apps, next_cursor = split_page(apply_keyset_page(query, Application, limit, cursor).all(), limit)
 
             result = []
             for app_row in apps:
-                job = session.query(Job).filter(Job.id == app_row.job_id).first()
-                stages = (
-                    session.query(ApplicationStage)
-                    .filter(ApplicationStage.application_id == app_row.id)
-                    .order_by(ApplicationStage.sort_order.asc())
-                    .all()
-                )
+                job = app_row.job
+                stages = app_row.stages  # ordered by sort_order (see the relationship)
                 result.append({
                     "id": app_row.id,
                     "job": {
@@ -394,30 +430,27 @@ def create_app():
                     ]
                 })
 
-            return jsonify(result)
+            return paged_response(result, next_cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         finally:
             session.close()
 
     @app.route('/api/applications/<int:application_id>', methods=['DELETE'])
+    @require_auth
     def delete_application(application_id: int):
         """Allow the authenticated user to delete their own application"""
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-
         session = Session()
         try:
-            email = auth_result['payload'].get('sub')
-            user = session.query(User).filter(User.email == email).first()
-            if not user:
+            user_id = current_user_id(session)
+            if user_id is None:
                 return jsonify({"error": "User not found"}), 404
 
             app_row = session.query(Application).filter(Application.id == application_id).first()
             if not app_row:
                 return jsonify({"error": "Application not found"}), 404
 
-            if app_row.user_id != user.id:
+            if app_row.user_id != user_id:
                 return jsonify({"error": "Forbidden"}), 403
 
             session.delete(app_row)
@@ -431,44 +464,63 @@ def create_app():
 
     # --- Admin endpoints ---
     @app.route('/api/admin/applications', methods=['GET'])
+    @require_admin
     def admin_list_applications():
         """Admin: list all applications with user, job and timeline"""
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
-
         session = Session()
         try:
-            apps = session.query(Application).all()
+            # Eager-load related rows so the page costs a fixed number of queries
+            limit, cursor = parse_page_args(request.args)
+            query = filter_applications(
+                session.query(Application)
+                .options(
+                    selectinload(Application.job),
+                    selectinload(Application.user).selectinload(User.meta_user),
+                    selectinload(Application.stages),
+                )
+            )
+            min_similarity = request.args.get('min_similarity')
+            if min_similarity:
+                try:
+                    min_score = float(min_similarity) / 100.0
+                except ValueError:
+                    return jsonify({"error": "min_similarity must be a number (percent)"}), 400
+                # Keep only applications whose precomputed score reaches the threshold
+                query = (
+                    query.join(MetaUser, MetaUser.user_id == Application.user_id)
+                    .join(CvJobSimilarity, and_(
+                        CvJobSimilarity.cv_id == MetaUser.cv_id,
+                        CvJobSimilarity.job_id == Application.job_id
+                    ))
+                    .filter(CvJobSimilarity.score >= min_score)
+                )
+            apps, next_cursor = split_page(apply_keyset_page(query, Application, limit, cursor).all(), limit)
+
+            def resume_of(app_row):
+                user = app_row.user
+                if user is None or user.meta_user is None:
+                    return None
+                return user.meta_user.cv_id
+
+            # Read all precomputed similarity scores with a single query
+            try:
+                scores = get_pair_scores(session, [
+                    (resume_of(app_row), app_row.job_id)
+                    for app_row in apps
+                    if resume_of(app_row) and app_row.job is not None and app_row.job.perfil_ideal
+                ])
+            except Exception:
+                scores = {}
+
             result = []
             for app_row in apps:
-                job = session.query(Job).filter(Job.id == app_row.job_id).first()
-                user = session.query(User).filter(User.id == app_row.user_id).first()
-                stages = (
-                    session.query(ApplicationStage)
-                    .filter(ApplicationStage.application_id == app_row.id)
-                    .order_by(ApplicationStage.sort_order.asc())
-                    .all()
-                )
-                # Compute similarity percent if possible
+                job = app_row.job
+                user = app_row.user
+                stages = app_row.stages  # ordered by sort_order (see the relationship)
                 similarity_percent = None
-                try:
-                    perfil_ideal_text = getattr(job, 'perfil_ideal', None) if job else None
-                    resume_filename = None
-                    if user and getattr(user, 'meta_user', None) is not None:
-                        resume_filename = getattr(user.meta_user, 'resume_pdf', None)
-                    if perfil_ideal_text and resume_filename:
-                        emb = create_embeddings([perfil_ideal_text])
-                        if emb and len(emb[0]) > 0:
-                            matches = search_similar_chunks_for_filename(emb[0], resume_filename, limit=5)
-                            if matches:
-                                best = max(m.get('similarity', 0.0) for m in matches)
-                                similarity_percent = round(float(best) * 100.0, 2)
-                except Exception:
-                    similarity_percent = None
+                best = scores.get((resume_of(app_row), app_row.job_id))
+                if job is not None and job.perfil_ideal and best is not None:
+                    similarity_percent = round(float(best) * 100.0, 2)
                 result.append({
                     "id": app_row.id,
                     "job": {
@@ -494,281 +546,141 @@ def create_app():
                         for st in stages
                     ]
                 })
-            return jsonify(result)
+            return paged_response(result, next_cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         finally:
             session.close()
 
-    def get_result_stage_breakdown(session):
-        total_count, accepted_count, rejected_total = session.query(
-            func.count(ApplicationStage.id),
-            func.sum(case((ApplicationStage.status.in_(("completed", "accepted")), 1), else_=0)),
-            func.sum(case((ApplicationStage.status == 'rejected', 1), else_=0)),
-        ).filter(ApplicationStage.name == 'result').one()
-
-        rejected_preselection = session.query(func.count(ApplicationStage.id)).filter(
-            ApplicationStage.name == 'preselection',
-            ApplicationStage.status == 'rejected'
-        ).scalar() or 0
-
-        accepted = int(accepted_count or 0)
-        rejected_total = int(rejected_total or 0)
-        rejected_preselection = int(rejected_preselection or 0)
-        total = int(total_count or 0)
-        rejected_process = max(0, rejected_total - rejected_preselection)
-        pending = max(0, total - accepted - rejected_total)
-
-        return {
-            "accepted": accepted,
-            "rejected_process": rejected_process,
-            "rejected_preselection": rejected_preselection,
-            "pending": pending,
-        }
-
     # --- Admin metrics endpoints ---
     @app.route('/api/admin/metrics/summary', methods=['GET'])
+    @require_admin
     def admin_metrics_summary():
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
+        session = Session()
+        try:
+            # Counters are maintained on every write (see auth/metrics_rollup.py)
+            return jsonify(metrics_rollup.get_summary(session))
+        finally:
+            session.close()
 
+    @app.route('/api/admin/metrics/timeseries', methods=['GET'])
+    @require_admin
+    def admin_metrics_timeseries():
+        """Admin: applications per day, week or month over a date range (gaps filled with 0).
+        Query params: granularity (day | week | month), from and to (YYYY-MM-DD)
+        """
         session = Session()
         try:
-            # Totals
-            total_users = session.query(func.count(User.id)).scalar() or 0
-            total_jobs = session.query(func.count(Job.id)).scalar() or 0
-            total_applications = session.query(func.count(Application.id)).scalar() or 0
-
-            # Applications by stage status (single aggregated query)
-            status_field = func.coalesce(Application.status, 'pending')
-            status_rows = (
-                session.query(status_field.label('status'), func.count(Application.id).label('total'))
-                .group_by(status_field)
-                .all()
-            )
-            status_order = ['pending', 'in_progress', 'scheduled', 'completed', 'rejected', 'accepted']
-            status_counts = {status: 0 for status in status_order}
-            for row in status_rows:
-                key = row.status or 'pending'
-                status_counts[key] = int(row.total or 0)
-            by_status = {status: status_counts.get(status, 0) for status in status_order}
-
-            # Applications per job (aggregated query)
-            per_job_rows = (
-                session.query(
-                    Job.id.label('job_id'),
-                    Job.title_job.label('title_job'),
-                    func.count(Application.id).label('applications')
-                )
-                .outerjoin(Application, Application.job_id == Job.id)
-                .group_by(Job.id)
-                .order_by(Job.id)
-                .all()
-            )
-            per_job = [
-                {
-                    "job_id": row.job_id,
-                    "title_job": row.title_job,
-                    "applications": int(row.applications or 0)
-                }
-                for row in per_job_rows
-            ]
+            return jsonify(application_time_series(
+                session,
+                granularity=request.args.get('granularity', 'day'),
+                start=request.args.get('from'),
+                end=request.args.get('to')
+            ))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            session.close()
 
-            result_breakdown = get_result_stage_breakdown(session)
+    @app.route('/api/admin/metrics/series/<string:kind>', methods=['GET'])
+    @require_admin
+    def admin_metrics_series(kind: str):
+        """Admin: the data behind a metric plot, for client-side charts.
+        Kinds: by_status_bar, per_job_bar, result_outcome_pie, time_series_daily
+        Returns {"kind", "version", "labels", "values"}; ?format=csv streams a CSV file.
+        """
+        if kind not in metrics_plots.PLOT_KINDS:
+            return jsonify({"error": "Unknown plot kind"}), 400
 
-            return jsonify({
-                "totals": {"users": total_users, "jobs": total_jobs, "applications": total_applications},
-                "applications_by_status": by_status,
-                "applications_per_job": per_job,
-                "result_breakdown": result_breakdown,
-            })
+        session = Session()
+        try:
+            data = metrics_plots.plot_data(session, kind)
         finally:
             session.close()
+        version = metrics_plots.data_version(kind, data)
+
+        if request.args.get('format') == 'csv':
+            response = Response(metrics_plots.series_csv(kind, data), mimetype='text/csv')
+            response.headers['Content-Disposition'] = f'attachment; filename="{kind}.csv"'
+            return response
+        if request.if_none_match.contains(version):
+            response = Response(status=304)
+        else:
+            response = jsonify(metrics_plots.series_payload(kind, data, version))
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
 
     @app.route('/api/admin/metrics/plots/<string:kind>', methods=['GET'])
+    @require_admin
     def admin_metrics_plot(kind: str):
-        """Return small matplotlib plots as base64 PNG images.
+        """Return small matplotlib plots as PNG images.
         Kinds: by_status_bar, per_job_bar, result_outcome_pie, time_series_daily
+        The ETag is the plot's data version, so unchanged plots answer 304.
+        ?format=json returns the previous {"image_base64": ...} body.
+        Changed plots are re-rendered in the background (a thread of this process, or the
+        render worker with PLOT_RENDER_MODE=worker) while the previous image is served.
         """
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
-
-        import matplotlib
-        matplotlib.use('Agg')
-        import matplotlib.pyplot as plt
-        from matplotlib.patches import Patch
-        from collections import defaultdict
-        from datetime import datetime
+        if kind not in metrics_plots.PLOT_KINDS:
+            return jsonify({"error": "Unknown plot kind"}), 400
 
         session = Session()
         try:
-            buf = BytesIO()
-
-            if kind == 'by_status_bar':
-                status_field = func.coalesce(Application.status, 'pending')
-                status_rows = (
-                    session.query(status_field.label('status'), func.count(Application.id).label('total'))
-                    .group_by(status_field)
-                    .all()
-                )
-                status_order = ['pending', 'in_progress', 'scheduled', 'completed', 'rejected', 'accepted']
-                status_counts = {status: 0 for status in status_order}
-                for row in status_rows:
-                    key = row.status or 'pending'
-                    status_counts[key] = int(row.total or 0)
-                labels = status_order
-                values = [status_counts[s] for s in labels]
-                fig, ax = plt.subplots(figsize=(8, 4))
-                ax.bar(labels, values, color='#00d6ab')
-                ax.set_ylabel('Postulaciones')
-                ax.set_title('Postulaciones por estado')
-                fig.tight_layout()
-                fig.savefig(buf, format='png', dpi=150)
-            elif kind == 'per_job_bar':
-                per_job_rows = (
-                    session.query(
-                        Job.title_job.label('title'),
-                        func.count(Application.id).label('applications')
-                    )
-                    .outerjoin(Application, Application.job_id == Job.id)
-                    .group_by(Job.id)
-                    .order_by(func.count(Application.id).desc(), Job.title_job)
-                    .all()
-                )
-
-                if not per_job_rows:
-                    fig, ax = plt.subplots(figsize=(5, 3.5))
-                    ax.text(0.5, 0.5, 'Sin datos', ha='center', va='center', fontsize=12)
-                    ax.axis('off')
-                else:
-                    labels = [row.title for row in per_job_rows]
-                    values = [int(row.applications or 0) for row in per_job_rows]
-                    height = max(4, 0.5 * len(labels))
-                    fig, ax = plt.subplots(figsize=(10, height))
-                    y_pos = list(range(len(labels)))
-                    ax.barh(y_pos, values, color='#00b9cd')
-                    ax.set_yticks(y_pos)
-                    ax.set_yticklabels(labels, fontsize=9)
-                    ax.invert_yaxis()  # mantiene el primer elemento arriba
-                    ax.set_xlabel('Postulaciones')
-                    ax.set_title('Postulaciones por vacante')
-                    fig.tight_layout()
-
-                fig.savefig(buf, format='png', dpi=150)
-            elif kind == 'result_outcome_pie':
-                breakdown = get_result_stage_breakdown(session)
-                segments = [
-                    ('Aceptados', breakdown.get('accepted', 0), '#00d6ab'),
-                    ('Rechazados en proceso', breakdown.get('rejected_process', 0), '#ef476f'),
-                    ('Rechazados en preselección', breakdown.get('rejected_preselection', 0), '#ffd166'),
-                ]
-                total = sum(value for _, value, _ in segments)
-
-                fig, ax = plt.subplots(figsize=(7, 5))
-                if total == 0:
-                    ax.text(0.5, 0.5, 'Sin datos', ha='center', va='center', fontsize=12)
-                    ax.axis('off')
-                else:
-                    labels = [label for label, _, _ in segments]
-                    values = [value for _, value, _ in segments]
-                    colors = [color for _, _, color in segments]
-
-                    def autopct(pct):
-                        return f"{pct:.1f}%" if pct > 0 else ''
-
-                    wedges, _, autotexts = ax.pie(
-                        values,
-                        colors=colors,
-                        autopct=autopct,
-                        startangle=90,
-                        pctdistance=0.7,
-                        textprops={'color': '#1f1f1f', 'fontsize': 10}
-                    )
-                    for autotext in autotexts:
-                        autotext.set_fontweight('bold')
-
-                    legend_labels = [f"{label} ({value})" for label, value in zip(labels, values)]
-                    legend_handles = [Patch(facecolor=color, edgecolor='none') for color in colors]
-                    ax.legend(
-                        legend_handles,
-                        legend_labels,
-                        loc='center left',
-                        bbox_to_anchor=(1.05, 0.5),
-                        frameon=False,
-                        borderaxespad=0,
-                        fontsize=10
-                    )
-                    ax.axis('equal')
-
-                fig.tight_layout()
-                fig.savefig(buf, format='png', dpi=150)
-            elif kind == 'time_series_daily':
-                apps = session.query(Application.created_at).all()
-                counts = defaultdict(int)
-                for (created_at,) in apps:
-                    day = (created_at or datetime.utcnow()).date().isoformat()
-                    counts[day] += 1
-                ordered = sorted(counts.items())
-                x_labels = [d for d,_ in ordered]
-                y_values = [v for _,v in ordered]
-                positions = list(range(len(x_labels)))
-                fig, ax = plt.subplots(figsize=(8, 4))
-                ax.plot(positions, y_values, color='#00d6ab', marker='o')
-                ax.set_xticks(positions)
-                ax.set_xticklabels(x_labels, rotation=45, ha='right')
-                ax.set_ylabel('Postulaciones')
-                ax.set_title('Postulaciones por día')
-                fig.tight_layout()
-                fig.savefig(buf, format='png', dpi=150)
-            else:
-                return jsonify({"error": "Unknown plot kind"}), 400
-
-            buf.seek(0)
-            b64 = base64.b64encode(buf.read()).decode('utf-8')
-            plt.close('all')
-            return jsonify({"image_base64": f"data:image/png;base64,{b64}"})
+            data = metrics_plots.plot_data(session, kind)
+            version = metrics_plots.data_version(kind, data)
+            # The browser revalidates on every use and gets a 304 while the data is unchanged
+            if request.if_none_match.contains(version) and request.args.get('format') != 'json':
+                response = Response(status=304)
+                response.set_etag(version)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            plot = metrics_plots.get_png(session, kind, data, version)
+            if plot is None:
+                response = jsonify({"error": "Plot not rendered yet"})
+                response.status_code = 503
+                # The renderer thread draws it in about a second; the worker on its next pass
+                retry_after = 1 if metrics_plots.PLOT_RENDER_MODE == "inline" else int(metrics_plots.PLOT_RENDER_INTERVAL_SECONDS)
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+
+            if request.args.get('format') == 'json':
+                b64 = base64.b64encode(plot.png).decode('utf-8')
+                return jsonify({"image_base64": f"data:image/png;base64,{b64}", "version": plot.version})
+
+            # A stale image (renderer not caught up yet) carries its own version
+            response = Response(plot.png, mimetype='image/png')
+            response.set_etag(plot.version)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
         finally:
             session.close()
 
     @app.route('/api/admin/cv/match', methods=['POST'])
+    @require_admin
     def admin_match_cv_jobs():
-        """Admin: given a stored resume filename, return similarity to all jobs"""
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
-
+        """Admin: given a stored resume (cv_id, or filename for older uploads), return similarity to all jobs"""
         data = request.get_json(silent=True) or {}
+        cv_id = data.get('cv_id')
         filename = data.get('filename')
-        if not filename:
-            return jsonify({"error": "filename is required"}), 400
+        if not cv_id and not filename:
+            return jsonify({"error": "cv_id or filename is required"}), 400
 
         session = Session()
         try:
+            try:
+                cv_id = cv_id or find_cv_id_by_filename(filename)
+                scores = get_resume_scores(session, cv_id) if cv_id else {}
+            except Exception:
+                scores = {}
             jobs = session.query(Job).all()
             results = []
             for job in jobs:
                 perfil_ideal_text = getattr(job, 'perfil_ideal', None)
                 if not perfil_ideal_text:
                     continue
-                percent = None
-                try:
-                    emb = create_embeddings([perfil_ideal_text])
-                    if emb and len(emb[0]) > 0:
-                        matches = search_similar_chunks_for_filename(emb[0], filename, limit=5)
-                        if matches:
-                            best = max(m.get('similarity', 0.0) for m in matches)
-                            percent = round(float(best) * 100.0, 2)
-                except Exception:
-                    percent = None
+                best = scores.get(job.id)
+                percent = round(float(best) * 100.0, 2) if best is not None else None
                 results.append({
                     "job": {
                         "id": job.id,
@@ -783,17 +695,131 @@ def create_app():
         finally:
             session.close()
 
+    @app.route('/api/admin/search/batch', methods=['POST'])
+    @require_admin
+    def admin_search_batch():
+        """Admin: run many vector searches in one round-trip to the vector store.
+
+        Each query is {"text": ...} or {"job_id": ...} (the job's profile vector),
+        with optional "cv_id"/"filename" restriction and "limit".
+        """
+        data = request.get_json(silent=True) or {}
+        queries = data.get('queries')
+        if not isinstance(queries, list) or not queries:
+            return jsonify({"error": "queries must be a non-empty list"}), 400
+        if len(queries) > 100:
+            return jsonify({"error": "At most 100 queries per batch"}), 400
+        for query in queries:
+            if not isinstance(query, dict) or not (query.get('text') or query.get('job_id')):
+                return jsonify({"error": "Each query needs text or job_id"}), 400
+
+        session = Session()
+        try:
+            # Embed every text query at once and load every job vector at once
+            texts = [query['text'] for query in queries if query.get('text')]
+            text_vectors = iter(create_embeddings(texts)) if texts else iter(())
+            job_ids = {int(query['job_id']) for query in queries if not query.get('text')}
+            job_vectors = load_job_vectors(
+                session.query(Job.id, Job.perfil_ideal).filter(Job.id.in_(job_ids), Job.perfil_ideal.isnot(None)).all()
+            ) if job_ids else {}
+
+            batch = []
+            for query in queries:
+                vector = next(text_vectors) if query.get('text') else job_vectors.get(int(query['job_id']))
+                if not vector:
+                    return jsonify({"error": f"No vector available for query {query}"}), 400
+                batch.append({
+                    "vector": vector,
+                    "cv_id": query.get('cv_id'),
+                    "filename": query.get('filename'),
+                    "limit": max(1, min(int(query.get('limit', 5)), 50)),
+                })
+            return jsonify({"results": search_batch(batch)})
+        except ValueError:
+            return jsonify({"error": "job_id and limit must be integers"}), 400
+        except Exception as e:
+            return jsonify({"error": f"Error running batch search: {str(e)}"}), 500
+        finally:
+            session.close()
+
+    @app.route('/api/admin/cv/bulk', methods=['POST'])
+    @require_admin
+    def admin_bulk_import_cvs():
+        """Admin: start a bulk CV import from an uploaded zip or a server folder"""
+        import threading
+        import uuid
+        from architecture.bulk_import import import_cvs, start_batch
+        from architecture.ingest_queue import CV_UPLOAD_FOLDER
+
+        batch_id = str(uuid.uuid4())
+        uploaded = 'file' in request.files
+        if uploaded:
+            archive = request.files['file']
+            if not archive.filename or not archive.filename.lower().endswith('.zip'):
+                return jsonify({"error": "Please upload a .zip archive of PDF files"}), 400
+            os.makedirs(CV_UPLOAD_FOLDER, exist_ok=True)
+            source = os.path.join(CV_UPLOAD_FOLDER, f"bulk_{batch_id}.zip")
+            archive.save(source)
+            label = archive.filename
+        else:
+            # Server-side folders are only allowed below BULK_IMPORT_ROOT
+            data = request.get_json(silent=True) or {}
+            root = os.getenv("BULK_IMPORT_ROOT")
+            path = data.get('path')
+            if not path:
+                return jsonify({"error": "Provide a zip file or a folder path"}), 400
+            if not root:
+                return jsonify({"error": "Folder imports are disabled (BULK_IMPORT_ROOT is not set)"}), 400
+            source = os.path.abspath(os.path.join(root, path))
+            if os.path.commonpath([os.path.abspath(root), source]) != os.path.abspath(root) or not os.path.isdir(source):
+                return jsonify({"error": "Folder not found under BULK_IMPORT_ROOT"}), 400
+            label = path
+
+        # Recorded before the run starts, so the status URL works (and reports failures) at once
+        start_batch(batch_id, label)
+
+        def run_import():
+            try:
+                # The uploaded archive is our copy and is deleted with the extracted files
+                import_cvs(source, batch_id=batch_id, remove_source=uploaded)
+            except Exception as e:
+                print(f"❌ Bulk import {batch_id} failed: {e}")
+
+        threading.Thread(target=run_import, name=f"bulk-import-{batch_id}", daemon=True).start()
+        return jsonify({
+            "success": True,
+            "batch_id": batch_id,
+            "status_url": f"/api/admin/cv/bulk/{batch_id}"
+        }), 202
+
+    @app.route('/api/admin/cv/bulk/<string:batch_id>', methods=['GET'])
+    @require_admin
+    def admin_bulk_import_status(batch_id: str):
+        """Admin: per-file outcomes and throughput of a bulk CV import"""
+        from architecture.bulk_import import get_batch_report
+        report = get_batch_report(batch_id)
+        if report is None:
+            return jsonify({"error": "Bulk import not found"}), 404
+        return jsonify(report)
+
+    @app.route('/api/admin/embeddings/cache', methods=['GET'])
+    @require_admin
+    def admin_embedding_cache_stats():
+        """Admin: hit/miss counters of the embedding cache and the search query caches"""
+        return jsonify(dict(embedding_cache.get_stats(), query_cache=query_cache.get_stats()))
+
+    @app.route('/api/admin/vectordb/metrics', methods=['GET'])
+    @require_admin
+    def admin_vectordb_metrics():
+        """Admin: per-operation latency, retry and error counters of the vector store client"""
+        return jsonify(get_client_metrics())
+
     @app.route('/api/admin/applications/from_cv', methods=['POST'])
+    @require_admin
     def admin_create_application_from_cv():
-        """Admin: create an application from a stored CV filename and candidate metadata"""
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
-
+        """Admin: create an application from a stored CV (cv_id and/or filename) and candidate metadata"""
         data = request.get_json(silent=True) or {}
+        cv_id = data.get('cv_id')
         filename = data.get('filename')
         job_id = data.get('job_id')
         candidate = data.get('candidate') or {}
@@ -801,8 +827,10 @@ def create_app():
         email = candidate.get('email')
         identity_document = candidate.get('identity_document')  # optional
         celular = candidate.get('celular')
-        if not all([filename, job_id, name, email, celular]):
-            return jsonify({"error": "filename, job_id and candidate {name,email,celular} are required"}), 400
+        if not all([cv_id or filename, job_id, name, email, celular]):
+            return jsonify({"error": "cv_id or filename, job_id and candidate {name,email,celular} are required"}), 400
+        if not cv_id:
+            cv_id = find_cv_id_by_filename(filename)
 
         session = Session()
         try:
@@ -828,15 +856,16 @@ def create_app():
                     user.identity_document = identity_document
 
             # Upsert meta user
-            from auth.create_db import MetaUser
             profile = session.query(MetaUser).filter(MetaUser.user_id == user.id).first()
             if not profile:
-                profile = MetaUser(user_id=user.id, fullname=name, celular=celular, resume_pdf=filename)
+                profile = MetaUser(user_id=user.id, fullname=name, celular=celular, resume_pdf=filename, cv_id=cv_id)
                 session.add(profile)
             else:
                 profile.fullname = name
                 profile.celular = celular
-                profile.resume_pdf = filename
+                if filename:
+                    profile.resume_pdf = filename
+                profile.cv_id = cv_id
 
             # Create application and stages
             # Prevent duplicates
@@ -867,15 +896,9 @@ def create_app():
             session.close()
 
     @app.route('/api/admin/applications/<int:application_id>/stage', methods=['PATCH'])
+    @require_admin
     def admin_update_stage(application_id: int):
         """Admin: update a specific stage of an application"""
-        auth_header = request.headers.get('Authorization')
-        auth_result = validate_auth_header(auth_header)
-        if not auth_result.get('valid'):
-            return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
-        if not auth_result['payload'].get('is_admin'):
-            return jsonify({"error": "Forbidden"}), 403
-
         from datetime import datetime
 
         data = request.get_json(silent=True) or {}
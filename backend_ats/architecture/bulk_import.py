@@ -0,0 +1,384 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker
+from werkzeug.utils import secure_filename
+
+# Add parent directory to path to import from auth module when run as a command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.create_db import engine, CvIngestJob, CvImportBatch
+from .model import prepare_cv, create_embeddings
+from .vectordb import store_cvs
+from .similarity import refresh_resume_similarities
+from .ingest_queue import (
+    CV_UPLOAD_FOLDER, ACTIVE_STATUSES, file_sha256, job_to_dict, hold_jobs, release_jobs, check_prepared_cv, check_embeddings
+)
+
+# Load environment variables
+load_dotenv()
+
+# Bulk import settings
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", str(os.cpu_count() or 2)))
+# Files per round: one embedding pass and one grouped upsert per round
+BULK_IMPORT_GROUP_SIZE = int(os.getenv("BULK_IMPORT_GROUP_SIZE", "32"))
+# Limits checked before anything is extracted (zip bombs, oversized imports)
+BULK_IMPORT_MAX_FILES = int(os.getenv("BULK_IMPORT_MAX_FILES", "2000"))
+BULK_IMPORT_MAX_BYTES = int(os.getenv("BULK_IMPORT_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+Session = sessionmaker(bind=engine)
+
+def _extract_folder(batch_id: str) -> str:
+    return os.path.join(CV_UPLOAD_FOLDER, f"bulk_{batch_id}")
+
+def _check_limits(files: int, total_bytes: int):
+    if files > BULK_IMPORT_MAX_FILES:
+        raise ValueError(f"The import has {files} PDFs; the limit is {BULK_IMPORT_MAX_FILES} (BULK_IMPORT_MAX_FILES)")
+    if total_bytes > BULK_IMPORT_MAX_BYTES:
+        raise ValueError(f"The import holds {total_bytes} bytes of PDFs; the limit is {BULK_IMPORT_MAX_BYTES} (BULK_IMPORT_MAX_BYTES)")
+
+def _extract_zip(zip_path: str, batch_id: str) -> str:
+    """Unpack the PDFs of a zip archive into a folder that survives a crash.
+
+    The member count and declared sizes are checked before anything is
+    written, and the bytes actually written are capped as well, since the
+    declared sizes come from the archive itself.
+    """
+    target = _extract_folder(batch_id)
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [
+            member for member in archive.infolist()
+            if not member.is_dir() and member.filename.lower().endswith(".pdf")
+        ]
+        _check_limits(len(members), sum(member.file_size for member in members))
+        os.makedirs(target, exist_ok=True)
+        written = 0
+        for member in members:
+            # Flatten paths and sanitize names so entries cannot escape the target folder
+            safe_name = secure_filename(os.path.basename(member.filename))
+            if not safe_name:
+                continue
+            destination = os.path.join(target, safe_name)
+            if os.path.exists(destination):
+                destination = os.path.join(target, f"{uuid.uuid4().hex[:8]}_{safe_name}")
+            with archive.open(member) as source, open(destination, "wb") as out:
+                while True:
+                    block = source.read(1 << 20)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > BULK_IMPORT_MAX_BYTES:
+                        raise ValueError(f"The archive expands beyond {BULK_IMPORT_MAX_BYTES} bytes (BULK_IMPORT_MAX_BYTES)")
+                    out.write(block)
+    return target
+
+def collect_pdfs(source: str, batch_id: str) -> List[str]:
+    """List the PDF files of a folder (recursively) or of a zip archive"""
+    if zipfile.is_zipfile(source):
+        source = _extract_zip(source, batch_id)
+    if not os.path.isdir(source):
+        raise ValueError(f"{source} is neither a folder nor a zip archive")
+    paths = []
+    for root, _, files in os.walk(source):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                paths.append(os.path.join(root, name))
+    _check_limits(len(paths), sum(os.path.getsize(path) for path in paths))
+    return sorted(paths)
+
+def start_batch(batch_id: str, source: str):
+    """Record a bulk import before it starts, so its status can be polled at once"""
+    session = Session()
+    try:
+        if session.get(CvImportBatch, batch_id) is None:
+            session.add(CvImportBatch(id=batch_id, source=source, status="scanning"))
+            session.commit()
+    finally:
+        session.close()
+
+def _update_batch(batch_id: str, **fields):
+    session = Session()
+    try:
+        batch = session.get(CvImportBatch, batch_id)
+        if batch is not None:
+            for key, value in fields.items():
+                setattr(batch, key, value)
+            session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"⚠️ Could not update bulk import {batch_id}: {e}")
+    finally:
+        session.close()
+
+def _fail_unfinished_jobs(batch_id: str, error: str):
+    """Files of an aborted run would otherwise wait for lease recovery, and their copies are gone"""
+    session = Session()
+    try:
+        session.query(CvIngestJob).filter(
+            CvIngestJob.batch_id == batch_id, CvIngestJob.status.in_(ACTIVE_STATUSES)
+        ).update({
+            CvIngestJob.status: "failed",
+            CvIngestJob.error: f"Bulk import aborted: {error}",
+            CvIngestJob.finished_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"⚠️ Could not close the files of bulk import {batch_id}: {e}")
+    finally:
+        session.close()
+
+def _cleanup(source: str, batch_id: str, remove_source: bool):
+    """Delete the extracted files (and the uploaded archive) of a finished run"""
+    shutil.rmtree(_extract_folder(batch_id), ignore_errors=True)
+    if remove_source and os.path.isfile(source):
+        os.remove(source)
+
+def _prepare(path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str], int]:
+    """Process-pool task: parse, clean and chunk one PDF"""
+    start = time.perf_counter()
+    try:
+        cv_data = prepare_cv(path)
+        return path, cv_data, None, int((time.perf_counter() - start) * 1000)
+    except Exception as e:
+        return path, None, str(e), int((time.perf_counter() - start) * 1000)
+
+def _register_files(session, paths: List[str], batch_id: str) -> Tuple[List[CvIngestJob], List[Dict[str, Any]]]:
+    """Create (or resume) one ingest job per file; already indexed content is skipped"""
+    pending, skipped = [], []
+    seen = set()
+    for path in paths:
+        content_hash = file_sha256(path)
+        if content_hash in seen:
+            skipped.append({"file": path, "status": "skipped", "error": "Duplicate of another file in this import"})
+            continue
+        seen.add(content_hash)
+        existing = (
+            session.query(CvIngestJob)
+            .filter(CvIngestJob.content_hash == content_hash)
+            .order_by(CvIngestJob.created_at.desc())
+            .first()
+        )
+        if existing is not None and existing.status == "indexed":
+            skipped.append({"file": path, "status": "skipped", "cv_id": existing.cv_id, "job_id": existing.id})
+            continue
+        if existing is not None and existing.batch_id is not None:
+            # Resume an interrupted bulk run for this content, keeping its cv_id
+            job = existing
+            job.filepath = path
+        else:
+            job = CvIngestJob(
+                id=str(uuid.uuid4()),
+                filename=secure_filename(os.path.basename(path)) or "unknown.pdf",
+                filepath=path,
+                cv_id=str(uuid.uuid4()),
+                content_hash=content_hash
+            )
+            session.add(job)
+        # Claimed by this run, so the background workers leave it alone
+        job.batch_id = batch_id
+        job.status = "extracting"
+        job.error = None
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = job.heartbeat_at = datetime.utcnow()
+        pending.append(job)
+    session.commit()
+    return pending, skipped
+
+def _process_group(session, executor, jobs: List[CvIngestJob]) -> List[Dict[str, Any]]:
+    """Parse a group of files in parallel, embed all their chunks, then index them together"""
+    by_path = {job.filepath: job for job in jobs}
+    prepared = []
+    outcomes = []
+    for path, cv_data, error, extract_ms in executor.map(_prepare, list(by_path.keys())):
+        job = by_path[path]
+        job.extract_ms = extract_ms
+        if error is None:
+            try:
+                check_prepared_cv(cv_data, path)
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            job.status, job.error, job.finished_at = "failed", error, datetime.utcnow()
+            outcomes.append({"file": path, "status": "failed", "error": error, "job_id": job.id})
+            continue
+        cv_data["filename"] = job.filename
+        job.chunk_count = cv_data["chunk_count"]
+        job.warning = cv_data["warning"]
+        job.status = "embedding"
+        prepared.append((job, cv_data))
+    session.commit()
+
+    if not prepared:
+        return outcomes
+
+    # One embedding pass for every chunk of the group (create_embeddings batches requests)
+    start = time.perf_counter()
+    all_chunks = [chunk for _, cv_data in prepared for chunk in cv_data["chunks"]]
+    all_embeddings = create_embeddings(all_chunks)
+    embed_ms = int((time.perf_counter() - start) * 1000)
+    offset = 0
+    embedded = []
+    for job, cv_data in prepared:
+        count = len(cv_data["chunks"])
+        cv_data["embeddings"] = all_embeddings[offset:offset + count]
+        offset += count
+        job.embed_ms = embed_ms
+        try:
+            check_embeddings(cv_data["embeddings"])
+        except Exception as e:
+            job.status, job.error, job.finished_at = "failed", str(e), datetime.utcnow()
+            outcomes.append({"file": job.filepath, "status": "failed", "error": str(e), "job_id": job.id})
+            continue
+        job.chunk_count = sum(1 for embedding in cv_data["embeddings"] if embedding)
+        job.status = "indexing"
+        embedded.append((job, cv_data))
+    session.commit()
+    prepared = embedded
+    if not prepared:
+        return outcomes
+
+    start = time.perf_counter()
+    try:
+        store_cvs([(cv_data, job.cv_id) for job, cv_data in prepared])
+    except Exception as e:
+        for job, _ in prepared:
+            job.status, job.error, job.finished_at = "failed", str(e), datetime.utcnow()
+            outcomes.append({"file": job.filepath, "status": "failed", "error": str(e), "job_id": job.id})
+        session.commit()
+        return outcomes
+    index_ms = int((time.perf_counter() - start) * 1000)
+
+    for job, cv_data in prepared:
+        try:
+            refresh_resume_similarities(job.cv_id, [
+                {"chunk_index": i, "vector": embedding}
+                for i, embedding in enumerate(cv_data["embeddings"])
+            ])
+        except Exception as e:
+            print(f"⚠️ Could not update CV/job similarities for {job.filename}: {e}")
+        job.index_ms = index_ms
+        job.status, job.finished_at = "indexed", datetime.utcnow()
+        outcomes.append({
+            "file": job.filepath,
+            "status": "indexed",
+            "cv_id": job.cv_id,
+            "chunks": job.chunk_count,
+            "warning": job.warning,
+            "job_id": job.id
+        })
+    session.commit()
+    return outcomes
+
+def import_cvs(source: str, batch_id: Optional[str] = None, workers: int = BULK_IMPORT_WORKERS,
+               group_size: int = BULK_IMPORT_GROUP_SIZE, remove_source: bool = False) -> Dict[str, Any]:
+    """Ingest every PDF of a folder or zip archive and report per-file outcomes.
+
+    Re-running an import after a crash resumes it: files whose content is
+    already indexed are skipped and interrupted ones keep their cv_id. When
+    the run ends (finished or failed) the extracted files are deleted, and
+    the archive too with `remove_source` (an uploaded copy).
+    """
+    batch_id = batch_id or str(uuid.uuid4())
+    start_batch(batch_id, os.path.basename(source.rstrip(os.sep)) or source)
+    try:
+        report = _run_import(source, batch_id, workers, group_size)
+    except Exception as e:
+        _update_batch(batch_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        _fail_unfinished_jobs(batch_id, str(e))
+        raise
+    finally:
+        _cleanup(source, batch_id, remove_source)
+    _update_batch(batch_id, status="finished", finished_at=datetime.utcnow())
+    return report
+
+def _run_import(source: str, batch_id: str, workers: int, group_size: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    paths = collect_pdfs(source, batch_id)
+    _update_batch(batch_id, status="running", files=len(paths))
+
+    session = Session()
+    try:
+        pending, outcomes = _register_files(session, paths, batch_id)
+        # Keep the claimed files' leases alive so the queue workers do not recover them
+        held = [job.id for job in pending]
+        hold_jobs(held)
+        try:
+            print(f"ℹ️ Bulk import {batch_id}: {len(paths)} PDFs, {len(outcomes)} already indexed")
+            with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+                for start in range(0, len(pending), group_size):
+                    group = pending[start:start + group_size]
+                    outcomes.extend(_process_group(session, executor, group))
+                    print(f"ℹ️ Bulk import {batch_id}: {min(start + group_size, len(pending))}/{len(pending)} processed")
+        finally:
+            release_jobs(held)
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - started
+    indexed = sum(1 for outcome in outcomes if outcome["status"] == "indexed")
+    report = {
+        "batch_id": batch_id,
+        "files": len(paths),
+        "indexed": indexed,
+        "skipped": sum(1 for outcome in outcomes if outcome["status"] == "skipped"),
+        "failed": sum(1 for outcome in outcomes if outcome["status"] == "failed"),
+        "elapsed_seconds": round(elapsed, 2),
+        "docs_per_second": round(indexed / elapsed, 2) if elapsed > 0 else 0.0,
+        "outcomes": outcomes,
+    }
+    print(f"✅ Bulk import {batch_id} finished: {indexed} indexed, "
+          f"{report['skipped']} skipped, {report['failed']} failed, {report['docs_per_second']} docs/sec")
+    return report
+
+def get_batch_report(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Progress of a bulk import from its batch record and ingest jobs (for the admin API)"""
+    session = Session()
+    try:
+        batch = session.get(CvImportBatch, batch_id)
+        jobs = session.query(CvIngestJob).filter(CvIngestJob.batch_id == batch_id).all()
+        if batch is None and not jobs:
+            return None
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        starts = [job.started_at for job in jobs if job.started_at]
+        ends = [job.finished_at for job in jobs if job.finished_at]
+        docs_per_second = None
+        if starts and ends and counts.get("indexed"):
+            elapsed = (max(ends) - min(starts)).total_seconds()
+            docs_per_second = round(counts["indexed"] / elapsed, 2) if elapsed > 0 else None
+        return {
+            "batch_id": batch_id,
+            "status": batch.status if batch else None,
+            "error": batch.error if batch else None,
+            "source": batch.source if batch else None,
+            "files": batch.files if batch and batch.files is not None else len(jobs),
+            "by_status": counts,
+            "docs_per_second": docs_per_second,
+            "created_at": batch.created_at.isoformat() if batch and batch.created_at else None,
+            "finished_at": batch.finished_at.isoformat() if batch and batch.finished_at else None,
+            "jobs": [job_to_dict(job) for job in jobs],
+        }
+    finally:
+        session.close()
+
+# Import when run as a command: python -m architecture.bulk_import <folder-or-zip>
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import CV PDFs from a folder or zip archive")
+    parser.add_argument("source", help="Folder with PDFs or a .zip archive")
+    parser.add_argument("--workers", type=int, default=BULK_IMPORT_WORKERS, help="PDF parsing processes")
+    parser.add_argument("--group-size", type=int, default=BULK_IMPORT_GROUP_SIZE, help="Files per embedding/upsert round")
+    parser.add_argument("--batch-id", default=None, help="Reuse a batch id (e.g. to resume a zip import)")
+    args = parser.parse_args()
+    result = import_cvs(args.source, batch_id=args.batch_id, workers=args.workers, group_size=args.group_size)
+    for outcome in result["outcomes"]:
+        print(f"{outcome['status']:>8}  {outcome['file']}  {outcome.get('error') or ''}")
@@ -0,0 +1,161 @@
+import os
+import time
+import uuid
+import argparse
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams
+
+# Load environment variables
+load_dotenv()
+
+# Storage profiles for cv_collection, from most accurate to most compact:
+# - memory: float32 vectors and HNSW graph in RAM (the original setup)
+# - scalar: int8 quantized copy in RAM, original vectors on disk for rescoring (~4x less RAM)
+# - binary: 1-bit quantized copy in RAM, originals on disk (~32x less RAM; needs oversampling)
+COLLECTION_PROFILES = {
+    "memory": {"quantization": None, "on_disk": False, "oversampling": None},
+    "scalar": {"quantization": "scalar", "on_disk": True, "oversampling": None},
+    "binary": {"quantization": "binary", "on_disk": True, "oversampling": 3.0},
+}
+QDRANT_CV_PROFILE = os.getenv("QDRANT_CV_PROFILE", "memory")
+
+def _env(name: str, cast, default):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+def get_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """Settings of a named profile, with QDRANT_* environment overrides applied"""
+    name = name or QDRANT_CV_PROFILE
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}', expected one of {sorted(COLLECTION_PROFILES)}")
+    profile = dict(COLLECTION_PROFILES[name], name=name)
+    quantization = _env("QDRANT_QUANTIZATION", str.lower, profile["quantization"])
+    profile["quantization"] = None if quantization in (None, "none") else quantization
+    profile["on_disk"] = _env("QDRANT_ON_DISK", lambda v: v == "1", profile["on_disk"])
+    profile["oversampling"] = _env("QDRANT_OVERSAMPLING", float, profile["oversampling"])
+    profile["rescore"] = _env("QDRANT_RESCORE", lambda v: v == "1", True)
+    profile["hnsw_m"] = _env("QDRANT_HNSW_M", int, 16)
+    profile["hnsw_ef_construct"] = _env("QDRANT_HNSW_EF_CONSTRUCT", int, 100)
+    profile["search_ef"] = _env("QDRANT_SEARCH_EF", int, None)
+    return profile
+
+def vectors_config(profile: Dict[str, Any], size: int) -> VectorParams:
+    return VectorParams(size=size, distance=Distance.COSINE, on_disk=profile["on_disk"])
+
+def hnsw_config(profile: Dict[str, Any]) -> models.HnswConfigDiff:
+    return models.HnswConfigDiff(m=profile["hnsw_m"], ef_construct=profile["hnsw_ef_construct"])
+
+def quantization_config(profile: Dict[str, Any]):
+    """Quantization of a profile; the quantized copy always stays in RAM"""
+    if profile["quantization"] == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if profile["quantization"] == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+def search_params(profile: Dict[str, Any]) -> Optional[models.SearchParams]:
+    """Per-query search settings of a profile (None keeps the server defaults)"""
+    quantization = None
+    if profile["quantization"]:
+        quantization = models.QuantizationSearchParams(
+            rescore=profile["rescore"],
+            oversampling=profile["oversampling"]
+        )
+    if quantization is None and profile["search_ef"] is None:
+        return None
+    return models.SearchParams(hnsw_ef=profile["search_ef"], quantization=quantization)
+
+def profile_differences(profile: Dict[str, Any], info) -> Dict[str, Any]:
+    """update_collection arguments needed to bring an existing collection to a profile"""
+    changes: Dict[str, Any] = {}
+    params = info.config.params.vectors
+    if bool(getattr(params, "on_disk", False)) != profile["on_disk"]:
+        changes["vectors_config"] = {"": models.VectorParamsDiff(on_disk=profile["on_disk"])}
+    hnsw = info.config.hnsw_config
+    if hnsw.m != profile["hnsw_m"] or hnsw.ef_construct != profile["hnsw_ef_construct"]:
+        changes["hnsw_config"] = hnsw_config(profile)
+    wanted = quantization_config(profile)
+    current = info.config.quantization_config
+    if type(wanted) is not type(current):
+        changes["quantization_config"] = wanted if wanted is not None else models.Disabled.DISABLED
+    return changes
+
+def _synthetic_corpus(count: int, size: int, clusters: int, seed: int = 7):
+    """Clustered random vectors, closer to real embeddings than uniform noise"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, size)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(count, size)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def benchmark_profiles(client, names: List[str], count: int, size: int, queries: int, top_k: int) -> Dict[str, Dict[str, float]]:
+    """Recall@k (against exact search) and query latency of each profile on a synthetic corpus"""
+    corpus = _synthetic_corpus(count + queries, size, clusters=max(8, count // 500))
+    data, probes = corpus[:count], corpus[count:]
+    results = {}
+    for name in names:
+        profile = get_profile(name)
+        collection_name = f"bench_{name}_{uuid.uuid4().hex[:8]}"
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=vectors_config(profile, size),
+            hnsw_config=hnsw_config(profile),
+            quantization_config=quantization_config(profile)
+        )
+        try:
+            for start in range(0, count, 1024):
+                client.upsert(
+                    collection_name=collection_name,
+                    points=models.Batch(
+                        ids=list(range(start, min(start + 1024, count))),
+                        vectors=data[start:start + 1024].tolist()
+                    ),
+                    wait=True
+                )
+            params = search_params(profile)
+            hits, latencies = 0, []
+            for probe in probes.tolist():
+                exact = client.search(collection_name=collection_name, query_vector=probe, limit=top_k,
+                                      search_params=models.SearchParams(exact=True))
+                started = time.perf_counter()
+                approx = client.search(collection_name=collection_name, query_vector=probe, limit=top_k,
+                                       search_params=params)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += len({p.id for p in exact} & {p.id for p in approx})
+            latencies.sort()
+            results[name] = {
+                "recall_at_k": round(hits / (len(probes) * top_k), 4),
+                "latency_ms_p50": round(latencies[len(latencies) // 2], 2),
+                "latency_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+            }
+        finally:
+            client.delete_collection(collection_name=collection_name)
+    return results
+
+# Compare profiles when run as a command: python -m architecture.collection_profiles [--local]
+if __name__ == "__main__":
+    from qdrant_client import QdrantClient
+
+    parser = argparse.ArgumentParser(description="Recall vs latency of cv_collection storage profiles")
+    parser.add_argument("--profiles", default=",".join(COLLECTION_PROFILES), help="Comma separated profile names")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--local", action="store_true",
+                        help="Use qdrant-client's in-process mode (exact search only, so it measures the baseline)")
+    args = parser.parse_args()
+
+    if args.local:
+        bench_client = QdrantClient(location=":memory:")
+    else:
+        bench_client = QdrantClient(host=os.getenv("QDRANT_HOST", "localhost"), port=int(os.getenv("QDRANT_PORT", "6333")))
+    report = benchmark_profiles(bench_client, args.profiles.split(","), args.points, args.dimensions, args.queries, args.top_k)
+    for name, stats in report.items():
+        print(f"{name:>8}: {stats}")
@@ -1,20 +1,25 @@
 import os
+import uuid
 import tempfile
+import threading
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-from .model import process_cv, create_embeddings
-from .vectordb import store_cv, initialize_vector_db, search_similar_chunks
+from . import query_cache
+from .vectordb import initialize_vector_db, search_similar_chunks, search_similar_cvs, search_hybrid, cv_collection_version
+from .ingest_queue import enqueue_cv, get_ingest_job, start_workers
+from .similarity import backfill_resume_cv_ids
 
 # Create blueprint for CV processing
 cv_blueprint = Blueprint('cv', __name__)
 
-# Initialize vector database
-initialize_vector_db()
-
 # Configure upload settings
 UPLOAD_FOLDER = tempfile.gettempdir()  # Use system temp directory
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Search result limits
+SEARCH_MAX_RESULTS = 50
+SEARCH_MAX_GROUP_SIZE = 10
+
 def allowed_file(filename):
     """Check if the file extension is allowed"""
     return '.' in filename and \
@@ -22,7 +27,7 @@ def allowed_file(filename):
 
 @cv_blueprint.route('/upload', methods=['POST'])
 def upload_cv():
-    """Endpoint to upload and process CV"""
+    """Endpoint to upload a CV and queue it for processing"""
     # Check if file part exists in request
     if 'file' not in request.files:
         return jsonify({"error": "No file part in the request"}), 400
@@ -38,61 +43,102 @@ def upload_cv():
         # Secure the filename
         filename = secure_filename(file.filename)
         
-        # Save file to temp directory
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        # Save file to temp directory under a unique name
+        filepath = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{filename}")
         file.save(filepath)
         
         try:
-            # Process the CV
-            cv_data = process_cv(filepath)
-            
-            # Store CV data in Qdrant
-            cv_id = store_cv(cv_data)
-            
-            # Remove temporary file
-            os.remove(filepath)
-            
-            return jsonify({
-                "success": True,
-                "cv_id": cv_id,
-                "message": "CV processed and stored successfully in Qdrant",
-                "filename": filename,
-                "chunks": cv_data["chunk_count"]
-            }), 201
+            # Queue the CV; extraction, embedding and indexing run in background workers
+            job = enqueue_cv(filepath, filename)
         except Exception as e:
             # Remove temporary file in case of error
             if os.path.exists(filepath):
                 os.remove(filepath)
-            return jsonify({"error": f"Error processing CV: {str(e)}"}), 500
+            return jsonify({"error": f"Error queuing CV: {str(e)}"}), 500
+        
+        return jsonify({
+            "success": True,
+            "job_id": job["job_id"],
+            "cv_id": job["cv_id"],
+            "status": job["status"],
+            "status_url": f"/api/cv/upload/{job['job_id']}",
+            "message": "CV accepted for processing",
+            "filename": filename
+        }), 202
     else:
         return jsonify({"error": "File type not allowed. Please upload a PDF file."}), 400
 
+@cv_blueprint.route('/upload/<string:job_id>', methods=['GET'])
+def upload_status(job_id):
+    """Endpoint to check the processing status of an uploaded CV"""
+    job = get_ingest_job(job_id)
+    if job is None:
+        return jsonify({"error": "Upload job not found"}), 404
+    return jsonify(job)
+
 @cv_blueprint.route('/search', methods=['POST'])
 def search_cv():
-    """Endpoint to search for similar CVs based on a text query"""
+    """Endpoint to search for similar CVs based on a text query.
+
+    mode "chunks" (default) returns the best matching chunks; mode
+    "candidates" returns the best matching CVs with their chunks; mode
+    "hybrid" fuses keyword (BM25) and vector rankings of chunks.
+    """
     # Get request data
     data = request.json
     if not data or 'query' not in data:
         return jsonify({"error": "No query provided"}), 400
     
     query = data['query']
-    
+    mode = data.get('mode', 'chunks')
+    if mode not in ('chunks', 'candidates', 'hybrid'):
+        return jsonify({"error": "mode must be 'chunks', 'candidates' or 'hybrid'"}), 400
     try:
-        # Create embedding for the query
-        query_embeddings = create_embeddings([query])
-        if not query_embeddings or len(query_embeddings[0]) == 0:
-            return jsonify({"error": "Failed to create embedding for query"}), 500
+        limit = max(1, min(int(data.get('limit', 5)), SEARCH_MAX_RESULTS))
+        group_size = max(1, min(int(data.get('group_size', 3)), SEARCH_MAX_GROUP_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit and group_size must be integers"}), 400
+    
+    def run_search():
+        # Repeated queries reuse their cached embedding (and concurrent ones share one call)
+        query_embedding = query_cache.embed_query(query)
+        if not query_embedding:
+            raise ValueError("Failed to create embedding for query")
         
+        if mode == 'candidates':
+            # One group per CV, ranked by its best chunk
+            return search_similar_cvs(query_embedding, limit=limit, group_size=group_size)
+        if mode == 'hybrid':
+            # Exact skill tokens from BM25 plus semantic matches, fused by rank
+            return search_hybrid(query, query_embedding, limit=limit)
         # Search for chunks using vector similarity in Qdrant
-        results = search_similar_chunks(query_embeddings[0])
+        return search_similar_chunks(query_embedding, limit=limit)
+    
+    try:
+        # Identical searches against an unchanged collection skip embedding and Qdrant
+        cache_key = (mode, query_cache.normalize_query(query), limit, group_size)
+        results = query_cache.cached_results(cache_key, cv_collection_version(), run_search)
         
         return jsonify({
             "success": True,
+            "mode": mode,
             "results": results
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
     except Exception as e:
         return jsonify({"error": f"Error searching CVs: {str(e)}"}), 500
 
+def _backfill_cv_ids():
+    try:
+        backfill_resume_cv_ids()
+    except Exception as e:
+        print(f"⚠️ Could not backfill legacy profile cv_ids: {e}")
+
 def register_routes(app):
-    """Register blueprint with Flask app"""
-    app.register_blueprint(cv_blueprint, url_prefix='/api/cv') 
\ No newline at end of file
+    """Register blueprint with Flask app, initialize the vector store and start the CV ingest workers"""
+    initialize_vector_db()
+    app.register_blueprint(cv_blueprint, url_prefix='/api/cv')
+    start_workers()
+    # Legacy profiles get their cv_id in the background so startup is not blocked
+    threading.Thread(target=_backfill_cv_ids, name="cv-id-backfill", daemon=True).start()
\ No newline at end of file
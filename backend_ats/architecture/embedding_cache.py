@@ -0,0 +1,176 @@
+import os
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Cache settings
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "2048"))
+EMBEDDING_CACHE_DISK_ITEMS = int(os.getenv("EMBEDDING_CACHE_DISK_ITEMS", "100000"))
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "ats_embedding_cache.sqlite3")
+)
+
+_lock = threading.Lock()
+_memory: "OrderedDict[str, List[float]]" = OrderedDict()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_connection = None
+# Rows in the on-disk tier, counted once when it is opened and kept up to date on writes
+_disk_items = 0
+# When the disk tier overflows, evict down to this share of EMBEDDING_CACHE_DISK_ITEMS,
+# so the eviction (and its exact recount) runs once per batch of new entries
+_EVICT_TO = 0.9
+
+def cache_key(model: str, text: str) -> str:
+    """Content address of an embedding: hash of the model name and the text"""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+def _get_connection():
+    """Open the on-disk cache lazily and make sure its table exists"""
+    global _connection, _disk_items
+    if _connection is None:
+        _connection = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        _connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+        )
+        _connection.commit()
+        _disk_items = _connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    return _connection
+
+def _remember(key: str, vector: List[float]):
+    """Put a vector in the in-process LRU, evicting the least recently used"""
+    _memory[key] = vector
+    _memory.move_to_end(key)
+    while len(_memory) > EMBEDDING_CACHE_MEMORY_ITEMS:
+        _memory.popitem(last=False)
+
+def get_many(keys: List[str]) -> Dict[str, List[float]]:
+    """Return cached vectors for the given keys (memory first, then disk)"""
+    if not EMBEDDING_CACHE_ENABLED or not keys:
+        return {}
+
+    found: Dict[str, List[float]] = {}
+    with _lock:
+        missing = []
+        for key in keys:
+            if key in _memory:
+                _memory.move_to_end(key)
+                found[key] = _memory[key]
+                _stats["memory_hits"] += 1
+            else:
+                missing.append(key)
+
+        if missing:
+            try:
+                conn = _get_connection()
+                unique_missing = list(dict.fromkeys(missing))
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(unique_missing), 500):
+                    part = unique_missing[start:start + 500]
+                    placeholders = ",".join("?" for _ in part)
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        found[key] = vector.tolist()
+                        _remember(key, found[key])
+                    if rows:
+                        conn.executemany(
+                            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                            [(time.time(), key) for key, _ in rows]
+                        )
+                conn.commit()
+            except Exception as e:
+                print(f"⚠️ Embedding cache read failed: {e}")
+
+            for key in missing:
+                if key in found:
+                    _stats["disk_hits"] += 1
+                else:
+                    _stats["misses"] += 1
+    return found
+
+def put_many(items: Dict[str, List[float]]):
+    """Store vectors in both tiers, evicting old disk entries past the limit"""
+    items = {key: vector for key, vector in items.items() if vector}
+    if not EMBEDDING_CACHE_ENABLED or not items:
+        return
+
+    with _lock:
+        for key, vector in items.items():
+            _remember(key, vector)
+        try:
+            conn = _get_connection()
+            keys = list(items.keys())
+            existing = 0
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" for _ in part)
+                existing += conn.execute(
+                    f"SELECT COUNT(*) FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchone()[0]
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            _stats["writes"] += len(items)
+            _add_disk_items(conn, len(items) - existing)
+            conn.commit()
+        except Exception as e:
+            print(f"⚠️ Embedding cache write failed: {e}")
+
+def _add_disk_items(conn, added: int):
+    """Track new rows and evict the least recently used ones past the limit"""
+    global _disk_items
+    _disk_items += added
+    if _disk_items <= EMBEDDING_CACHE_DISK_ITEMS:
+        return
+    # Other processes may share the file: recount before deciding how much to evict
+    total = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    overflow = total - int(EMBEDDING_CACHE_DISK_ITEMS * _EVICT_TO) if total > EMBEDDING_CACHE_DISK_ITEMS else 0
+    if overflow > 0:
+        conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (overflow,)
+        )
+        _stats["evictions"] += overflow
+    _disk_items = total - overflow
+
+def get_stats() -> Dict[str, float]:
+    """Return hit/miss counters for the embedding cache"""
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_items"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+    stats["enabled"] = EMBEDDING_CACHE_ENABLED
+    return stats
+
+def clear(disk: bool = False):
+    """Drop the in-process tier (and optionally the on-disk tier)"""
+    global _disk_items
+    with _lock:
+        _memory.clear()
+        if disk:
+            conn = _get_connection()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            _disk_items = 0
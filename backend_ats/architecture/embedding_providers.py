@@ -0,0 +1,192 @@
+import os
+import re
+import time
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Provider selection: "openai" (remote API) or "local" (hashed n-grams on CPU)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+LOCAL_EMBEDDING_DIMENSIONS = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "1024"))
+
+# Output sizes of the OpenAI embedding models
+OPENAI_MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+class EmbeddingProvider:
+    """Turns texts into fixed-size vectors.
+
+    `model_name` identifies the vector space (cache keys and job profile
+    hashes include it) and `dimensions` is the size of every vector.
+    """
+    name = "base"
+    model_name = ""
+    dimensions = 0
+    max_input_tokens = 8191
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts, returning one vector per text in order"""
+        raise NotImplementedError
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI API; the client is created on first use"""
+    name = "openai"
+    max_input_tokens = 8191  # Per-input limit of the OpenAI embedding models
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.api_model = model_name or os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+        native = OPENAI_MODEL_DIMENSIONS.get(self.api_model, 1536)
+        self.dimensions = int(os.getenv("EMBEDDING_DIMENSIONS", str(native)))
+        # Only the text-embedding-3 models can return shortened vectors
+        self.shortened = self.api_model.startswith("text-embedding-3") and self.dimensions != native
+        if self.dimensions != native and not self.shortened:
+            print(f"⚠️ {self.api_model} does not support EMBEDDING_DIMENSIONS, using {native}")
+            self.dimensions = native
+        # Shortened vectors are a different vector space, so they get their own cache keys
+        self.model_name = f"{self.api_model}-{self.dimensions}" if self.shortened else self.api_model
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    api_key = os.getenv("OPENAI_API_KEY")
+                    try:
+                        # First try the standard initialization
+                        self._client = OpenAI(api_key=api_key)
+                    except TypeError as e:
+                        if "proxies" not in str(e):
+                            raise
+                        # If there's a proxies error, try with an explicit http client
+                        import httpx
+                        self._client = OpenAI(api_key=api_key, http_client=httpx.Client())
+        return self._client
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        options = {"dimensions": self.dimensions} if self.shortened else {}
+        response = self._get_client().embeddings.create(
+            model=self.api_model,
+            input=texts,
+            encoding_format="float",
+            **options
+        )
+        vectors: List[List[float]] = [[] for _ in texts]
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return vectors
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Offline embeddings from hashed word and character n-grams.
+
+    Each feature is hashed to a signed bucket of a fixed-size vector, which
+    is then L2-normalized. Quality is below a neural model, but it needs no
+    network or model download, and shared vocabulary (skills, tools, titles)
+    still produces high cosine similarity.
+    """
+    name = "local"
+    max_input_tokens = 1_000_000  # No model context to respect
+
+    _word_pattern = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dimensions: int = LOCAL_EMBEDDING_DIMENSIONS, char_ngram: int = 3):
+        self.dimensions = dimensions
+        self.char_ngram = char_ngram
+        self.model_name = f"local-hashing-{dimensions}-c{char_ngram}"
+
+    def _features(self, text: str) -> List[str]:
+        words = self._word_pattern.findall(text.lower())
+        features = [f"w:{word}" for word in words]
+        features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+        n = self.char_ngram
+        for word in words:
+            padded = f" {word} "
+            features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if (digest >> 63) else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return []
+        return (vector / norm).tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": HashingEmbeddingProvider,
+}
+
+_provider: Optional[EmbeddingProvider] = None
+
+def get_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """Return the configured provider (EMBEDDING_PROVIDER), or a new one by name"""
+    global _provider
+    if name is not None:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown embedding provider '{name}', expected one of {sorted(PROVIDERS)}")
+        return PROVIDERS[name]()
+    if _provider is None:
+        _provider = get_provider(EMBEDDING_PROVIDER)
+    return _provider
+
+def benchmark_providers(texts: List[str], names: List[str], batch_size: int = 64) -> Dict[str, Dict[str, float]]:
+    """Measure per-batch latency and throughput of each provider on the same texts"""
+    results = {}
+    for name in names:
+        provider = get_provider(name)
+        latencies = []
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            batch_started = time.perf_counter()
+            provider.embed(texts[start:start + batch_size])
+            latencies.append((time.perf_counter() - batch_started) * 1000)
+        elapsed = time.perf_counter() - started
+        results[name] = {
+            "texts": len(texts),
+            "dimensions": provider.dimensions,
+            "batch_ms_mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "batch_ms_max": round(max(latencies), 2) if latencies else 0.0,
+            "texts_per_second": round(len(texts) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+    return results
+
+# Compare providers when run as a command: python -m architecture.embedding_providers [--pdf-folder ...]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding provider latency/throughput benchmark")
+    parser.add_argument("--providers", default="local,openai", help="Comma separated provider names")
+    parser.add_argument("--pdf-folder", default=None, help="Use the chunks of these CV PDFs as input")
+    parser.add_argument("--samples", type=int, default=256, help="Synthetic texts when no folder is given")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.pdf_folder:
+        from .model import prepare_cv
+        texts = []
+        for name in sorted(os.listdir(args.pdf_folder)):
+            if name.lower().endswith(".pdf"):
+                texts.extend(prepare_cv(os.path.join(args.pdf_folder, name))["chunks"])
+    else:
+        texts = [
+            f"Candidate {i}: {3 + i % 7} years of experience with Python, SQL and Flask. "
+            f"Worked on data pipelines, REST APIs and cloud deployments in team {i % 13}."
+            for i in range(args.samples)
+        ]
+
+    for name, stats in benchmark_providers(texts, args.providers.split(","), args.batch_size).items():
+        print(f"{name:>8}: {stats}")
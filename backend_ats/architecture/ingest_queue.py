@@ -0,0 +1,338 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import from auth module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.create_db import engine, CvIngestJob
+from .model import prepare_cv, create_embeddings
+from .vectordb import store_cv
+from .similarity import refresh_resume_similarities
+
+# Load environment variables
+load_dotenv()
+
+# Queue settings
+CV_UPLOAD_FOLDER = os.getenv("CV_UPLOAD_FOLDER", os.path.join(tempfile.gettempdir(), "ats_cv_uploads"))
+CV_INGEST_WORKERS = int(os.getenv("CV_INGEST_WORKERS", "2"))
+CV_INGEST_POLL_SECONDS = float(os.getenv("CV_INGEST_POLL_SECONDS", "2"))
+CV_INGEST_MAX_ATTEMPTS = int(os.getenv("CV_INGEST_MAX_ATTEMPTS", "3"))
+# A job in a working state whose heartbeat is older than this was orphaned by a
+# crash and is requeued; held jobs are refreshed every third of it
+CV_INGEST_LEASE_SECONDS = int(os.getenv("CV_INGEST_LEASE_SECONDS", "120"))
+
+ACTIVE_STATUSES = ("extracting", "embedding", "indexing")
+
+Session = sessionmaker(bind=engine)
+
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+# Ids of the jobs this process is working on, kept alive by the heartbeat thread
+_held_jobs = set()
+_held_lock = threading.Lock()
+_heartbeat_thread = None
+_last_recovery = 0.0
+
+class UnprocessableCvError(Exception):
+    """The file itself cannot be indexed, so retrying it would fail again"""
+
+def check_prepared_cv(cv_data: Dict[str, Any], filepath: str):
+    """Reject a CV that produced no chunks (nothing would be searchable)"""
+    if cv_data["chunk_count"]:
+        return
+    if cv_data.get("truncated") == "file_size":
+        raise UnprocessableCvError(cv_data["warning"])
+    raise UnprocessableCvError("No text could be extracted from the PDF (empty, scanned, encrypted or unreadable)")
+
+def check_embeddings(embeddings):
+    """Fail (for a retry) when no chunk could be embedded"""
+    if not any(embeddings):
+        raise RuntimeError("The embedding provider returned no vectors for this CV")
+
+def _ms_since(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+def _is_upload_copy(path: str) -> bool:
+    """Whether a path lives in the upload folder managed by this queue"""
+    folder = os.path.abspath(CV_UPLOAD_FOLDER)
+    return os.path.commonpath([folder, os.path.abspath(path)]) == folder
+
+def file_sha256(path: str) -> str:
+    """Content hash of an uploaded file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def job_to_dict(job: CvIngestJob) -> Dict[str, Any]:
+    """Public representation of an ingest job (status API payload)"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "cv_id": job.cv_id,
+        "chunks": job.chunk_count,
+        "error": job.error,
+        "warning": job.warning,
+        "attempts": job.attempts,
+        "batch_id": job.batch_id,
+        "timings_ms": {
+            "extract": job.extract_ms,
+            "embed": job.embed_ms,
+            "index": job.index_ms,
+        },
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+def enqueue_cv(source_path: str, filename: str, move: bool = True) -> Dict[str, Any]:
+    """Persist an uploaded PDF and queue it for processing; returns the job"""
+    os.makedirs(CV_UPLOAD_FOLDER, exist_ok=True)
+    job_id = str(uuid.uuid4())
+    stored_path = os.path.join(CV_UPLOAD_FOLDER, f"{job_id}_{filename}")
+    if move:
+        shutil.move(source_path, stored_path)
+    else:
+        shutil.copyfile(source_path, stored_path)
+
+    session = Session()
+    try:
+        job = CvIngestJob(
+            id=job_id,
+            filename=filename,
+            filepath=stored_path,
+            cv_id=str(uuid.uuid4()),
+            content_hash=file_sha256(stored_path),
+            status="queued"
+        )
+        session.add(job)
+        session.commit()
+        result = job_to_dict(job)
+    except Exception:
+        session.rollback()
+        if os.path.exists(stored_path):
+            os.remove(stored_path)
+        raise
+    finally:
+        session.close()
+
+    _wakeup.set()
+    return result
+
+def get_ingest_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the status of an ingest job, or None if unknown"""
+    session = Session()
+    try:
+        job = session.query(CvIngestJob).filter(CvIngestJob.id == job_id).first()
+        return job_to_dict(job) if job else None
+    finally:
+        session.close()
+
+def _set_status(session, job: CvIngestJob, status: str, **fields):
+    job.status = status
+    for key, value in fields.items():
+        setattr(job, key, value)
+    session.commit()
+
+def _beat():
+    """Heartbeat thread: refresh the lease of every held job"""
+    while True:
+        time.sleep(max(1.0, CV_INGEST_LEASE_SECONDS / 3))
+        with _held_lock:
+            job_ids = list(_held_jobs)
+        if not job_ids:
+            continue
+        session = Session()
+        try:
+            session.query(CvIngestJob).filter(CvIngestJob.id.in_(job_ids)).update(
+                {CvIngestJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Could not refresh CV ingest heartbeats: {e}")
+        finally:
+            session.close()
+
+def hold_jobs(job_ids: Iterable[str]):
+    """Keep the leases of these jobs alive until release_jobs (workers and bulk imports)"""
+    global _heartbeat_thread
+    with _held_lock:
+        _held_jobs.update(job_ids)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_beat, name="cv-ingest-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+def release_jobs(job_ids: Iterable[str]):
+    with _held_lock:
+        _held_jobs.difference_update(job_ids)
+
+def claim_next_job(session) -> Optional[CvIngestJob]:
+    """Atomically move the oldest queued job to 'extracting' and return it.
+
+    The conditional UPDATE makes claiming safe across threads and processes:
+    only one worker sees its update affect the row.
+    """
+    candidates = (
+        session.query(CvIngestJob.id)
+        .filter(CvIngestJob.status == "queued")
+        .order_by(CvIngestJob.created_at.asc())
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = (
+            session.query(CvIngestJob)
+            .filter(CvIngestJob.id == job_id, CvIngestJob.status == "queued")
+            .update({
+                CvIngestJob.status: "extracting",
+                CvIngestJob.started_at: datetime.utcnow(),
+                CvIngestJob.heartbeat_at: datetime.utcnow(),
+                CvIngestJob.attempts: CvIngestJob.attempts + 1,
+            }, synchronize_session=False)
+        )
+        session.commit()
+        if claimed == 1:
+            hold_jobs([job_id])
+            return session.query(CvIngestJob).filter(CvIngestJob.id == job_id).first()
+    return None
+
+def _remove_upload_copy(job: CvIngestJob):
+    # Only delete our own copies (bulk imports may point at the recruiter's folder)
+    if _is_upload_copy(job.filepath) and os.path.exists(job.filepath):
+        os.remove(job.filepath)
+
+def process_ingest_job(session, job: CvIngestJob):
+    """Run extraction, embedding and indexing for a claimed job, recording timings.
+
+    A failed attempt is requeued until the job has been tried
+    CV_INGEST_MAX_ATTEMPTS times; a file that cannot be indexed fails at once.
+    """
+    try:
+        start = time.perf_counter()
+        cv_data = prepare_cv(job.filepath)
+        # Keep the uploaded name rather than the stored (job id prefixed) one
+        cv_data["filename"] = job.filename
+        _set_status(session, job, "embedding", extract_ms=_ms_since(start), chunk_count=cv_data["chunk_count"],
+                    warning=cv_data["warning"])
+        check_prepared_cv(cv_data, job.filepath)
+
+        start = time.perf_counter()
+        cv_data["embeddings"] = create_embeddings(cv_data["chunks"])
+        check_embeddings(cv_data["embeddings"])
+        _set_status(session, job, "indexing", embed_ms=_ms_since(start),
+                    chunk_count=sum(1 for embedding in cv_data["embeddings"] if embedding))
+
+        start = time.perf_counter()
+        store_cv(cv_data, cv_id=job.cv_id)
+        try:
+            refresh_resume_similarities(job.cv_id, [
+                {"chunk_index": i, "vector": embedding}
+                for i, embedding in enumerate(cv_data["embeddings"])
+            ])
+        except Exception as e:
+            print(f"⚠️ Could not update CV/job similarities for {job.filename}: {e}")
+        _set_status(session, job, "indexed", index_ms=_ms_since(start), finished_at=datetime.utcnow(), error=None)
+
+        _remove_upload_copy(job)
+        print(f"✅ CV ingest job {job.id} indexed ({job.chunk_count} chunks)")
+    except Exception as e:
+        session.rollback()
+        if not isinstance(e, UnprocessableCvError) and (job.attempts or 0) < CV_INGEST_MAX_ATTEMPTS:
+            print(f"⚠️ CV ingest job {job.id} attempt {job.attempts} failed, requeued: {e}")
+            _set_status(session, job, "queued", error=str(e))
+        else:
+            print(f"❌ CV ingest job {job.id} failed: {e}")
+            _set_status(session, job, "failed", error=str(e), finished_at=datetime.utcnow())
+            _remove_upload_copy(job)
+    finally:
+        release_jobs([job.id])
+
+def recover_stale_jobs() -> int:
+    """Requeue jobs whose worker stopped renewing their lease (e.g. the process crashed)"""
+    session = Session()
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=CV_INGEST_LEASE_SECONDS)
+        last_seen = func.coalesce(CvIngestJob.heartbeat_at, CvIngestJob.updated_at)
+        stale = (
+            session.query(CvIngestJob.id, CvIngestJob.status, CvIngestJob.attempts)
+            .filter(CvIngestJob.status.in_(ACTIVE_STATUSES), last_seen < cutoff)
+            .all()
+        )
+        recovered = 0
+        for job_id, status, attempts in stale:
+            if attempts >= CV_INGEST_MAX_ATTEMPTS:
+                values = {CvIngestJob.status: "failed", CvIngestJob.error: "Interrupted too many times",
+                          CvIngestJob.finished_at: datetime.utcnow()}
+            else:
+                values = {CvIngestJob.status: "queued"}
+            # Conditional on the lease still being expired, so only one process recovers a job
+            recovered += (
+                session.query(CvIngestJob)
+                .filter(CvIngestJob.id == job_id, CvIngestJob.status == status, last_seen < cutoff)
+                .update(values, synchronize_session=False)
+            )
+        session.commit()
+        return recovered
+    except Exception as e:
+        session.rollback()
+        print(f"⚠️ Could not recover stale CV ingest jobs: {e}")
+        return 0
+    finally:
+        session.close()
+
+def _recover_if_due():
+    """Run stale job recovery at most once per lease period in this process"""
+    global _last_recovery
+    with _workers_lock:
+        if time.monotonic() - _last_recovery < CV_INGEST_LEASE_SECONDS:
+            return
+        _last_recovery = time.monotonic()
+    recovered = recover_stale_jobs()
+    if recovered:
+        print(f"ℹ️ Requeued {recovered} interrupted CV ingest jobs")
+        _wakeup.set()
+
+def _worker_loop():
+    while True:
+        _recover_if_due()
+        session = Session()
+        try:
+            job = claim_next_job(session)
+            if job is not None:
+                process_ingest_job(session, job)
+                continue
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ CV ingest worker error: {e}")
+        finally:
+            session.close()
+        # Nothing to do: sleep until a new upload arrives or the poll interval passes
+        _wakeup.wait(CV_INGEST_POLL_SECONDS)
+        _wakeup.clear()
+
+def start_workers(count: int = CV_INGEST_WORKERS):
+    """Start the background worker threads once per process"""
+    with _workers_lock:
+        if _workers or count <= 0:
+            return
+        for i in range(count):
+            worker = threading.Thread(target=_worker_loop, name=f"cv-ingest-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+        print(f"✅ Started {count} CV ingest workers")
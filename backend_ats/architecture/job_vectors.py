@@ -0,0 +1,92 @@
+import os
+import sys
+import hashlib
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add parent directory to path to import from auth module when run as a command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from .model import create_embeddings, EMBEDDING_MODEL
+from .vectordb import store_job_vector, get_job_vectors, delete_job_vector
+
+def profile_hash(perfil_ideal: str) -> str:
+    """Fingerprint of the text a job vector was computed from.
+
+    Includes the embedding model so switching models also marks vectors stale.
+    """
+    return hashlib.sha256(f"{EMBEDDING_MODEL}\0{perfil_ideal}".encode("utf-8")).hexdigest()
+
+def refresh_job_vector(job_id: int, perfil_ideal: Optional[str]) -> bool:
+    """Recompute and store the vector of a job, or drop it if the profile is empty"""
+    if not perfil_ideal:
+        delete_job_vector(job_id)
+        return False
+    embeddings = create_embeddings([perfil_ideal])
+    if not embeddings or len(embeddings[0]) == 0:
+        return False
+    store_job_vector(job_id, embeddings[0], profile_hash(perfil_ideal))
+    return True
+
+def load_job_vectors(jobs: Iterable[Tuple[int, Optional[str]]]) -> Dict[int, List[float]]:
+    """Return {job_id: vector} for (job_id, perfil_ideal) pairs.
+
+    Stored vectors are reused when their text hash still matches the profile;
+    missing or stale ones are embedded in a single batch and written back.
+    """
+    wanted = {job_id: text for job_id, text in jobs if text}
+    if not wanted:
+        return {}
+
+    stored = get_job_vectors(list(wanted.keys()))
+    vectors: Dict[int, List[float]] = {}
+    stale: List[int] = []
+    for job_id, text in wanted.items():
+        entry = stored.get(job_id)
+        if entry and entry.get("vector") and entry.get("text_hash") == profile_hash(text):
+            vectors[job_id] = entry["vector"]
+        else:
+            stale.append(job_id)
+
+    if stale:
+        embeddings = create_embeddings([wanted[job_id] for job_id in stale])
+        for job_id, embedding in zip(stale, embeddings):
+            if not embedding:
+                continue
+            vectors[job_id] = embedding
+            try:
+                store_job_vector(job_id, embedding, profile_hash(wanted[job_id]))
+            except Exception as e:
+                print(f"⚠️ Could not store vector for job {job_id}: {e}")
+    return vectors
+
+def load_job_vector(job_id: int, perfil_ideal: Optional[str]) -> Optional[List[float]]:
+    """Single-job variant of load_job_vectors"""
+    return load_job_vectors([(job_id, perfil_ideal)]).get(job_id)
+
+def backfill_job_vectors(force: bool = False) -> Dict[str, int]:
+    """Compute vectors for every job with a perfil_ideal that lacks a current one"""
+    from sqlalchemy.orm import sessionmaker
+    from auth.create_db import engine, Job
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    try:
+        jobs = [(job_id, text) for job_id, text in session.query(Job.id, Job.perfil_ideal).all() if text]
+    finally:
+        session.close()
+
+    if force:
+        for job_id, _ in jobs:
+            delete_job_vector(job_id)
+    vectors = load_job_vectors(jobs)
+    summary = {"jobs": len(jobs), "vectors": len(vectors), "failed": len(jobs) - len(vectors)}
+    print(f"✅ Job vectors backfilled: {summary}")
+    return summary
+
+# Backfill when run as a command: python -m architecture.job_vectors [--force]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill perfil_ideal vectors for existing jobs")
+    parser.add_argument("--force", action="store_true", help="Recompute every vector, even if current")
+    args = parser.parse_args()
+    backfill_job_vectors(force=args.force)
@@ -0,0 +1,240 @@
+import os
+import re
+import math
+import sqlite3
+import argparse
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Index settings
+LEXICAL_INDEX_ENABLED = os.getenv("LEXICAL_INDEX_ENABLED", "1") == "1"
+LEXICAL_INDEX_PATH = os.getenv(
+    "LEXICAL_INDEX_PATH",
+    os.path.join(tempfile.gettempdir(), "ats_lexical_index.sqlite3")
+)
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Query terms in more than this share of the chunks (and more than LEXICAL_MAX_DF_MIN
+# of them) barely change the ranking but have huge posting lists, so they are skipped
+LEXICAL_MAX_DF_RATIO = float(os.getenv("LEXICAL_MAX_DF_RATIO", "0.5"))
+LEXICAL_MAX_DF_MIN = int(os.getenv("LEXICAL_MAX_DF_MIN", "1000"))
+
+# Words, keeping trailing +/# so "C++" and "C#" stay distinct from "C"
+_TOKEN_PATTERN = re.compile(r"\w+[+#]*", re.UNICODE)
+
+# Spanish and English function words, accent-folded like the terms. Left out of the
+# index and of queries. Words that double as skills or acronyms ("it", "go") are kept.
+STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e el ella ellas
+ellos en entre era es esa esas ese eso esos esta estaba estan estar estas este esto estos fue fueron ha han
+hasta hay la las le les lo los mas me mi mis mucho muy nada ni no nos nosotros o os otra otras otro otros para
+pero poco por porque que quien quienes se sea ser si sin sobre son su sus tambien tanto te tiene todo todos tu
+tus un una unas uno unos y ya yo
+an and are as at be been but by for from had has have he her his i in into is its me my not of on or our she
+so than that the their them then there these they this those to was we were which who will with you your
+""".split())
+
+_lock = threading.Lock()
+_connection = None
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded terms ("Público" and "publico" match), without stopwords"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return [term for term in _TOKEN_PATTERN.findall(folded) if term not in STOPWORDS]
+
+def _get_connection():
+    """Open the index lazily and make sure its tables exist"""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(LEXICAL_INDEX_PATH, check_same_thread=False)
+        _connection.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " point_id INTEGER PRIMARY KEY, cv_id TEXT NOT NULL, chunk_index INTEGER, length INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS ix_chunks_cv_id ON chunks (cv_id);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, point_id INTEGER NOT NULL, tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, point_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS ix_postings_point_id ON postings (point_id);"
+            # Collection statistics kept in step with chunks, so queries never count rows
+            "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 1),"
+            " doc_count INTEGER NOT NULL, total_length INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO stats (id, doc_count, total_length) VALUES (1, 0, 0);"
+            # Document frequency of every term, read before deciding which posting lists to load
+            "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;"
+        )
+        _connection.commit()
+    return _connection
+
+def _delete_cv(conn, cv_id: str):
+    removed = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks WHERE cv_id = ?", (cv_id,)
+    ).fetchone()
+    if not removed[0]:
+        return
+    conn.execute(
+        "UPDATE terms SET df = df - (SELECT COUNT(*) FROM postings p JOIN chunks c ON c.point_id = p.point_id"
+        " WHERE c.cv_id = ? AND p.term = terms.term)"
+        " WHERE term IN (SELECT p.term FROM postings p JOIN chunks c ON c.point_id = p.point_id WHERE c.cv_id = ?)",
+        (cv_id, cv_id)
+    )
+    conn.execute("DELETE FROM terms WHERE df <= 0")
+    conn.execute("DELETE FROM postings WHERE point_id IN (SELECT point_id FROM chunks WHERE cv_id = ?)", (cv_id,))
+    conn.execute("DELETE FROM chunks WHERE cv_id = ?", (cv_id,))
+    conn.execute(
+        "UPDATE stats SET doc_count = doc_count - ?, total_length = total_length - ? WHERE id = 1", removed
+    )
+
+def index_cv(cv_id: str, chunks: Iterable[Tuple[int, int, str]]):
+    """(Re)index the chunks of one CV as (point_id, chunk_index, text) tuples"""
+    if not LEXICAL_INDEX_ENABLED:
+        return
+    with _lock:
+        conn = _get_connection()
+        try:
+            _delete_cv(conn, cv_id)
+            docs, total = 0, 0
+            for point_id, chunk_index, text in chunks:
+                terms = Counter(tokenize(text or ""))
+                length = sum(terms.values())
+                conn.execute(
+                    "INSERT OR REPLACE INTO chunks (point_id, cv_id, chunk_index, length) VALUES (?, ?, ?, ?)",
+                    (point_id, cv_id, chunk_index, length)
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO postings (term, point_id, tf) VALUES (?, ?, ?)",
+                    [(term, point_id, tf) for term, tf in terms.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in terms]
+                )
+                docs += 1
+                total += length
+            conn.execute(
+                "UPDATE stats SET doc_count = doc_count + ?, total_length = total_length + ? WHERE id = 1",
+                (docs, total)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def delete_cv(cv_id: str):
+    """Remove the chunks of one CV from the index"""
+    with _lock:
+        conn = _get_connection()
+        _delete_cv(conn, cv_id)
+        conn.commit()
+
+def search(query: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """BM25-ranked chunks containing at least one query term.
+
+    Only the posting lists of the query terms are read, so the cost depends
+    on how common those terms are, not on the size of the collection. Terms
+    above the document frequency cutoff are skipped.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not LEXICAL_INDEX_ENABLED or not terms:
+        return []
+    with _lock:
+        conn = _get_connection()
+        doc_count, total_length = conn.execute("SELECT doc_count, total_length FROM stats WHERE id = 1").fetchone()
+        if not doc_count:
+            return []
+        placeholders = ",".join("?" for _ in terms)
+        max_df = max(LEXICAL_MAX_DF_RATIO * doc_count, LEXICAL_MAX_DF_MIN)
+        document_frequency = {
+            term: df
+            for term, df in conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms)
+            if df <= max_df
+        }
+        if not document_frequency:
+            return []
+        placeholders = ",".join("?" for _ in document_frequency)
+        rows = conn.execute(
+            "SELECT p.term, p.point_id, p.tf, c.length, c.cv_id, c.chunk_index"
+            f" FROM postings p JOIN chunks c ON c.point_id = p.point_id WHERE p.term IN ({placeholders})",
+            list(document_frequency)
+        ).fetchall()
+
+    average_length = total_length / doc_count
+    scores: Dict[int, float] = {}
+    info: Dict[int, Tuple[str, int]] = {}
+    for term, point_id, tf, length, cv_id, chunk_index in rows:
+        df = document_frequency[term]
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        scores[point_id] = scores.get(point_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        info[point_id] = (cv_id, chunk_index)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [
+        {"id": point_id, "cv_id": info[point_id][0], "chunk_index": info[point_id][1], "lexical_score": score}
+        for point_id, score in ranked
+    ]
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K) -> Dict[Hashable, float]:
+    """Fuse ranked id lists: each list adds 1 / (k + rank) to the ids it contains"""
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
+
+def get_stats() -> Dict[str, Any]:
+    """Size of the index"""
+    with _lock:
+        conn = _get_connection()
+        doc_count, total_length = conn.execute("SELECT doc_count, total_length FROM stats WHERE id = 1").fetchone()
+    return {"enabled": LEXICAL_INDEX_ENABLED, "chunks": doc_count, "total_terms": total_length}
+
+def rebuild(page_size: int = 256) -> Dict[str, int]:
+    """Rebuild the index from the chunk texts stored in the vector store"""
+    from .vectordb import client, QDRANT_COLLECTION_NAME
+
+    with _lock:
+        conn = _get_connection()
+        conn.execute("DELETE FROM postings")
+        conn.execute("DELETE FROM chunks")
+        conn.execute("DELETE FROM terms")
+        conn.execute("UPDATE stats SET doc_count = 0, total_length = 0 WHERE id = 1")
+        conn.commit()
+
+    by_cv: Dict[str, List[Tuple[int, int, str]]] = {}
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            limit=page_size,
+            offset=offset,
+            with_payload=["cv_id", "chunk_index", "text"],
+            with_vectors=False
+        )
+        for record in records:
+            payload = record.payload or {}
+            if payload.get("cv_id"):
+                by_cv.setdefault(payload["cv_id"], []).append(
+                    (int(record.id), payload.get("chunk_index", 0), payload.get("text", ""))
+                )
+        if offset is None:
+            break
+    for cv_id, chunks in by_cv.items():
+        index_cv(cv_id, chunks)
+    summary = {"cvs": len(by_cv), "chunks": sum(len(chunks) for chunks in by_cv.values())}
+    print(f"✅ Lexical index rebuilt: {summary}")
+    return summary
+
+# Rebuild when run as a command: python -m architecture.lexical_index
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the BM25 index of CV chunks from the vector store")
+    parser.parse_args()
+    rebuild()
@@ -0,0 +1,451 @@
+import os
+import json
+import atexit
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Backend of ManagedQdrantClient when VECTOR_STORE_BACKEND=local: an in-process
+# store with the subset of the QdrantClient API used by vectordb. Vectors are
+# kept L2-normalized in NumPy arrays (as Qdrant does for cosine distance) and
+# searched exactly. Each collection persists in the store folder as a snapshot,
+# <name>.npy (memory-mapped on load) plus <name>.json (ids, payloads, settings),
+# and <name>.log, the points upserted or deleted since that snapshot.
+
+# The log is folded into a new snapshot once it holds this many points and at
+# least half as many as the collection, so each write costs O(points written)
+VECTOR_STORE_COMPACT_MIN_POINTS = int(os.getenv("VECTOR_STORE_COMPACT_MIN_POINTS", "1000"))
+
+def _payload_subset(payload: Dict[str, Any], with_payload) -> Optional[Dict[str, Any]]:
+    if with_payload is True or with_payload is None:
+        return dict(payload)
+    if not with_payload:
+        return None
+    return {key: payload[key] for key in with_payload if key in payload}
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+class _Collection:
+    """Points of one collection: row-aligned ids, payloads and vectors.
+
+    Vectors live in `base` (the snapshot, memory-mapped copy-on-write) and
+    `tail` (rows added since, grown by doubling). Deleted rows stay in
+    place as tombstones until the next snapshot, so no write shifts rows.
+    """
+
+    def __init__(self, name: str, size: int, settings: Dict[str, Any]):
+        self.name = name
+        self.size = size
+        self.settings = settings
+        self.ids: List[Any] = []
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self.base = np.zeros((0, size), dtype=np.float32)
+        self.tail = np.zeros((0, size), dtype=np.float32)
+        self.tail_len = 0
+        self.rows: Dict[Any, int] = {}
+        self.deleted: set = set()
+        self.logged_points = 0  # points in the log since the snapshot
+        self.indexed_fields: Dict[str, str] = {}
+        # field -> value -> rows, for fields with a payload index
+        self.index: Dict[str, Dict[Any, set]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def vector(self, row: int) -> np.ndarray:
+        return self.base[row] if row < len(self.base) else self.tail[row - len(self.base)]
+
+    def live_rows(self) -> List[int]:
+        if not self.deleted:
+            return list(range(len(self.ids)))
+        return [row for row in range(len(self.ids)) if row not in self.deleted]
+
+    def vectors_of(self, rows: np.ndarray) -> np.ndarray:
+        """Vectors of sorted rows (a copy, gathered from both blocks)"""
+        split = np.searchsorted(rows, len(self.base))
+        return np.concatenate([self.base[rows[:split]], self.tail[rows[split:] - len(self.base)]])
+
+    def _index_row(self, row: int, add: bool):
+        payload = self.payloads[row]
+        for field in self.indexed_fields:
+            if field in payload:
+                bucket = self.index[field].setdefault(payload[field], set())
+                if add:
+                    bucket.add(row)
+                else:
+                    bucket.discard(row)
+
+    def create_index(self, field: str, schema: str):
+        self.indexed_fields[field] = schema
+        self.index[field] = {}
+        for row in self.live_rows():
+            if field in self.payloads[row]:
+                self.index[field].setdefault(self.payloads[row][field], set()).add(row)
+
+    def _append(self, vectors: np.ndarray):
+        needed = self.tail_len + len(vectors)
+        if needed > len(self.tail):
+            grown = np.zeros((max(needed, 2 * len(self.tail), 64), self.size), dtype=np.float32)
+            grown[:self.tail_len] = self.tail[:self.tail_len]
+            self.tail = grown
+        self.tail[self.tail_len:needed] = vectors
+        self.tail_len = needed
+
+    def upsert(self, ids: List[Any], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.size))
+        new_rows = []
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            row = self.rows.get(point_id)
+            if row is None:
+                new_rows.append((point_id, vector, payload))
+                continue
+            self._index_row(row, add=False)
+            self.vector(row)[:] = vector  # copy-on-write: only this page leaves the memory map
+            self.payloads[row] = payload
+            self._index_row(row, add=True)
+        if new_rows:
+            start = len(self.ids)
+            self._append(np.stack([vector for _, vector, _ in new_rows]))
+            for offset, (point_id, _, payload) in enumerate(new_rows):
+                self.ids.append(point_id)
+                self.payloads.append(payload)
+                self.rows[point_id] = start + offset
+                self._index_row(start + offset, add=True)
+
+    def delete_rows(self, rows: Iterable[int]) -> List[Any]:
+        """Tombstone rows; returns the ids of the points removed"""
+        removed = []
+        for row in rows:
+            if row in self.deleted:
+                continue
+            self._index_row(row, add=False)
+            removed.append(self.ids[row])
+            del self.rows[self.ids[row]]
+            self.payloads[row] = None
+            self.deleted.add(row)
+        return removed
+
+    def filter_rows(self, query_filter) -> Optional[List[int]]:
+        """Rows matching every `must` condition (ids or exact values), or None for all rows"""
+        if query_filter is None or not getattr(query_filter, "must", None):
+            return None
+        matched: Optional[set] = None
+        for condition in query_filter.must:
+            if getattr(condition, "has_id", None) is not None:  # models.HasIdCondition
+                rows = {self.rows[point_id] for point_id in condition.has_id if point_id in self.rows}
+            else:
+                key = condition.key
+                # models.MatchValue or models.MatchAny
+                values = condition.match.any if hasattr(condition.match, "any") else [condition.match.value]
+                if key in self.index:
+                    rows = set().union(*(self.index[key].get(value, ()) for value in values))
+                else:
+                    rows = {row for row, payload in enumerate(self.payloads) if payload is not None and payload.get(key) in values}
+            matched = rows if matched is None else matched & rows
+            if not matched:
+                return []
+        return sorted(matched)
+
+    def scores(self, query_vector: List[float], query_filter=None) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine scores) of the candidate points"""
+        rows = self.filter_rows(query_filter)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+        if rows is None:
+            scores = np.concatenate([self.base @ query, self.tail[:self.tail_len] @ query])
+            if not self.deleted:
+                return np.arange(len(self.ids)), scores
+            rows = np.asarray(self.live_rows(), dtype=np.int64)
+            return rows, scores[rows]
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+        return rows, self.vectors_of(rows) @ query
+
+    def info(self):
+        return SimpleNamespace(
+            status="green",
+            points_count=len(self),
+            vectors_count=len(self),
+            payload_schema={field: SimpleNamespace(data_type=schema) for field, schema in self.indexed_fields.items()},
+            config=SimpleNamespace(
+                params=SimpleNamespace(vectors=SimpleNamespace(
+                    size=self.size, distance="Cosine", on_disk=self.settings.get("on_disk", False)
+                )),
+                hnsw_config=SimpleNamespace(m=self.settings.get("hnsw_m"), ef_construct=self.settings.get("hnsw_ef_construct")),
+                quantization_config=None,
+            ),
+        )
+
+class LocalVectorStore:
+    """In-process replacement for the QdrantClient methods used by vectordb.
+
+    Search is exact (brute-force cosine over the normalized vectors), so
+    HNSW and quantization settings are accepted and ignored. `path` None
+    keeps everything in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, compact_min_points: int = VECTOR_STORE_COMPACT_MIN_POINTS):
+        self.path = path
+        self.compact_min_points = compact_min_points
+        self._lock = threading.RLock()
+        self._collections: Dict[str, _Collection] = {}
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):
+                if name.endswith(".json"):
+                    self._load(name[:-len(".json")])
+            atexit.register(self.close)
+
+    # Persistence
+
+    def _files(self, name: str) -> Tuple[str, str, str]:
+        return tuple(os.path.join(self.path, f"{name}.{extension}") for extension in ("npy", "json", "log"))
+
+    def _load(self, name: str):
+        vectors_file, meta_file, log_file = self._files(name)
+        with open(meta_file, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        collection = _Collection(name, meta["size"], meta.get("settings", {}))
+        collection.ids = meta["ids"]
+        collection.payloads = meta["payloads"]
+        collection.rows = {point_id: row for row, point_id in enumerate(collection.ids)}
+        if collection.ids and os.path.exists(vectors_file):
+            # Copy-on-write memory map: pages load on demand, and an update only copies its own page
+            collection.base = np.load(vectors_file, mmap_mode="c")
+        for field, schema in meta.get("indexed_fields", {}).items():
+            collection.create_index(field, schema)
+        if os.path.exists(log_file):
+            # Replay the writes made after the snapshot (a torn last line is a write that never finished)
+            with open(log_file, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(collection, entry)
+                    collection.logged_points += len(entry["ids"])
+        self._collections[name] = collection
+
+    @staticmethod
+    def _apply(collection: _Collection, entry: Dict[str, Any]):
+        if entry["op"] == "upsert":
+            collection.upsert(entry["ids"], entry["vectors"], entry["payloads"])
+        else:
+            collection.delete_rows([collection.rows[point_id] for point_id in entry["ids"] if point_id in collection.rows])
+
+    def _log(self, collection: _Collection, entry: Dict[str, Any]):
+        """Append one write to the collection's log, folding the log into a
+        new snapshot once it has grown past the compaction threshold"""
+        if not self.path or not entry["ids"]:
+            return
+        with open(self._files(collection.name)[2], "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+        collection.logged_points += len(entry["ids"])
+        if collection.logged_points >= max(self.compact_min_points, len(collection) // 2):
+            self._save(collection)
+
+    def _save(self, collection: _Collection):
+        """Write a compacted snapshot of the collection and empty its log"""
+        if not self.path:
+            return
+        vectors_file, meta_file, log_file = self._files(collection.name)
+        rows = collection.live_rows()
+        # Write to temporary files and swap them in, so a crash never leaves a torn collection
+        with open(vectors_file + ".tmp", "wb") as file:
+            np.save(file, collection.vectors_of(np.asarray(rows, dtype=np.int64)))
+        with open(meta_file + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({
+                "size": collection.size,
+                "settings": collection.settings,
+                "ids": [collection.ids[row] for row in rows],
+                "payloads": [collection.payloads[row] for row in rows],
+                "indexed_fields": collection.indexed_fields,
+            }, file)
+        collection.base = collection.tail = np.zeros((0, collection.size), dtype=np.float32)  # drop the old map
+        os.replace(vectors_file + ".tmp", vectors_file)
+        os.replace(meta_file + ".tmp", meta_file)
+        if os.path.exists(log_file):
+            os.remove(log_file)
+        # Continue from the new snapshot: dense rows, no tombstones, an empty log
+        collection.ids = [collection.ids[row] for row in rows]
+        collection.payloads = [collection.payloads[row] for row in rows]
+        collection.rows = {point_id: row for row, point_id in enumerate(collection.ids)}
+        collection.base = np.load(vectors_file, mmap_mode="c") if rows else collection.base
+        collection.tail_len = 0
+        collection.deleted = set()
+        collection.logged_points = 0
+        for field, schema in list(collection.indexed_fields.items()):
+            collection.create_index(field, schema)
+
+    def close(self):
+        """Fold every pending log into its snapshot (also run at exit)"""
+        with self._lock:
+            for collection in self._collections.values():
+                if collection.logged_points:
+                    self._save(collection)
+
+    def _collection(self, collection_name: str) -> _Collection:
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            raise ValueError(f"Collection {collection_name} not found")
+        return collection
+
+    # Collections
+
+    def get_collections(self):
+        with self._lock:
+            return SimpleNamespace(collections=[SimpleNamespace(name=name) for name in self._collections])
+
+    def get_collection(self, collection_name: str):
+        with self._lock:
+            return self._collection(collection_name).info()
+
+    def create_collection(self, collection_name: str, vectors_config, hnsw_config=None, quantization_config=None, **_):
+        with self._lock:
+            settings = {
+                "on_disk": bool(getattr(vectors_config, "on_disk", False)),
+                "hnsw_m": getattr(hnsw_config, "m", None),
+                "hnsw_ef_construct": getattr(hnsw_config, "ef_construct", None),
+            }
+            collection = _Collection(collection_name, vectors_config.size, settings)
+            self._collections[collection_name] = collection
+            self._save(collection)
+            return True
+
+    def update_collection(self, collection_name: str, hnsw_config=None, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            if hnsw_config is not None:
+                collection.settings["hnsw_m"] = hnsw_config.m
+                collection.settings["hnsw_ef_construct"] = hnsw_config.ef_construct
+            self._save(collection)
+            return True
+
+    def delete_collection(self, collection_name: str, **_):
+        with self._lock:
+            if self._collections.pop(collection_name, None) is not None and self.path:
+                for file in self._files(collection_name):
+                    if os.path.exists(file):
+                        os.remove(file)
+            return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema=None, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            collection.create_index(field_name, str(getattr(field_schema, "value", field_schema)))
+            self._save(collection)
+
+    # Points
+
+    def upsert(self, collection_name: str, points, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            if hasattr(points, "ids"):  # models.Batch
+                ids, vectors = list(points.ids), points.vectors
+                payloads = list(points.payloads or [{} for _ in ids])
+            else:
+                ids = [point.id for point in points]
+                vectors = [point.vector for point in points]
+                payloads = [dict(point.payload or {}) for point in points]
+            if ids:
+                collection.upsert(ids, vectors, payloads)
+                self._log(collection, {
+                    "op": "upsert",
+                    "ids": ids,
+                    "vectors": [collection.vector(collection.rows[point_id]).tolist() for point_id in ids],
+                    "payloads": payloads,
+                })
+
+    def delete(self, collection_name: str, points_selector, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            if hasattr(points_selector, "points"):  # models.PointIdsList
+                rows = [collection.rows[point_id] for point_id in points_selector.points if point_id in collection.rows]
+            else:  # models.FilterSelector
+                rows = collection.filter_rows(points_selector.filter)
+                rows = collection.live_rows() if rows is None else rows
+            removed = collection.delete_rows(rows)
+            self._log(collection, {"op": "delete", "ids": removed})
+
+    def _record(self, collection: _Collection, row: int, with_payload, with_vectors, score: Optional[float] = None):
+        record = SimpleNamespace(
+            id=collection.ids[row],
+            payload=_payload_subset(collection.payloads[row], with_payload),
+            vector=collection.vector(row).tolist() if with_vectors else None,
+            version=0,
+        )
+        if score is not None:
+            record.score = float(score)
+        return record
+
+    def retrieve(self, collection_name: str, ids: List[Any], with_payload=True, with_vectors=False, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            return [
+                self._record(collection, collection.rows[point_id], with_payload, with_vectors)
+                for point_id in ids if point_id in collection.rows
+            ]
+
+    def scroll(self, collection_name: str, scroll_filter=None, limit: int = 10, offset=None,
+               with_payload=True, with_vectors=False, **_):
+        """Pages in insertion order; the offset is the row to continue from"""
+        with self._lock:
+            collection = self._collection(collection_name)
+            rows = collection.filter_rows(scroll_filter)
+            rows = collection.live_rows() if rows is None else rows
+            start = int(offset or 0)
+            page = [row for row in rows if row >= start][:limit + 1]
+            next_offset = page[limit] if len(page) > limit else None
+            return [self._record(collection, row, with_payload, with_vectors) for row in page[:limit]], next_offset
+
+    def search(self, collection_name: str, query_vector: List[float], query_filter=None, search_params=None,
+               limit: int = 10, with_payload=True, with_vectors=False, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            rows, scores = collection.scores(query_vector, query_filter)
+            if len(rows) == 0:
+                return []
+            top = min(limit, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [self._record(collection, int(rows[i]), with_payload, with_vectors, scores[i]) for i in best]
+
+    def search_batch(self, collection_name: str, requests: List[Any], **_):
+        return [
+            self.search(
+                collection_name,
+                query_vector=request.vector,
+                query_filter=request.filter,
+                limit=request.limit,
+                with_payload=request.with_payload if request.with_payload is not None else True,
+                with_vectors=bool(request.with_vector)
+            )
+            for request in requests
+        ]
+
+    def search_groups(self, collection_name: str, query_vector: List[float], group_by: str, limit: int = 10,
+                      group_size: int = 3, query_filter=None, search_params=None, with_payload=True, **_):
+        with self._lock:
+            collection = self._collection(collection_name)
+            rows, scores = collection.scores(query_vector, query_filter)
+            groups: Dict[Any, List[Any]] = {}
+            for i in np.argsort(-scores):
+                key = collection.payloads[int(rows[i])].get(group_by)
+                if key is None:
+                    continue
+                hits = groups.get(key)
+                if hits is None:
+                    if len(groups) >= limit:
+                        continue
+                    hits = groups[key] = []
+                if len(hits) < group_size:
+                    hits.append(self._record(collection, int(rows[i]), with_payload, False, scores[i]))
+                if len(groups) >= limit and all(len(hits) >= group_size for hits in groups.values()):
+                    break
+            return SimpleNamespace(groups=[SimpleNamespace(id=key, hits=hits) for key, hits in groups.items()])
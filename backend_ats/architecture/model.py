@@ -1,32 +1,20 @@
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
 import PyPDF2
 import re
+import time
+import argparse
+import tempfile
+import tracemalloc
 import tiktoken
-from typing import List, Dict, Any
+from bisect import bisect_right
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from . import embedding_cache
+from .embedding_providers import get_provider
 
 # Load environment variables
 load_dotenv()
 
-# Get API Key
-api_key = os.getenv("OPENAI_API_KEY")
-
-# Initialize OpenAI client with error handling
-try:
-    # First try the standard initialization
-    client = OpenAI(api_key=api_key)
-except TypeError as e:
-    if "proxies" in str(e):
-        # If there's a proxies error, try without default_headers which might contain proxies
-        import httpx
-        client = OpenAI(
-            api_key=api_key,
-            http_client=httpx.Client()
-        )
-    else:
-        raise e
-
 # Get tokenizer for token counting
 tokenizer = tiktoken.get_encoding("cl100k_base")  # OpenAI's tokenizer for embedding models
 
@@ -35,97 +23,465 @@ def count_tokens(text: str) -> int:
     tokens = tokenizer.encode(text)
     return len(tokens)
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from a PDF file"""
-    text = ""
+# Per-document limits so large or malicious PDFs are processed in bounded memory
+MAX_PDF_FILE_BYTES = int(os.getenv("MAX_PDF_FILE_BYTES", str(20 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "200"))
+MAX_PDF_TEXT_BYTES = int(os.getenv("MAX_PDF_TEXT_BYTES", str(1024 * 1024)))
+
+def iter_pdf_pages(pdf_path: str, max_pages: int = MAX_PDF_PAGES, max_bytes: int = MAX_PDF_TEXT_BYTES,
+                   stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Yield the text of a PDF page by page, stopping at the page and byte caps.
+
+    When given, `stats` receives the pages read ("pages"), the pages in the
+    document ("page_count") and, if a limit cut the text short, which one
+    ("truncated": "file_size", "pages" or "text_bytes").
+    """
+    if stats is None:
+        stats = {}
+    stats.update(pages=0, page_count=0, truncated=None)
+    if os.path.getsize(pdf_path) > MAX_PDF_FILE_BYTES:
+        print(f"Skipping PDF larger than {MAX_PDF_FILE_BYTES} bytes: {pdf_path}")
+        stats["truncated"] = "file_size"
+        return
+    remaining = max_bytes
     try:
         with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            pdf_reader = PyPDF2.PdfReader(file, strict=False)
+            stats["page_count"] = len(pdf_reader.pages)
+            for page_number, page in enumerate(pdf_reader.pages):
+                if page_number >= max_pages:
+                    print(f"PDF truncated at {max_pages} pages: {pdf_path}")
+                    stats["truncated"] = "pages"
+                    break
+                stats["pages"] = page_number + 1
+                try:
+                    page_text = page.extract_text() or ""
+                except Exception as e:
+                    print(f"Error extracting text from page {page_number} of PDF: {e}")
+                    continue
+                encoded = page_text.encode("utf-8")
+                if len(encoded) >= remaining:
+                    print(f"PDF text truncated at {max_bytes} bytes: {pdf_path}")
+                    stats["truncated"] = "text_bytes"
+                    yield encoded[:remaining].decode("utf-8", errors="ignore")
+                    break
+                remaining -= len(encoded)
+                yield page_text
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
-    return text
+
+def truncation_warning(stats: Dict[str, Any]) -> Optional[str]:
+    """Human readable note of the limit that cut a PDF short, if any"""
+    truncated = stats.get("truncated")
+    if truncated == "file_size":
+        return f"The PDF is larger than the {MAX_PDF_FILE_BYTES} byte limit and was not read"
+    if truncated == "pages":
+        return f"Only the first {stats['pages']} of {stats['page_count']} pages were indexed (MAX_PDF_PAGES)"
+    if truncated == "text_bytes":
+        return (f"Text was cut at {MAX_PDF_TEXT_BYTES} bytes on page {stats['pages']} "
+                f"of {stats['page_count']} (MAX_PDF_TEXT_BYTES)")
+    return None
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """Extract text from a PDF file"""
+    return "\n".join(iter_pdf_pages(pdf_path))
 
 def clean_text(text: str) -> str:
-    """Clean and normalize text"""
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    """Clean and normalize text, keeping line breaks as section boundaries"""
     # Remove special characters that might not be useful
     text = re.sub(r'[^\w\s.,;:!?()-]', '', text)
+    # Collapse runs of horizontal whitespace
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    # Trim spaces around line breaks and keep at most one blank line
+    text = re.sub(r' *\n *', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
     return text.strip()
 
-def chunk_text(text: str, max_tokens: int = 1000, overlap: int = 100) -> List[str]:
-    """Split text into chunks that fit within token limits with overlap"""
-    chunks = []
+# Sentence ends and line breaks; chunks prefer to end on one of these
+_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?;])(?=\s)|(?=\n)')
+
+def _encode_with_boundaries(text: str, tokens: List[int], boundaries: List[int]):
+    """Tokenize text segment by segment, appending to `tokens` and recording
+    in `boundaries` the token offsets where a sentence or section ends.
+
+    Segments are split before the whitespace that follows a boundary, so the
+    token stream matches tokenizing the whole text (leading-space tokens stay
+    intact) while each piece of text is still encoded only once.
+    """
+    position = 0
+    for match in _BOUNDARY_PATTERN.finditer(text):
+        if match.start() > position:
+            tokens.extend(tokenizer.encode(text[position:match.start()]))
+            boundaries.append(len(tokens))
+            position = match.start()
+    if position < len(text):
+        tokens.extend(tokenizer.encode(text[position:]))
+
+def _window_end(start: int, length: int, max_tokens: int, boundaries: List[int], respect_boundaries: bool) -> int:
+    """End of the token window starting at `start`, pulled back to the last
+    boundary in its second half when boundaries are respected"""
+    end = min(start + max_tokens, length)
+    if respect_boundaries and end < length:
+        i = bisect_right(boundaries, end) - 1
+        if i >= 0 and boundaries[i] > start + max_tokens // 2:
+            end = boundaries[i]
+    return end
+
+def chunk_text(text: str, max_tokens: int = 1000, overlap: int = 100,
+               respect_boundaries: bool = True) -> List[str]:
+    """Split text into chunks of at most `max_tokens` tokens, each starting
+    `overlap` tokens before the previous one ended.
+
+    The text is tokenized once and chunks are token slices, so the cost is
+    linear in the document length.
+    """
+    tokens: List[int] = []
+    boundaries: List[int] = []
+    _encode_with_boundaries(text, tokens, boundaries)
     
     # If text is already small enough, return it as a single chunk
-    if count_tokens(text) <= max_tokens:
+    if len(tokens) <= max_tokens:
         return [text]
     
-    # Split text into paragraphs first
-    paragraphs = text.split('\n')
-    current_chunk = ""
-    
-    for paragraph in paragraphs:
-        # If adding this paragraph would exceed the limit
-        if count_tokens(current_chunk + paragraph) > max_tokens and current_chunk:
-            chunks.append(current_chunk.strip())
-            # Keep some overlap from the previous chunk
-            overlap_text = " ".join(current_chunk.split()[-overlap:]) if overlap > 0 else ""
-            current_chunk = overlap_text + " " + paragraph
-        else:
-            current_chunk += " " + paragraph
-    
-    # Add the last chunk if it's not empty
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    overlap = max(0, min(overlap, max_tokens // 2))
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        end = _window_end(start, len(tokens), max_tokens, boundaries, respect_boundaries)
+        chunk = tokenizer.decode(tokens[start:end]).strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(tokens):
+            break
+        start = max(end - overlap, start + 1)
     
     return chunks
 
-def create_embeddings(texts: List[str]) -> List[List[float]]:
-    """Create embeddings for a list of text chunks"""
-    embeddings = []
-    
-    for text in texts:
+def iter_clean_pages(pages: Iterable[str]) -> Iterator[str]:
+    """Clean pages one at a time, dropping pages without text"""
+    for page in pages:
+        cleaned = clean_text(page)
+        if cleaned:
+            yield cleaned
+
+def iter_token_chunks(pages: Iterable[str], max_tokens: int = 1000, overlap: int = 100,
+                      stats: Optional[Dict[str, int]] = None, respect_boundaries: bool = True) -> Iterator[str]:
+    """Streaming counterpart of chunk_text over a sequence of page texts.
+
+    Only the tokens of the chunk being filled are kept, so memory does not
+    grow with the document. Page breaks count as section boundaries. When
+    given, `stats["total_tokens"]` is updated.
+    """
+    overlap = max(0, min(overlap, max_tokens // 2))
+    buffer: List[int] = []
+    boundaries: List[int] = []
+    total = 0
+    emitted_upto = 0  # tokens of buffer already covered by an emitted chunk
+
+    for page_number, page in enumerate(pages):
+        before = len(buffer)
+        if page_number > 0:
+            boundaries.append(before)
+        _encode_with_boundaries(page if page_number == 0 else "\n" + page, buffer, boundaries)
+        total += len(buffer) - before
+        while len(buffer) >= max_tokens:
+            end = _window_end(0, len(buffer), max_tokens, boundaries, respect_boundaries)
+            chunk = tokenizer.decode(buffer[:end]).strip()
+            if chunk:
+                yield chunk
+            shift = max(end - overlap, 1)
+            buffer = buffer[shift:]
+            boundaries = [b - shift for b in boundaries if b > shift]
+            emitted_upto = end - shift
+
+    # Emit the tail unless it is only the overlap of the previous chunk
+    if len(buffer) > emitted_upto:
+        tail = tokenizer.decode(buffer).strip()
+        if tail:
+            yield tail
+
+    if stats is not None:
+        stats["total_tokens"] = total
+
+def iter_cv_chunks(pdf_path: str, chunk_size: int, overlap: int = 100,
+                   stats: Optional[Dict[str, Any]] = None, max_pages: int = MAX_PDF_PAGES) -> Iterator[str]:
+    """Streaming extraction -> cleaning -> chunking pipeline for one PDF
+    (`stats` collects both the page and the token counts)"""
+    if stats is None:
+        stats = {}
+    pages = iter_pdf_pages(pdf_path, max_pages=max_pages, stats=stats)
+    return iter_token_chunks(iter_clean_pages(pages), chunk_size, overlap, stats)
+
+# Embedding provider (EMBEDDING_PROVIDER) and request batching limits
+embedding_provider = get_provider()
+EMBEDDING_MODEL = embedding_provider.model_name
+EMBEDDING_MAX_INPUT_TOKENS = embedding_provider.max_input_tokens
+EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "128"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "50000"))
+
+def build_embedding_batches(texts: List[str], max_items: int = EMBEDDING_BATCH_MAX_ITEMS,
+                            max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS) -> List[List[int]]:
+    """Group text indexes into batches limited by item count and total tokens.
+
+    Empty texts and texts over the per-input token limit are left out, since
+    the provider would reject them (and with them, the whole request).
+    """
+    batches = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        tokens = count_tokens(text)
+        if tokens > EMBEDDING_MAX_INPUT_TOKENS:
+            print(f"Skipping embedding for text {i}: {tokens} tokens exceeds the input limit")
+            continue
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+def _request_embeddings(inputs: List[str]) -> List[List[float]]:
+    """Send one batch to the embedding provider and return vectors in input order"""
+    return embedding_provider.embed(inputs)
+
+def create_embeddings(texts: List[str], max_items: int = EMBEDDING_BATCH_MAX_ITEMS,
+                      max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS) -> List[List[float]]:
+    """Create embeddings for a list of text chunks.
+
+    Texts are packed into as few requests as the batching limits allow. The
+    result keeps the input order; a text that could not be embedded gets an
+    empty list instead of failing the rest of the batch.
+    """
+    embeddings: List[List[float]] = [[] for _ in texts]
+
+    # Serve repeated texts (e.g. unchanged job profiles) from the cache
+    keys = [embedding_cache.cache_key(EMBEDDING_MODEL, text or "") for text in texts]
+    cached = embedding_cache.get_many(keys)
+    pending = []
+    for i, key in enumerate(keys):
+        if key in cached:
+            embeddings[i] = cached[key]
+        else:
+            pending.append(i)
+
+    # Only embed each distinct uncached text once
+    first_index: Dict[str, int] = {}
+    for i in pending:
+        first_index.setdefault(keys[i], i)
+    to_embed = list(first_index.values())
+    batch_texts = [texts[i] for i in to_embed]
+
+    for batch in build_embedding_batches(batch_texts, max_items, max_tokens):
         try:
-            response = client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-                encoding_format="float"
-            )
-            embeddings.append(response.data[0].embedding)
+            vectors = _request_embeddings([batch_texts[i] for i in batch])
+            for i, vector in zip(batch, vectors):
+                embeddings[to_embed[i]] = vector
         except Exception as e:
-            print(f"Error creating embedding: {e}")
-            embeddings.append([])
-    
+            print(f"Error creating embeddings for batch of {len(batch)} texts: {e}")
+            if len(batch) == 1:
+                continue
+            # Retry item by item so one bad input does not blank the whole batch
+            for i in batch:
+                try:
+                    embeddings[to_embed[i]] = _request_embeddings([batch_texts[i]])[0]
+                except Exception as item_error:
+                    print(f"Error creating embedding: {item_error}")
+
+    embedding_cache.put_many({keys[i]: embeddings[i] for i in to_embed if embeddings[i]})
+    for i in pending:
+        if not embeddings[i]:
+            embeddings[i] = embeddings[first_index[keys[i]]]
+
     return embeddings
 
-def process_cv(pdf_path: str, max_tokens: int = 8000) -> Dict[str, Any]:
-    """Process a CV from PDF to embeddings with metadata"""
-    # Extract text from PDF
-    raw_text = extract_text_from_pdf(pdf_path)
-    
-    # Clean the text
-    cleaned_text = clean_text(raw_text)
-    
-    # Calculate chunk size based on total tokens
-    total_tokens = count_tokens(cleaned_text)
+def prepare_cv(pdf_path: str, max_tokens: int = 8000) -> Dict[str, Any]:
+    """Extract, clean and chunk a CV (everything before embedding).
+
+    Pages are streamed through the pipeline, so neither the raw nor the
+    cleaned text of the whole document is ever held in memory.
+    """
     chunk_size = min(2000, max(500, max_tokens // 4))  # Aim for 4 chunks, between 500-2000 tokens
     
-    # Chunk the text
-    chunks = chunk_text(cleaned_text, chunk_size)
+    stats: Dict[str, Any] = {}
+    chunks = list(iter_cv_chunks(pdf_path, chunk_size, stats=stats))
     
-    # Create embeddings
-    embeddings = create_embeddings(chunks)
-    
-    # Create metadata
-    metadata = {
+    return {
         "filename": os.path.basename(pdf_path),
-        "total_tokens": total_tokens,
+        "total_tokens": stats.get("total_tokens", 0),
         "chunk_count": len(chunks),
-        "chunks": chunks,
-        "embeddings": embeddings
+        "pages": stats.get("pages", 0),
+        "page_count": stats.get("page_count", 0),
+        "truncated": stats.get("truncated"),
+        "warning": truncation_warning(stats),
+        "chunks": chunks
     }
+
+def process_cv(pdf_path: str, max_tokens: int = 8000) -> Dict[str, Any]:
+    """Process a CV from PDF to embeddings with metadata"""
+    metadata = prepare_cv(pdf_path, max_tokens)
+    
+    # Create embeddings
+    metadata["embeddings"] = create_embeddings(metadata["chunks"])
     
     return metadata
+
+
+def benchmark_embedding_batches(texts: List[str], batch_sizes: List[int]) -> Dict[int, Dict[str, float]]:
+    """Throughput of the configured provider when the same texts are sent in
+    batches of each size (1 = one request per text, as before batching)"""
+    results = {}
+    for size in batch_sizes:
+        batches = build_embedding_batches(texts, max_items=size)
+        started = time.perf_counter()
+        for batch in batches:
+            _request_embeddings([texts[i] for i in batch])
+        elapsed = time.perf_counter() - started
+        results[size] = {
+            "texts": len(texts),
+            "requests": len(batches),
+            "seconds": round(elapsed, 3),
+            "texts_per_second": round(len(texts) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+    return results
+
+def _synthetic_cv_text(index: int, paragraphs: int) -> str:
+    return "\n\n".join(
+        f"Experiencia {index}.{p}: {3 + p % 7} años desarrollando APIs REST con Python, Flask y SQL. "
+        f"Lideré la migración de pipelines de datos a la nube y mentoricé a un equipo de {2 + p % 5} personas."
+        for p in range(paragraphs)
+    )
+
+def _write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 40):
+    """Write a minimal text-only PDF (one Helvetica content stream per page)"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", "", "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = " ".join(
+            f"(Pagina {page} linea {line}: experiencia con Python, SQL y Flask en proyectos de datos.) Tj T*"
+            for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as file:
+        file.write(out)
+
+def _measure(task) -> Dict[str, float]:
+    """Wall time and peak traced Python memory of one call"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = task()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "peak_mib": round(peak / (1024 * 1024), 2), "chunks": len(result)}
+
+def benchmark_pdf(pages: int, chunk_size: int = 2000) -> Dict[str, Dict[str, float]]:
+    """Time and peak memory of chunking a synthetic PDF of `pages` pages, page
+    by page (iter_cv_chunks) and as one whole text (extract -> clean -> chunk)"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, f"synthetic_{pages}.pdf")
+        _write_synthetic_pdf(path, pages)
+        stats: Dict[str, Any] = {}
+        results = {
+            "streaming": _measure(lambda: list(iter_cv_chunks(path, chunk_size, stats=stats, max_pages=pages))),
+            "whole_text": _measure(lambda: chunk_text(
+                clean_text("\n".join(iter_pdf_pages(path, max_pages=pages))), chunk_size)),
+        }
+        results["streaming"].update(pages=stats["pages"], file_kib=os.path.getsize(path) // 1024,
+                                    warning=truncation_warning(stats))
+    return results
+
+def _paragraph_chunk_text(text: str, max_tokens: int = 1000, overlap: int = 100) -> List[str]:
+    """The previous chunker, kept as the benchmark baseline: it re-tokenizes
+    the growing chunk for every paragraph it adds"""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    chunks = []
+    current_chunk = ""
+    for paragraph in text.split('\n'):
+        if count_tokens(current_chunk + paragraph) > max_tokens and current_chunk:
+            chunks.append(current_chunk.strip())
+            overlap_text = " ".join(current_chunk.split()[-overlap:]) if overlap > 0 else ""
+            current_chunk = overlap_text + " " + paragraph
+        else:
+            current_chunk += " " + paragraph
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+    return chunks
+
+def benchmark_chunking(paragraph_counts: List[int], max_tokens: int = 2000) -> Dict[int, Dict[str, Dict[str, float]]]:
+    """Chunking throughput (tokens per second) on synthetic CVs of increasing length"""
+    chunkers = {
+        "paragraphs": lambda text: _paragraph_chunk_text(text, max_tokens),
+        "chunk_text": lambda text: chunk_text(text, max_tokens),
+        "streaming": lambda text: list(iter_token_chunks(text.split("\n\n"), max_tokens)),
+    }
+    results = {}
+    for paragraphs in paragraph_counts:
+        text = clean_text(_synthetic_cv_text(0, paragraphs))
+        tokens = count_tokens(text)
+        results[paragraphs] = {}
+        for name, chunker in chunkers.items():
+            started = time.perf_counter()
+            chunks = chunker(text)
+            elapsed = time.perf_counter() - started
+            results[paragraphs][name] = {
+                "tokens": tokens,
+                "chunks": len(chunks),
+                "seconds": round(elapsed, 3),
+                "tokens_per_second": round(tokens / elapsed) if elapsed > 0 else 0,
+            }
+    return results
+
+# Benchmarks when run as a command: python -m architecture.model {embeddings,pdf,chunking} [...]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmarks of the CV processing pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+    embeddings_parser = commands.add_parser("embeddings", help="Embedding requests per batch size (EMBEDDING_PROVIDER)")
+    embeddings_parser.add_argument("--samples", type=int, default=256, help="Texts to embed")
+    embeddings_parser.add_argument("--batch-sizes", default="1,16,64,128", help="Comma separated items per request")
+    pdf_parser = commands.add_parser("pdf", help="Time and peak memory of chunking a synthetic PDF")
+    pdf_parser.add_argument("--pages", type=int, default=200, help="Pages of the synthetic PDF")
+    chunking_parser = commands.add_parser("chunking", help="Chunking throughput on long synthetic CVs")
+    chunking_parser.add_argument("--paragraphs", default="100,1000,5000", help="Comma separated CV lengths in paragraphs")
+    args = parser.parse_args()
+
+    if args.command == "embeddings":
+        texts = [_synthetic_cv_text(i, 2) for i in range(args.samples)]
+        sizes = [int(size) for size in args.batch_sizes.split(",")]
+        print(f"ℹ️ Embedding {len(texts)} texts with {embedding_provider.name} ({EMBEDDING_MODEL})")
+        for size, stats in benchmark_embedding_batches(texts, sizes).items():
+            print(f"{size:>5} per request: {stats}")
+    elif args.command == "pdf":
+        print(f"ℹ️ Chunking a synthetic {args.pages}-page PDF (MAX_PDF_PAGES={MAX_PDF_PAGES})")
+        for pipeline, stats in benchmark_pdf(args.pages).items():
+            print(f"{pipeline:>10}: {stats}")
+    elif args.command == "chunking":
+        counts = [int(count) for count in args.paragraphs.split(",")]
+        for paragraphs, chunkers in benchmark_chunking(counts).items():
+            for name, stats in chunkers.items():
+                print(f"{paragraphs:>6} paragraphs, {name:>10}: {stats}")
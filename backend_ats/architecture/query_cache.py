@@ -0,0 +1,156 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from dotenv import load_dotenv
+from .model import create_embeddings
+
+# Load environment variables
+load_dotenv()
+
+# Cache settings
+QUERY_EMBEDDING_CACHE_ITEMS = int(os.getenv("QUERY_EMBEDDING_CACHE_ITEMS", "1024"))
+QUERY_EMBEDDING_TTL_SECONDS = float(os.getenv("QUERY_EMBEDDING_TTL_SECONDS", "3600"))
+QUERY_RESULT_CACHE_ITEMS = int(os.getenv("QUERY_RESULT_CACHE_ITEMS", "512"))
+# Results are also keyed on the collection version (shared by every process); the
+# TTL bounds staleness while that version cannot be read
+QUERY_RESULT_TTL_SECONDS = float(os.getenv("QUERY_RESULT_TTL_SECONDS", "300"))
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return False, None
+            self._items.move_to_end(key)
+            return True, value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class _Call:
+    """An in-flight computation that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+_embeddings = TTLCache(QUERY_EMBEDDING_CACHE_ITEMS, QUERY_EMBEDDING_TTL_SECONDS)
+_results = TTLCache(QUERY_RESULT_CACHE_ITEMS, QUERY_RESULT_TTL_SECONDS)
+_inflight: Dict[Hashable, _Call] = {}
+_inflight_lock = threading.Lock()
+_stats = {"embedding_hits": 0, "embedding_misses": 0, "result_hits": 0, "result_misses": 0, "coalesced": 0}
+_stats_lock = threading.Lock()
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as its cache key"""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+def single_flight(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """Run `compute` once for concurrent callers with the same key.
+
+    The first caller computes; the others wait for and share its result
+    (or its exception).
+    """
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+    if not leader:
+        _count("coalesced")
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = compute()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.done.set()
+
+def embed_query(text: str) -> List[float]:
+    """Embedding of a search query, cached by its normalized text.
+
+    The query is embedded as typed: the normalized form is only the key.
+    """
+    key = normalize_query(text)
+    found, vector = _embeddings.get(key)
+    if found:
+        _count("embedding_hits")
+        return vector
+    _count("embedding_misses")
+
+    def compute() -> List[float]:
+        embeddings = create_embeddings([text.strip()])
+        vector = embeddings[0] if embeddings else []
+        if vector:
+            _embeddings.put(key, vector)
+        return vector
+
+    return single_flight(("embedding", key), compute)
+
+def cached_results(key: Tuple, version: Hashable, compute: Callable[[], List[Any]]) -> List[Any]:
+    """Search results for `key` at a collection version; empty results are not cached"""
+    full_key = (version,) + key
+    found, results = _results.get(full_key)
+    if found:
+        _count("result_hits")
+        return results
+    _count("result_misses")
+
+    def run() -> List[Any]:
+        results = compute()
+        if results:
+            _results.put(full_key, results)
+        return results
+
+    return single_flight(("results",) + full_key, run)
+
+def get_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the query caches"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["embedding_items"] = len(_embeddings)
+    stats["result_items"] = len(_results)
+    return stats
+
+def clear():
+    _embeddings.clear()
+    _results.clear()
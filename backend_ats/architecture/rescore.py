@@ -0,0 +1,303 @@
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import from auth module when run as a command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.create_db import (
+    engine, Job, Application, ApplicationStage, MetaUser, CvJobSimilarity, RescoreRun, record_metric_deltas
+)
+from .similarity import update_jobs_similarities
+
+# Load environment variables
+load_dotenv()
+
+# Preselection rule shared with new applications: below this similarity (percent) is auto-rejected
+PRESELECTION_MIN_PERCENT = float(os.getenv("PRESELECTION_MIN_PERCENT", "80"))
+AUTO_REJECTION_FEEDBACK = "su curriculum no cumple con los requerimientos tecnicos que la vacante necesita"
+# Applications per bulk update round (one commit per round)
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "500"))
+# A running run refreshes its row this often; one not refreshed for RESCORE_STALE_SECONDS
+# belongs to a process that died and is reported as failed
+RESCORE_HEARTBEAT_SECONDS = float(os.getenv("RESCORE_HEARTBEAT_SECONDS", "30"))
+RESCORE_STALE_SECONDS = float(os.getenv("RESCORE_STALE_SECONDS", "300"))
+
+Session = sessionmaker(bind=engine)
+
+# Counters of a run's report that are stored on its rescore_runs row
+_PROGRESS_FIELDS = (
+    "applications", "processed", "updated", "preselected", "rejected", "skipped_manual", "unscored",
+    "score_rows", "score_seconds", "elapsed_seconds", "applications_per_second",
+)
+
+def is_auto_rejected(similarity_score: Optional[float]) -> bool:
+    """Whether a similarity score (0..1) fails the preselection threshold"""
+    if similarity_score is None:
+        return False
+    return float(similarity_score) * 100.0 < PRESELECTION_MIN_PERCENT
+
+def _is_automatic(stages: Dict[str, ApplicationStage]) -> bool:
+    """Whether an application's outcome so far was set by preselection alone.
+
+    Applications an admin has moved forward (interview, test or a manual
+    result) keep their stages; only automatic outcomes are re-scored.
+    """
+    for name in ("interview", "test"):
+        stage = stages.get(name)
+        if stage is not None and stage.status != "pending":
+            return False
+    preselection = stages.get("preselection")
+    if preselection is not None and not (
+        preselection.status == "pending"
+        or (preselection.status == "completed" and not preselection.feedback)
+        or (preselection.status == "rejected" and preselection.feedback == AUTO_REJECTION_FEEDBACK)
+    ):
+        return False
+    result = stages.get("result")
+    if result is not None and not (
+        result.status == "pending"
+        or (result.status == "rejected" and result.feedback == AUTO_REJECTION_FEEDBACK)
+    ):
+        return False
+    return True
+
+def _move_counter(deltas: Dict[Tuple[str, str], int], metric: str, old: Optional[str], new: str):
+    """Bulk updates skip the mapper events, so move the dashboard counters by hand"""
+    old = old or "pending"
+    if old != new:
+        deltas[(metric, old)] = deltas.get((metric, old), 0) - 1
+        deltas[(metric, new)] = deltas.get((metric, new), 0) + 1
+
+def _stage_update(stage: Optional[ApplicationStage], status: str, date, feedback,
+                  deltas: Dict[Tuple[str, str], int]) -> Optional[Dict[str, Any]]:
+    """Bulk update mapping for a stage, or None when it already has these values"""
+    if stage is None or (stage.status, stage.feedback) == (status, feedback):
+        return None
+    _move_counter(deltas, stage.name, stage.status, status)
+    return {"id": stage.id, "status": status, "date": date, "feedback": feedback}
+
+def _rescore_batch(session, rows: List[Tuple[int, str, Optional[float]]], counts: Dict[str, int]):
+    """Apply the preselection rule to (application_id, status, score) rows with bulk writes"""
+    application_ids = [application_id for application_id, _, _ in rows]
+    stages: Dict[int, Dict[str, ApplicationStage]] = {}
+    for stage in session.query(ApplicationStage).filter(ApplicationStage.application_id.in_(application_ids)):
+        stages.setdefault(stage.application_id, {})[stage.name] = stage
+
+    now = datetime.utcnow()
+    stage_updates: List[Dict[str, Any]] = []
+    application_updates: List[Dict[str, Any]] = []
+    deltas: Dict[Tuple[str, str], int] = {}
+    for application_id, status, score in rows:
+        by_name = stages.get(application_id, {})
+        if score is None:
+            counts["unscored"] += 1
+            continue
+        if not _is_automatic(by_name):
+            counts["skipped_manual"] += 1
+            continue
+
+        rejected = is_auto_rejected(score)
+        counts["rejected" if rejected else "preselected"] += 1
+        if rejected:
+            changes = [
+                _stage_update(by_name.get("preselection"), "rejected", now, AUTO_REJECTION_FEEDBACK, deltas),
+                _stage_update(by_name.get("result"), "rejected", now, AUTO_REJECTION_FEEDBACK, deltas),
+            ]
+            new_status = "rejected"
+        else:
+            changes = [
+                _stage_update(by_name.get("preselection"), "completed", now, None, deltas),
+                _stage_update(by_name.get("result"), "pending", None, None, deltas),
+            ]
+            new_status = "in_progress"
+        changes = [change for change in changes if change is not None]
+        stage_updates.extend(changes)
+        if status != new_status:
+            application_updates.append({"id": application_id, "status": new_status})
+            _move_counter(deltas, "status", status, new_status)
+        if changes or status != new_status:
+            counts["updated"] += 1
+
+    if stage_updates:
+        session.bulk_update_mappings(ApplicationStage, stage_updates)
+    if application_updates:
+        session.bulk_update_mappings(Application, application_updates)
+    record_metric_deltas(session, deltas)
+    session.commit()
+
+def rescore_applications(job_ids: Optional[List[int]] = None, batch_size: int = RESCORE_BATCH_SIZE,
+                         progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Re-run preselection for every application of some jobs (all jobs when None).
+
+    Scores are refreshed first in one pass over the stored CV chunks (each
+    job profile is embedded at most once), then applications are read in
+    id-ordered pages joined with their scores and their preselection/result
+    stages are rewritten with bulk updates. `progress` receives the running
+    counters after every page.
+    """
+    started = time.perf_counter()
+    session = Session()
+    try:
+        query = session.query(Job.id, Job.perfil_ideal)
+        if job_ids is not None:
+            query = query.filter(Job.id.in_(job_ids))
+        jobs = query.all()
+        report: Dict[str, Any] = {
+            "job_ids": [job_id for job_id, _ in jobs],
+            "applications": 0,
+            "processed": 0,
+            "updated": 0,
+            "preselected": 0,
+            "rejected": 0,
+            "skipped_manual": 0,
+            "unscored": 0,
+            "score_rows": 0,
+            "score_seconds": 0.0,
+            "elapsed_seconds": 0.0,
+            "applications_per_second": 0.0,
+        }
+        if not jobs:
+            return report
+
+        score_started = time.perf_counter()
+        report["score_rows"] = update_jobs_similarities(session, jobs, all_jobs=job_ids is None)
+        report["score_seconds"] = round(time.perf_counter() - score_started, 2)
+
+        scoped_jobs = Application.job_id.in_(report["job_ids"])
+        report["applications"] = session.query(Application.id).filter(scoped_jobs).count()
+        print(f"ℹ️ Re-scoring {report['applications']} applications for {len(jobs)} jobs "
+              f"({report['score_rows']} scores in {report['score_seconds']}s)")
+        if progress:
+            progress(dict(report))
+
+        last_id = 0
+        while True:
+            rows = (
+                session.query(Application.id, Application.status, CvJobSimilarity.score)
+                .outerjoin(MetaUser, MetaUser.user_id == Application.user_id)
+                .outerjoin(CvJobSimilarity, (CvJobSimilarity.cv_id == MetaUser.cv_id)
+                           & (CvJobSimilarity.job_id == Application.job_id))
+                .filter(scoped_jobs, Application.id > last_id)
+                .order_by(Application.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            _rescore_batch(session, rows, report)
+            last_id = rows[-1][0]
+            report["processed"] += len(rows)
+            elapsed = time.perf_counter() - started
+            report["elapsed_seconds"] = round(elapsed, 2)
+            report["applications_per_second"] = round(report["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+            print(f"ℹ️ Re-scored {report['processed']}/{report['applications']} applications "
+                  f"({report['applications_per_second']} apps/sec)")
+            if progress:
+                progress(dict(report))
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - started
+    report["elapsed_seconds"] = round(elapsed, 2)
+    report["applications_per_second"] = round(report["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+    print(f"✅ Re-score finished: {report['updated']} updated, {report['preselected']} preselected, "
+          f"{report['rejected']} rejected, {report['skipped_manual']} kept (manual), {report['unscored']} unscored")
+    return report
+
+def _update_run(run_id: str, **fields):
+    """Store a run's progress, so any worker process can answer the status poll"""
+    session = Session()
+    try:
+        run = session.get(RescoreRun, run_id)
+        if run is not None:
+            for key, value in fields.items():
+                setattr(run, key, value)
+            session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"⚠️ Could not update re-score run {run_id}: {e}")
+    finally:
+        session.close()
+
+def _progress(report: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: report[field] for field in _PROGRESS_FIELDS if field in report}
+
+def start_rescore(job_ids: Optional[List[int]] = None) -> str:
+    """Run rescore_applications in a background thread and return its run id"""
+    run_id = str(uuid.uuid4())
+    session = Session()
+    try:
+        session.add(RescoreRun(
+            id=run_id,
+            job_ids=",".join(str(job_id) for job_id in job_ids) if job_ids is not None else None,
+            status="running"
+        ))
+        session.commit()
+    finally:
+        session.close()
+
+    def run():
+        stop = threading.Event()
+
+        def heartbeat():
+            # Scoring can run for minutes without a progress call
+            while not stop.wait(RESCORE_HEARTBEAT_SECONDS):
+                _update_run(run_id, updated_at=datetime.utcnow())
+
+        threading.Thread(target=heartbeat, name=f"rescore-heartbeat-{run_id}", daemon=True).start()
+        try:
+            report = rescore_applications(job_ids, progress=lambda values: _update_run(run_id, **_progress(values)))
+            _update_run(run_id, status="finished", finished_at=datetime.utcnow(), **_progress(report))
+        except Exception as e:
+            print(f"❌ Re-score {run_id} failed: {e}")
+            _update_run(run_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            stop.set()
+
+    threading.Thread(target=run, name=f"rescore-{run_id}", daemon=True).start()
+    return run_id
+
+def get_rescore_status(run_id: str) -> Optional[Dict[str, Any]]:
+    """Progress of a run started with start_rescore (for the admin API)"""
+    session = Session()
+    try:
+        run = session.get(RescoreRun, run_id)
+        if run is None:
+            return None
+        stale_before = datetime.utcnow() - timedelta(seconds=RESCORE_STALE_SECONDS)
+        if run.status == "running" and run.updated_at is not None and run.updated_at < stale_before:
+            run.status = "failed"
+            run.error = "the process running this re-score stopped"
+            run.finished_at = datetime.utcnow()
+            session.commit()
+        return dict(
+            run_id=run.id,
+            status=run.status,
+            error=run.error,
+            job_ids=[int(job_id) for job_id in run.job_ids.split(",") if job_id] if run.job_ids is not None else None,
+            started_at=run.created_at.isoformat() if run.created_at else None,
+            finished_at=run.finished_at.isoformat() if run.finished_at else None,
+            **{field: getattr(run, field) for field in _PROGRESS_FIELDS}
+        )
+    finally:
+        session.close()
+
+# Re-score when run as a command: python -m architecture.rescore [--job-id N ...]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-run preselection for existing applications")
+    parser.add_argument("--job-id", type=int, action="append", dest="job_ids",
+                        help="Job to re-score (repeatable); all jobs when omitted")
+    parser.add_argument("--batch-size", type=int, default=RESCORE_BATCH_SIZE, help="Applications per bulk update")
+    args = parser.parse_args()
+    rescore_applications(args.job_ids, batch_size=args.batch_size)
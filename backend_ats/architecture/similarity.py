@@ -0,0 +1,329 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Add parent directory to path to import from auth module when run as a command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from .job_vectors import load_job_vectors
+from .vectordb import scroll_chunk_vectors, find_cv_id_by_filename
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so dot products are cosine similarities"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def best_chunk_scores(chunk_vectors: List[List[float]], job_vectors: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Score every job against a resume's chunks in one matrix product.
+
+    Returns (scores, best_chunk) arrays with one entry per job: the cosine
+    similarity of the best matching chunk and that chunk's position.
+    """
+    chunks = _normalize(np.asarray(chunk_vectors, dtype=np.float32))
+    jobs = _normalize(np.asarray(job_vectors, dtype=np.float32))
+    similarities = chunks @ jobs.T  # (chunks, jobs)
+    best_chunk = similarities.argmax(axis=0)
+    scores = similarities[best_chunk, np.arange(similarities.shape[1])]
+    return scores, best_chunk
+
+def _score_upsert():
+    """Insert scores, overwriting a pair another writer stored meanwhile (ingest vs re-score)"""
+    from sqlalchemy import DateTime, bindparam, text
+
+    return text(
+        "INSERT INTO cv_job_similarities (cv_id, job_id, score, chunk_index, updated_at)"
+        " VALUES (:cv_id, :job_id, :score, :chunk_index, :updated_at)"
+        " ON CONFLICT (cv_id, job_id) DO UPDATE SET score = excluded.score,"
+        " chunk_index = excluded.chunk_index, updated_at = excluded.updated_at"
+    ).bindparams(bindparam("updated_at", type_=DateTime))
+
+def _write_scores(session, rows: List[Dict]):
+    """Upsert score rows (pending commit)"""
+    if rows:
+        session.connection().execute(_score_upsert(), rows)
+
+def _delete_scores_before(session, condition, started: datetime):
+    """Drop the scores matching `condition` that this pass did not rewrite.
+
+    Rows stored by a concurrent ingest after `started` are kept.
+    """
+    from auth.create_db import CvJobSimilarity
+
+    session.query(CvJobSimilarity).filter(condition, CvJobSimilarity.updated_at < started).delete(
+        synchronize_session=False
+    )
+
+def _jobs_with_profile(session) -> List[Tuple[int, str]]:
+    from auth.create_db import Job
+    return [(job_id, text) for job_id, text in session.query(Job.id, Job.perfil_ideal).all() if text]
+
+def _mark_scored(session, chunk_counts: Dict[str, int]):
+    """Record that these resumes have been scored against every job (pending commit)"""
+    from auth.create_db import ScoredCv
+
+    if not chunk_counts:
+        return
+    cv_ids = list(chunk_counts.keys())
+    for start in range(0, len(cv_ids), 500):
+        session.query(ScoredCv).filter(ScoredCv.cv_id.in_(cv_ids[start:start + 500])).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    session.bulk_insert_mappings(ScoredCv, [
+        {"cv_id": cv_id, "chunk_count": count, "scored_at": now} for cv_id, count in chunk_counts.items()
+    ])
+
+def resume_cv_id(meta_user) -> Optional[str]:
+    """cv_id of a profile's resume. Profiles that predate cv_id are looked up
+    by filename once and the result is stored on the profile (committed with
+    the caller's session)."""
+    if meta_user is None:
+        return None
+    if meta_user.cv_id:
+        return meta_user.cv_id
+    if meta_user.resume_pdf:
+        meta_user.cv_id = find_cv_id_by_filename(meta_user.resume_pdf)
+        return meta_user.cv_id
+    return None
+
+def backfill_resume_cv_ids() -> Dict[str, int]:
+    """Fill meta_users.cv_id of legacy profiles from their resume filename, so
+    joins on cv_id (listings, min_similarity, re-scoring) see their scores"""
+    from sqlalchemy.orm import sessionmaker
+    from auth.create_db import engine, MetaUser
+
+    session = sessionmaker(bind=engine)()
+    try:
+        profiles = session.query(MetaUser).filter(
+            MetaUser.cv_id.is_(None), MetaUser.resume_pdf.isnot(None)
+        ).all()
+        by_filename: Dict[str, Optional[str]] = {}
+        resolved = 0
+        for profile in profiles:
+            if profile.resume_pdf not in by_filename:
+                by_filename[profile.resume_pdf] = find_cv_id_by_filename(profile.resume_pdf)
+            profile.cv_id = by_filename[profile.resume_pdf]
+            resolved += profile.cv_id is not None
+        session.commit()
+        summary = {"profiles": len(profiles), "resolved": resolved}
+        if profiles:
+            print(f"✅ Legacy profile cv_ids backfilled: {summary}")
+        return summary
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def update_resume_similarities(session, cv_id: str, chunks: Optional[List[Dict]] = None) -> Dict[int, float]:
+    """Recompute the scores of one resume against every job and persist them.
+
+    `chunks` may carry freshly computed {"chunk_index", "vector"} dicts (e.g.
+    right after an upload); otherwise they are read back from the vector store.
+    """
+    from auth.create_db import CvJobSimilarity
+
+    if chunks is None:
+        chunks = [chunk for page in scroll_chunk_vectors(cv_id=cv_id) for chunk in page]
+    chunks = [chunk for chunk in chunks if chunk.get("vector")]
+
+    started = datetime.utcnow()
+    job_vectors = load_job_vectors(_jobs_with_profile(session))
+    _mark_scored(session, {cv_id: len(chunks)})
+    if not chunks or not job_vectors:
+        _delete_scores_before(session, CvJobSimilarity.cv_id == cv_id, started)
+        session.commit()
+        return {}
+
+    job_ids = list(job_vectors.keys())
+    scores, best_chunk = best_chunk_scores(
+        [chunk["vector"] for chunk in chunks],
+        [job_vectors[job_id] for job_id in job_ids]
+    )
+    _write_scores(session, [
+        {
+            "cv_id": cv_id,
+            "job_id": job_id,
+            "score": float(scores[j]),
+            "chunk_index": chunks[int(best_chunk[j])].get("chunk_index"),
+            "updated_at": started
+        }
+        for j, job_id in enumerate(job_ids)
+    ])
+    _delete_scores_before(session, CvJobSimilarity.cv_id == cv_id, started)
+    session.commit()
+    return {job_id: float(scores[j]) for j, job_id in enumerate(job_ids)}
+
+def update_jobs_similarities(session, jobs: List[Tuple[int, Optional[str]]], all_jobs: bool = False) -> int:
+    """Recompute the scores of every stored resume against several jobs and persist them.
+
+    Job profiles are read back (or embedded) in one batch and the chunks are
+    streamed once, page by page, reduced to a running best score per CV and
+    job. Memory stays bounded by the page size and resumes x jobs. With
+    `all_jobs` (the jobs given are every job), each resume seen is marked as
+    fully scored.
+    """
+    from auth.create_db import CvJobSimilarity
+
+    job_ids = [job_id for job_id, _ in jobs]
+    if not job_ids:
+        return 0
+    # Scores older than this are replaced (or were not seen again) once the chunks are streamed
+    started = datetime.utcnow()
+    job_vectors = load_job_vectors(jobs)
+    scored_ids = [job_id for job_id in job_ids if job_id in job_vectors]
+    if not scored_ids and not all_jobs:
+        _delete_scores_before(session, CvJobSimilarity.job_id.in_(job_ids), started)
+        session.commit()
+        return 0
+
+    matrix = _normalize(np.asarray([job_vectors[job_id] for job_id in scored_ids], dtype=np.float32)) if scored_ids else None
+    best_scores: Dict[str, np.ndarray] = {}
+    best_chunks: Dict[str, np.ndarray] = {}
+    chunk_counts: Dict[str, int] = {}
+    for page in scroll_chunk_vectors():
+        page = [chunk for chunk in page if chunk.get("vector") and chunk.get("cv_id")]
+        for chunk in page:
+            chunk_counts[chunk["cv_id"]] = chunk_counts.get(chunk["cv_id"], 0) + 1
+        if not page or not scored_ids:
+            continue
+        similarities = _normalize(np.asarray([chunk["vector"] for chunk in page], dtype=np.float32)) @ matrix.T
+        chunk_indexes = np.asarray([
+            chunk["chunk_index"] if chunk.get("chunk_index") is not None else -1 for chunk in page
+        ])
+        rows_by_cv: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(page):
+            rows_by_cv.setdefault(chunk["cv_id"], []).append(row)
+        for cv_id, rows in rows_by_cv.items():
+            block = similarities[rows]  # (chunks of this CV, jobs)
+            top = block.argmax(axis=0)
+            scores = block[top, np.arange(block.shape[1])]
+            chunk_ids = chunk_indexes[rows][top]
+            current = best_scores.get(cv_id)
+            if current is None:
+                best_scores[cv_id], best_chunks[cv_id] = scores, chunk_ids
+            else:
+                better = scores > current
+                current[better] = scores[better]
+                best_chunks[cv_id][better] = chunk_ids[better]
+
+    rows = [
+        {
+            "cv_id": cv_id,
+            "job_id": job_id,
+            "score": float(scores[j]),
+            "chunk_index": int(best_chunks[cv_id][j]) if best_chunks[cv_id][j] >= 0 else None,
+            "updated_at": started
+        }
+        for cv_id, scores in best_scores.items()
+        for j, job_id in enumerate(scored_ids)
+    ]
+    _write_scores(session, rows)
+    _delete_scores_before(session, CvJobSimilarity.job_id.in_(job_ids), started)
+    if all_jobs:
+        _mark_scored(session, chunk_counts)
+    session.commit()
+    return len(rows)
+
+def update_job_similarities(session, job_id: int, perfil_ideal: Optional[str]) -> int:
+    """Recompute the scores of every stored resume against one job and persist them"""
+    return update_jobs_similarities(session, [(job_id, perfil_ideal)])
+
+def get_resume_scores(session, cv_id: str) -> Dict[int, float]:
+    """Return the stored {job_id: score} of a resume.
+
+    Reads never touch the vector store: a resume that has not been scored
+    yet (see score_missing_resumes) simply has no scores.
+    """
+    from auth.create_db import CvJobSimilarity
+
+    rows = session.query(CvJobSimilarity.job_id, CvJobSimilarity.score).filter(
+        CvJobSimilarity.cv_id == cv_id
+    ).all()
+    return {job_id: score for job_id, score in rows}
+
+def get_pair_scores(session, pairs: List[Tuple[str, int]]) -> Dict[Tuple[str, int], float]:
+    """Return the stored {(cv_id, job_id): score} of many pairs with a single query"""
+    from auth.create_db import CvJobSimilarity
+
+    cv_ids = {cv_id for cv_id, _ in pairs if cv_id}
+    if not cv_ids:
+        return {}
+    rows = session.query(CvJobSimilarity.cv_id, CvJobSimilarity.job_id, CvJobSimilarity.score).filter(
+        CvJobSimilarity.cv_id.in_(cv_ids)
+    ).all()
+    return {(cv_id, job_id): score for cv_id, job_id, score in rows}
+
+def refresh_resume_similarities(cv_id: str, chunks: Optional[List[Dict]] = None):
+    """Session-managing wrapper of update_resume_similarities for non-request callers"""
+    from sqlalchemy.orm import sessionmaker
+    from auth.create_db import engine
+
+    session = sessionmaker(bind=engine)()
+    try:
+        return update_resume_similarities(session, cv_id, chunks)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def rebuild_all_similarities() -> Dict[str, int]:
+    """Recompute the whole table in a single pass over the stored chunks"""
+    from sqlalchemy.orm import sessionmaker
+    from auth.create_db import engine, CvJobSimilarity, ScoredCv
+
+    session = sessionmaker(bind=engine)()
+    try:
+        session.query(CvJobSimilarity).delete(synchronize_session=False)
+        session.query(ScoredCv).delete(synchronize_session=False)
+        session.commit()
+        jobs = _jobs_with_profile(session)
+        rows = update_jobs_similarities(session, jobs, all_jobs=True)
+        summary = {"jobs": len(jobs), "rows": rows}
+        print(f"✅ CV/job similarities rebuilt: {summary}")
+        return summary
+    finally:
+        session.close()
+
+def score_missing_resumes() -> Dict[str, int]:
+    """Score the resumes referenced by profiles that were never scored
+    (e.g. uploaded before the similarity table existed), after resolving the
+    cv_id of legacy profiles"""
+    from sqlalchemy.orm import sessionmaker
+    from auth.create_db import engine, MetaUser, ScoredCv
+
+    backfill_resume_cv_ids()
+    session = sessionmaker(bind=engine)()
+    try:
+        cv_ids = [
+            cv_id for (cv_id,) in session.query(MetaUser.cv_id).distinct()
+            .outerjoin(ScoredCv, ScoredCv.cv_id == MetaUser.cv_id)
+            .filter(MetaUser.cv_id.isnot(None), ScoredCv.cv_id.is_(None))
+            .all()
+        ]
+    finally:
+        session.close()
+
+    failed = 0
+    for cv_id in cv_ids:
+        try:
+            refresh_resume_similarities(cv_id)
+        except Exception as e:
+            failed += 1
+            print(f"⚠️ Could not score resume {cv_id}: {e}")
+    summary = {"resumes": len(cv_ids), "failed": failed}
+    print(f"✅ Missing resume scores computed: {summary}")
+    return summary
+
+# Rebuild when run as a command: python -m architecture.similarity [--missing]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the CV/job similarity table")
+    parser.add_argument("--missing", action="store_true", help="Only score the profiles' resumes never scored before")
+    args = parser.parse_args()
+    if args.missing:
+        score_missing_resumes()
+    else:
+        rebuild_all_similarities()
@@ -0,0 +1,180 @@
+import os
+import time
+import random
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Set
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+
+# Load environment variables
+load_dotenv()
+
+# Vector store backend: "qdrant" (server) or "local" (in-process, no services needed)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "qdrant").lower()
+# Folder of the local backend; empty keeps it in memory only
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", os.path.join(tempfile.gettempdir(), "ats_vector_store"))
+
+# Qdrant connection settings
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+QDRANT_TIMEOUT_SECONDS = int(os.getenv("QDRANT_TIMEOUT_SECONDS", "30"))
+# Bounded retries for transient failures (connection errors, 5xx, gRPC UNAVAILABLE)
+QDRANT_MAX_RETRIES = int(os.getenv("QDRANT_MAX_RETRIES", "3"))
+QDRANT_RETRY_BACKOFF_SECONDS = float(os.getenv("QDRANT_RETRY_BACKOFF_SECONDS", "0.2"))
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an error is worth retrying (the request may succeed on a second try)"""
+    from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+    if isinstance(error, ResponseHandlingException):
+        return True  # the request did not get a response (connection reset, timeout, ...)
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code is not None and (error.status_code >= 500 or error.status_code == 429)
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import grpc
+        if isinstance(error, grpc.RpcError):
+            return error.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED,
+                                    grpc.StatusCode.RESOURCE_EXHAUSTED)
+    except ImportError:
+        pass
+    return False
+
+class ManagedQdrantClient:
+    """Process-wide Qdrant client shared by all threads.
+
+    The underlying QdrantClient (and its connection pool) is created once on
+    first use. Every call goes through `call`, which retries transient errors
+    with exponential backoff and records per-operation latency. Collection
+    existence is cached so hot paths do not ask Qdrant before each write.
+    Methods of QdrantClient are available directly (client.search(...)).
+    With backend "local" the same calls are served by an in-process
+    LocalVectorStore instead of a Qdrant server.
+    """
+
+    def __init__(self, host: str = QDRANT_HOST, port: int = QDRANT_PORT, grpc_port: int = QDRANT_GRPC_PORT,
+                 prefer_grpc: bool = QDRANT_PREFER_GRPC, max_retries: int = QDRANT_MAX_RETRIES,
+                 backoff_seconds: float = QDRANT_RETRY_BACKOFF_SECONDS, backend: str = VECTOR_STORE_BACKEND,
+                 **client_options):
+        if backend not in ("qdrant", "local"):
+            raise ValueError(f"Unknown vector store backend '{backend}', expected 'qdrant' or 'local'")
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.grpc_port = grpc_port
+        self.prefer_grpc = prefer_grpc
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.client_options = client_options
+        self._client: Optional[QdrantClient] = None
+        self._lock = threading.Lock()
+        self._collections: Set[str] = set()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _get_client(self) -> QdrantClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None and self.backend == "local":
+                    from .local_vector_store import LocalVectorStore
+                    self._client = LocalVectorStore(VECTOR_STORE_PATH or None)
+                elif self._client is None:
+                    self._client = QdrantClient(
+                        host=self.host,
+                        port=self.port,
+                        grpc_port=self.grpc_port,
+                        prefer_grpc=self.prefer_grpc,
+                        timeout=QDRANT_TIMEOUT_SECONDS,
+                        **self.client_options
+                    )
+        return self._client
+
+    def _record(self, operation: str, elapsed_ms: float, retries: int, failed: bool):
+        with self._lock:
+            stats = self._metrics.setdefault(operation, {
+                "calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0
+            })
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if failed:
+                stats["errors"] += 1
+
+    def call(self, operation: str, *args, **kwargs) -> Any:
+        """Run a QdrantClient method with bounded retries and latency accounting"""
+        method = getattr(self._get_client(), operation)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                result = method(*args, **kwargs)
+                self._record(operation, (time.perf_counter() - started) * 1000, attempt, failed=False)
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    self._record(operation, (time.perf_counter() - started) * 1000, attempt, failed=True)
+                    collection_name = kwargs.get("collection_name")
+                    if collection_name and "not found" in str(e).lower():
+                        self.forget_collection(collection_name)
+                    raise
+                # Exponential backoff with jitter: 0.2s, 0.4s, 0.8s, ...
+                time.sleep(self.backoff_seconds * (2 ** attempt) * (0.5 + random.random()))
+                attempt += 1
+
+    def __getattr__(self, operation: str):
+        if operation.startswith("_"):
+            raise AttributeError(operation)
+        return lambda *args, **kwargs: self.call(operation, *args, **kwargs)
+
+    def collection_exists(self, collection_name: str) -> bool:
+        """Cached existence check; only asks Qdrant until the collection is seen"""
+        if collection_name in self._collections:
+            return True
+        names = {collection.name for collection in self.call("get_collections").collections}
+        with self._lock:
+            self._collections |= names
+        return collection_name in names
+
+    def remember_collection(self, collection_name: str):
+        with self._lock:
+            self._collections.add(collection_name)
+
+    def forget_collection(self, collection_name: str):
+        with self._lock:
+            self._collections.discard(collection_name)
+
+    def health_check(self) -> bool:
+        """Whether Qdrant answers (one cheap request, no retries)"""
+        try:
+            self._get_client().get_collections()
+            return True
+        except Exception as e:
+            print(f"❌ Qdrant health check failed: {e}")
+            return False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-operation call counts, errors, retries and latency (ms)"""
+        with self._lock:
+            operations = {
+                operation: dict(
+                    stats,
+                    total_ms=round(stats["total_ms"], 2),
+                    max_ms=round(stats["max_ms"], 2),
+                    mean_ms=round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0
+                )
+                for operation, stats in self._metrics.items()
+            }
+        return {
+            "backend": self.backend,
+            "transport": "in-process" if self.backend == "local" else ("grpc" if self.prefer_grpc else "http"),
+            "host": None if self.backend == "local" else self.host,
+            "operations": operations,
+        }
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics.clear()
@@ -1,112 +1,229 @@
 import os
-from typing import List, Dict, Any, Optional, Union
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Union
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import Distance, VectorParams, PointStruct
 import uuid
+from .embedding_providers import get_provider
+from . import collection_profiles
+from . import lexical_index
+from .vector_client import ManagedQdrantClient, QDRANT_HOST, QDRANT_PORT
 
 # Load environment variables
 load_dotenv()
 
-# Qdrant connection settings
-QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
-QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+# Qdrant collections
 QDRANT_COLLECTION_NAME = "cv_collection"
-VECTOR_SIZE = 1536  # Size for text-embedding-3-small
+QDRANT_JOB_COLLECTION_NAME = "job_collection"
+VECTOR_SIZE = get_provider().dimensions  # Follows the configured embedding provider
+# Payload fields used in filters; indexed so filtered searches do not scan the collection
+CV_PAYLOAD_INDEXES = ("cv_id", "filename")
+# Storage profile of cv_collection (QDRANT_CV_PROFILE) and the search settings it implies
+CV_PROFILE = collection_profiles.get_profile()
+CV_SEARCH_PARAMS = collection_profiles.search_params(CV_PROFILE)
+# Hybrid search: BM25 candidates fetched per query, and whether they restrict the vector stage
+HYBRID_LEXICAL_CANDIDATES = int(os.getenv("HYBRID_LEXICAL_CANDIDATES", "200"))
+HYBRID_PREFILTER = os.getenv("HYBRID_PREFILTER", "1") == "1"
 
-# Initialize Qdrant client
-client = None
+# Shared Qdrant client: connects on first use, retries transient errors, records latency
+client = ManagedQdrantClient()
 
 def setup_vector_extension():
-    """Set up Qdrant client"""
-    global client
-    try:
-        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-        print(f"✅ Connected to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
+    """Check that Qdrant is reachable"""
+    if client.health_check():
+        if client.backend == "local":
+            print("✅ Using the in-process local vector store")
+        else:
+            print(f"✅ Connected to Qdrant at {QDRANT_HOST}:{QDRANT_PORT} ({'gRPC' if client.prefer_grpc else 'HTTP'})")
         return True
+    print(f"❌ Error connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
+    return False
+
+# Search result caches key on the version of cv_collection. Its main part is a
+# counter in the shared SQL database, bumped after every write, so writes made by
+# other processes (workers, command line imports) invalidate the caches too. The
+# local part still changes when a write of this process could not be recorded.
+_cv_local_writes = 0
+_cv_version_lock = threading.Lock()
+
+def _bump_cv_collection_version():
+    global _cv_local_writes
+    with _cv_version_lock:
+        _cv_local_writes += 1
+    try:
+        from auth.create_db import bump_collection_version
+        bump_collection_version(QDRANT_COLLECTION_NAME)
     except Exception as e:
-        print(f"❌ Error connecting to Qdrant: {e}")
-        return False
+        print(f"⚠️ Could not record the write to {QDRANT_COLLECTION_NAME}: {e}")
+
+def cv_collection_version() -> Tuple[Optional[int], int]:
+    """Version of cv_collection: (writes recorded by every process, or None if
+    the database is unreachable; writes made by this process)"""
+    with _cv_version_lock:
+        local = _cv_local_writes
+    try:
+        from auth.create_db import get_collection_version
+        return get_collection_version(QDRANT_COLLECTION_NAME), local
+    except Exception as e:
+        print(f"⚠️ Could not read the version of {QDRANT_COLLECTION_NAME}: {e}")
+        return None, local
+
+def get_client_metrics() -> Dict[str, Any]:
+    """Per-operation latency metrics of the vector store client"""
+    return client.get_metrics()
 
 def create_tables():
-    """Create collection in Qdrant"""
-    global client
+    """Create collections in Qdrant"""
     try:
-        if client is None:
-            setup_vector_extension()
-            
-        # Check if collection exists
+        # Check which collections exist
         collections = client.get_collections().collections
         collection_names = [collection.name for collection in collections]
         
-        if QDRANT_COLLECTION_NAME not in collection_names:
-            # Create collection if it doesn't exist
-            client.create_collection(
-                collection_name=QDRANT_COLLECTION_NAME,
-                vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
-            )
-            print(f"✅ Created collection '{QDRANT_COLLECTION_NAME}' in Qdrant")
-        else:
-            print(f"✅ Collection '{QDRANT_COLLECTION_NAME}' already exists in Qdrant")
+        for collection_name in (QDRANT_COLLECTION_NAME, QDRANT_JOB_COLLECTION_NAME):
+            if collection_name not in collection_names:
+                # Create collection if it doesn't exist
+                if collection_name == QDRANT_COLLECTION_NAME:
+                    client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=collection_profiles.vectors_config(CV_PROFILE, VECTOR_SIZE),
+                        hnsw_config=collection_profiles.hnsw_config(CV_PROFILE),
+                        quantization_config=collection_profiles.quantization_config(CV_PROFILE)
+                    )
+                else:
+                    client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+                    )
+                print(f"✅ Created collection '{collection_name}' in Qdrant")
+                client.remember_collection(collection_name)
+            else:
+                size = client.get_collection(collection_name=collection_name).config.params.vectors.size
+                if size != VECTOR_SIZE:
+                    print(f"⚠️ Collection '{collection_name}' has vectors of size {size} but the embedding "
+                          f"provider produces {VECTOR_SIZE}; recreate it and re-index after switching providers")
+                else:
+                    print(f"✅ Collection '{collection_name}' already exists in Qdrant")
+        create_payload_indexes()
+        apply_cv_profile()
         return True
     except Exception as e:
         print(f"❌ Error creating collection in Qdrant: {e}")
         return False
 
-def store_cv(cv_data: Dict[str, Any]) -> Optional[Union[str, int]]:
-    """Store CV data in Qdrant"""
-    global client
-    try:
-        if client is None:
-            setup_vector_extension()
+def create_payload_indexes():
+    """Create the keyword payload indexes of the CV collection (no-op if present)"""
+    existing = client.get_collection(collection_name=QDRANT_COLLECTION_NAME).payload_schema or {}
+    for field_name in CV_PAYLOAD_INDEXES:
+        if field_name in existing:
+            continue
+        client.create_payload_index(
+            collection_name=QDRANT_COLLECTION_NAME,
+            field_name=field_name,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+            wait=True
+        )
+        print(f"✅ Created payload index on '{field_name}' in '{QDRANT_COLLECTION_NAME}'")
+
+def apply_cv_profile():
+    """Bring an existing cv_collection to the configured storage profile.
+
+    Only differing settings are sent; Qdrant then rebuilds the affected
+    segments in the background.
+    """
+    info = client.get_collection(collection_name=QDRANT_COLLECTION_NAME)
+    changes = collection_profiles.profile_differences(CV_PROFILE, info)
+    if changes:
+        client.update_collection(collection_name=QDRANT_COLLECTION_NAME, **changes)
+        print(f"✅ Applied collection profile '{CV_PROFILE['name']}' to '{QDRANT_COLLECTION_NAME}' ({', '.join(changes)})")
+
+def _match_filter(key: str, value: str) -> models.Filter:
+    """Filter on an exact (indexed) payload value"""
+    return models.Filter(must=[models.FieldCondition(key=key, match=models.MatchValue(value=value))])
+
+def _chunk_result(result) -> Dict[str, Any]:
+    """Public representation of a scored chunk"""
+    return {
+        "id": result.id,
+        "cv_id": result.payload.get("cv_id"),
+        "text": result.payload.get("text", ""),
+        "chunk_index": result.payload.get("chunk_index", 0),
+        "filename": result.payload.get("filename", "unknown.pdf"),
+        "similarity": getattr(result, "score", None)  # None for records fetched without scoring
+    }
+
+def _cv_points(cv_data: Dict[str, Any], cv_id: str) -> List[PointStruct]:
+    """Build the Qdrant points (one per embedded chunk) of a processed CV"""
+    points = []
+    
+    for i, (chunk, embedding) in enumerate(zip(cv_data.get("chunks", []), cv_data.get("embeddings", []))):
+        if not embedding:  # Skip if embedding is empty
+            continue
+        # Validate embedding dimension
+        if len(embedding) != VECTOR_SIZE:
+            raise ValueError(
+                f"Embedding dimension mismatch: expected {VECTOR_SIZE}, got {len(embedding)} at chunk {i}"
+            )
             
-        # Generate a unique ID for the CV (string uuid for grouping)
-        cv_id = str(uuid.uuid4())
+        # Create a unique numeric ID for each chunk (Qdrant requires int or UUID)
+        # Derived from (cv_id, chunk index) so retrying an upload overwrites instead of duplicating
+        chunk_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{cv_id}/{i}").int & ((1 << 63) - 1)
         
-        # Store chunks with their embeddings
-        points = []
-        
-        for i, (chunk, embedding) in enumerate(zip(cv_data.get("chunks", []), cv_data.get("embeddings", []))):
-            if not embedding:  # Skip if embedding is empty
-                continue
-            # Validate embedding dimension
-            if len(embedding) != VECTOR_SIZE:
-                raise ValueError(
-                    f"Embedding dimension mismatch: expected {VECTOR_SIZE}, got {len(embedding)} at chunk {i}"
-                )
-                
-            # Create a unique numeric ID for each chunk (Qdrant requires int or UUID)
-            # Use 63-bit positive integer derived from uuid4
-            chunk_id = uuid.uuid4().int & ((1 << 63) - 1)
-            
-            # Create point for Qdrant
-            points.append(
-                PointStruct(
-                    id=chunk_id,
-                    vector=[float(x) for x in embedding],
-                    payload={
-                        "text": chunk,
-                        "cv_id": cv_id,
-                        "chunk_index": i,
-                        "filename": cv_data.get("filename", "unknown.pdf")
-                    }
-                )
+        # Create point for Qdrant
+        points.append(
+            PointStruct(
+                id=chunk_id,
+                vector=[float(x) for x in embedding],
+                payload={
+                    "text": chunk,
+                    "cv_id": cv_id,
+                    "chunk_index": i,
+                    "filename": cv_data.get("filename", "unknown.pdf")
+                }
             )
-        
-        # Upload points to Qdrant
-        if points:
-            # Ensure collection exists before upsert
-            try:
-                client.get_collection(collection_name=QDRANT_COLLECTION_NAME)
-            except Exception:
-                create_tables()
-            
+        )
+    return points
+
+def _index_lexical(points: List[PointStruct]):
+    """Add the chunk texts of freshly stored points to the BM25 index"""
+    by_cv: Dict[str, List[Tuple[int, int, str]]] = {}
+    for point in points:
+        payload = point.payload or {}
+        by_cv.setdefault(payload["cv_id"], []).append((point.id, payload["chunk_index"], payload["text"]))
+    for cv_id, chunks in by_cv.items():
+        try:
+            lexical_index.index_cv(cv_id, chunks)
+        except Exception as e:
+            # The vector store stays the source of truth; rebuild with python -m architecture.lexical_index
+            print(f"⚠️ Could not update the lexical index for CV {cv_id}: {e}")
+
+def _upsert_points(points: List[PointStruct], batch_size: int = 512):
+    """Upload points in large batches, making sure the collection exists first"""
+    if not points:
+        return
+    if not client.collection_exists(QDRANT_COLLECTION_NAME):
+        create_tables()
+    
+    try:
+        for start in range(0, len(points), batch_size):
             client.upsert(
                 collection_name=QDRANT_COLLECTION_NAME,
-                points=points,
+                points=points[start:start + batch_size],
                 wait=True
             )
+    finally:
+        _bump_cv_collection_version()
+
+def store_cv(cv_data: Dict[str, Any], cv_id: Optional[str] = None) -> Optional[Union[str, int]]:
+    """Store CV data in Qdrant (optionally under a pre-assigned cv_id)"""
+    try:
+        # Generate a unique ID for the CV (string uuid for grouping)
+        cv_id = cv_id or str(uuid.uuid4())
+        
+        # Store chunks with their embeddings
+        points = _cv_points(cv_data, cv_id)
+        _upsert_points(points)
+        _index_lexical(points)
             
         print(f"✅ CV stored successfully with ID: {cv_id} in Qdrant")
         return cv_id
@@ -115,74 +232,254 @@ def store_cv(cv_data: Dict[str, Any]) -> Optional[Union[str, int]]:
         print(f"❌ Error storing CV in Qdrant: {e}")
         raise
 
+def store_cvs(items: List[Tuple[Dict[str, Any], str]], batch_size: int = 512) -> int:
+    """Store many (cv_data, cv_id) pairs with grouped upserts; returns the point count"""
+    try:
+        points = [point for cv_data, cv_id in items for point in _cv_points(cv_data, cv_id)]
+        _upsert_points(points, batch_size)
+        _index_lexical(points)
+        print(f"✅ Stored {len(items)} CVs ({len(points)} chunks) in Qdrant")
+        return len(points)
+    except Exception as e:
+        print(f"❌ Error storing CVs in Qdrant: {e}")
+        raise
+
 def search_similar_chunks(query_embedding: List[float], limit: int = 5) -> List[Dict[str, Any]]:
     """Search for similar chunks using vector similarity in Qdrant"""
-    global client
     try:
-        if client is None:
-            setup_vector_extension()
-            
         # Search for similar vectors in Qdrant
         search_results = client.search(
             collection_name=QDRANT_COLLECTION_NAME,
             query_vector=query_embedding,
+            search_params=CV_SEARCH_PARAMS,
             limit=limit
         )
         
-        # Format results
-        similar_chunks = []
-        for result in search_results:
-            similar_chunks.append({
-                "id": result.id,
-                "text": result.payload.get("text", ""),
-                "chunk_index": result.payload.get("chunk_index", 0),
-                "filename": result.payload.get("filename", "unknown.pdf"),
-                "similarity": result.score
-            })
-                
-        return similar_chunks
+        return [_chunk_result(result) for result in search_results]
     except Exception as e:
         print(f"❌ Error searching chunks in Qdrant: {e}")
         return []
 
-def search_similar_chunks_for_filename(query_embedding: List[float], filename: str, limit: int = 5) -> List[Dict[str, Any]]:
-    """Search for similar chunks restricted to a specific resume filename."""
-    global client
+def search_hybrid(query_text: str, query_embedding: List[float], limit: int = 5,
+                  prefilter: bool = HYBRID_PREFILTER) -> List[Dict[str, Any]]:
+    """Fuse BM25 and vector rankings of chunks with reciprocal rank fusion.
+
+    The BM25 stage catches exact tokens (skills, tools, certification codes)
+    that dense vectors blur. With `prefilter`, when it finds enough chunks,
+    the vector stage only scores those candidates instead of the whole
+    collection.
+    """
     try:
-        if client is None:
-            setup_vector_extension()
-
-        # Build a filter to restrict to points with matching filename
-        qfilter = models.Filter(
-            must=[
-                models.FieldCondition(
-                    key="filename",
-                    match=models.MatchValue(value=filename)
-                )
-            ]
-        )
+        lexical = lexical_index.search(query_text, limit=HYBRID_LEXICAL_CANDIDATES)
+        candidate_ids = [hit["id"] for hit in lexical]
+        if prefilter and len(candidate_ids) >= limit:
+            vector_hits = client.search(
+                collection_name=QDRANT_COLLECTION_NAME,
+                query_vector=query_embedding,
+                query_filter=models.Filter(must=[models.HasIdCondition(has_id=candidate_ids)]),
+                search_params=CV_SEARCH_PARAMS,
+                limit=len(candidate_ids)
+            )
+        else:
+            vector_hits = client.search(
+                collection_name=QDRANT_COLLECTION_NAME,
+                query_vector=query_embedding,
+                search_params=CV_SEARCH_PARAMS,
+                limit=max(limit * 4, 20)
+            )
+
+        fused = lexical_index.reciprocal_rank_fusion([candidate_ids, [hit.id for hit in vector_hits]])
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:limit]
+
+        by_id = {hit.id: _chunk_result(hit) for hit in vector_hits}
+        missing = [point_id for point_id in top_ids if point_id not in by_id]
+        if missing:
+            # Lexical-only hits: fetch their payloads in one call
+            for record in client.retrieve(collection_name=QDRANT_COLLECTION_NAME, ids=missing, with_payload=True):
+                by_id[record.id] = _chunk_result(record)
+        lexical_scores = {hit["id"]: hit["lexical_score"] for hit in lexical}
 
+        results = []
+        for point_id in top_ids:
+            if point_id not in by_id:
+                continue  # indexed lexically but no longer in the vector store
+            result = dict(by_id[point_id], lexical_score=lexical_scores.get(point_id), score=fused[point_id])
+            results.append(result)
+        return results
+    except Exception as e:
+        print(f"❌ Error running hybrid search: {e}")
+        return []
+
+def search_similar_cvs(query_embedding: List[float], limit: int = 5, group_size: int = 3) -> List[Dict[str, Any]]:
+    """Search candidates instead of chunks: the top `limit` CVs, grouped by cv_id.
+
+    Each CV comes with its best `group_size` matching chunks, the best chunk
+    score and the mean score of those chunks, so one long CV cannot fill
+    every slot of the result.
+    """
+    try:
+        groups = client.search_groups(
+            collection_name=QDRANT_COLLECTION_NAME,
+            query_vector=query_embedding,
+            group_by="cv_id",
+            limit=limit,
+            group_size=group_size,
+            search_params=CV_SEARCH_PARAMS,
+            with_payload=["cv_id", "text", "chunk_index", "filename"]
+        ).groups
+
+        candidates = []
+        for group in groups:
+            chunks = [_chunk_result(hit) for hit in group.hits]
+            if not chunks:
+                continue
+            scores = [chunk["similarity"] for chunk in chunks]
+            candidates.append({
+                "cv_id": group.id,
+                "filename": chunks[0]["filename"],
+                "best_score": max(scores),
+                "mean_score": sum(scores) / len(scores),
+                "chunks": chunks
+            })
+        candidates.sort(key=lambda candidate: candidate["best_score"], reverse=True)
+        return candidates
+    except Exception as e:
+        print(f"❌ Error searching grouped CVs in Qdrant: {e}")
+        return []
+
+def search_similar_chunks_for_cv(query_embedding: List[float], cv_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """Search for similar chunks restricted to one CV (indexed cv_id filter)"""
+    try:
         search_results = client.search(
             collection_name=QDRANT_COLLECTION_NAME,
             query_vector=query_embedding,
-            query_filter=qfilter,
+            query_filter=_match_filter("cv_id", cv_id),
+            search_params=CV_SEARCH_PARAMS,
             limit=limit
         )
-
-        similar_chunks = []
-        for result in search_results:
-            similar_chunks.append({
-                "id": result.id,
-                "text": result.payload.get("text", ""),
-                "chunk_index": result.payload.get("chunk_index", 0),
-                "filename": result.payload.get("filename", "unknown.pdf"),
-                "similarity": result.score
-            })
-        return similar_chunks
+        return [_chunk_result(result) for result in search_results]
     except Exception as e:
         print(f"❌ Error searching filtered chunks in Qdrant: {e}")
         return []
 
+def search_batch(queries: List[Dict[str, Any]], collection_name: str = QDRANT_COLLECTION_NAME) -> List[List[Dict[str, Any]]]:
+    """Run many searches in one Qdrant request.
+
+    Each query is {"vector": [...], "limit": 5} plus optional "cv_id" or
+    "filename" to restrict it to one CV. Results come back in query order.
+    """
+    if not queries:
+        return []
+
+    requests = []
+    for query in queries:
+        conditions = [
+            models.FieldCondition(key=key, match=models.MatchValue(value=query[key]))
+            for key in CV_PAYLOAD_INDEXES
+            if query.get(key)
+        ]
+        requests.append(models.SearchRequest(
+            vector=[float(x) for x in query["vector"]],
+            filter=models.Filter(must=conditions) if conditions else None,
+            limit=int(query.get("limit", 5)),
+            params=CV_SEARCH_PARAMS if collection_name == QDRANT_COLLECTION_NAME else None,
+            with_payload=True
+        ))
+
+    batch_results = client.search_batch(collection_name=collection_name, requests=requests)
+    return [[_chunk_result(result) for result in results] for results in batch_results]
+
+def find_cv_id_by_filename(filename: str) -> Optional[str]:
+    """cv_id of a stored CV with this filename (for profiles saved before cv_id existed).
+
+    Filenames are not unique, so this returns one of the matching CVs.
+    """
+    try:
+        records, _ = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=_match_filter("filename", filename),
+            limit=1,
+            with_payload=["cv_id"],
+            with_vectors=False
+        )
+        return (records[0].payload or {}).get("cv_id") if records else None
+    except Exception as e:
+        print(f"❌ Error looking up CV by filename in Qdrant: {e}")
+        return None
+
+def scroll_chunk_vectors(cv_id: Optional[str] = None, page_size: int = 256):
+    """Yield pages of stored chunks with their vectors, optionally for one CV"""
+
+    qfilter = _match_filter("cv_id", cv_id) if cv_id is not None else None
+
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=qfilter,
+            limit=page_size,
+            offset=offset,
+            with_payload=["cv_id", "filename", "chunk_index"],
+            with_vectors=True
+        )
+        yield [
+            {
+                "cv_id": (record.payload or {}).get("cv_id"),
+                "filename": (record.payload or {}).get("filename", "unknown.pdf"),
+                "chunk_index": (record.payload or {}).get("chunk_index", 0),
+                "vector": record.vector
+            }
+            for record in records
+        ]
+        if offset is None:
+            break
+
+def store_job_vector(job_id: int, embedding: List[float], text_hash: str):
+    """Store (or replace) the precomputed perfil_ideal vector of a job"""
+    if len(embedding) != VECTOR_SIZE:
+        raise ValueError(f"Embedding dimension mismatch: expected {VECTOR_SIZE}, got {len(embedding)}")
+    point = PointStruct(
+        id=int(job_id),
+        vector=[float(x) for x in embedding],
+        payload={"job_id": int(job_id), "text_hash": text_hash}
+    )
+    if not client.collection_exists(QDRANT_JOB_COLLECTION_NAME):
+        create_tables()
+    client.upsert(collection_name=QDRANT_JOB_COLLECTION_NAME, points=[point], wait=True)
+
+def get_job_vectors(job_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch stored job vectors by job id: {job_id: {"vector": [...], "text_hash": "..."}}"""
+    if not job_ids:
+        return {}
+    try:
+        records = client.retrieve(
+            collection_name=QDRANT_JOB_COLLECTION_NAME,
+            ids=[int(job_id) for job_id in job_ids],
+            with_payload=True,
+            with_vectors=True
+        )
+        return {
+            int(record.id): {
+                "vector": record.vector,
+                "text_hash": (record.payload or {}).get("text_hash")
+            }
+            for record in records
+        }
+    except Exception as e:
+        print(f"❌ Error retrieving job vectors from Qdrant: {e}")
+        return {}
+
+def delete_job_vector(job_id: int):
+    """Remove the stored vector of a job"""
+    try:
+        client.delete(
+            collection_name=QDRANT_JOB_COLLECTION_NAME,
+            points_selector=models.PointIdsList(points=[int(job_id)]),
+            wait=True
+        )
+    except Exception as e:
+        print(f"❌ Error deleting job vector from Qdrant: {e}")
+
 def initialize_vector_db():
     """Initialize Qdrant database"""
     if setup_vector_extension():
@@ -64,7 +64,8 @@ def authenticate_user(email: str, password: str):
         # Generate access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.email, "name": user.name, "is_admin": user.is_admin},
+            # uid lets the API skip the per-request user lookup by email
+            data={"sub": user.email, "uid": user.id, "name": user.name, "is_admin": user.is_admin},
             expires_delta=access_token_expires
         )
         
@@ -1,9 +1,10 @@
 import os
 import sys
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, text
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, Float, LargeBinary, UniqueConstraint, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy import inspect
+from sqlalchemy import inspect, event
+from sqlalchemy.orm import Session as OrmSession, object_session
 from dotenv import load_dotenv
 import bcrypt
 from datetime import datetime
@@ -85,6 +86,8 @@ class MetaUser(Base):
     celular = Column(String, nullable=False)
     # Store resume filename or identifier (e.g., returned by CV upload)
     resume_pdf = Column(String, nullable=True)
+    # Vector store id of the resume (unique, unlike the filename)
+    cv_id = Column(String, nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -94,6 +97,8 @@ class MetaUser(Base):
 # Define Job model
 class Job(Base):
     __tablename__ = "jobs"
+    # Supports newest-first keyset pagination
+    __table_args__ = (Index("ix_jobs_created_at_id", "created_at", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     title_job = Column(String, nullable=False)
@@ -106,10 +111,19 @@ class Job(Base):
     
     # Relationship with Applications
     applications = relationship("Application", back_populates="job", cascade="all, delete-orphan")
+    # Precomputed CV similarity scores for this job
+    similarities = relationship("CvJobSimilarity", back_populates="job", cascade="all, delete-orphan")
 
 # Define Application model
 class Application(Base):
     __tablename__ = "applications"
+    # Composite indexes for newest-first keyset pagination, alone or per filter
+    __table_args__ = (
+        Index("ix_applications_created_at_id", "created_at", "id"),
+        Index("ix_applications_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_applications_job_created_at_id", "job_id", "created_at", "id"),
+        Index("ix_applications_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -120,7 +134,12 @@ class Application(Base):
 
     user = relationship("User", back_populates="applications")
     job = relationship("Job", back_populates="applications")
-    stages = relationship("ApplicationStage", back_populates="application", cascade="all, delete-orphan")
+    stages = relationship(
+        "ApplicationStage",
+        back_populates="application",
+        cascade="all, delete-orphan",
+        order_by="ApplicationStage.sort_order"
+    )
 
 # Define ApplicationStage model to track timeline
 class ApplicationStage(Base):
@@ -136,6 +155,232 @@ class ApplicationStage(Base):
 
     application = relationship("Application", back_populates="stages")
 
+# Define CvJobSimilarity model: best chunk score of a resume against a job profile
+class CvJobSimilarity(Base):
+    __tablename__ = "cv_job_similarities"
+    __table_args__ = (UniqueConstraint("cv_id", "job_id", name="uq_cv_job_similarity"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Resume identifier as stored in meta_users.cv_id
+    cv_id = Column(String, nullable=False, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    score = Column(Float, nullable=False)  # cosine similarity of the best matching chunk
+    chunk_index = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    job = relationship("Job", back_populates="similarities")
+
+# Define ScoredCv model: resumes already scored against every job. A resume without
+# chunks has no cv_job_similarities rows, so this is what tells reads not to compute
+class ScoredCv(Base):
+    __tablename__ = "scored_cvs"
+
+    cv_id = Column(String, primary_key=True)
+    chunk_count = Column(Integer, nullable=False, default=0)  # 0 when the resume had nothing to score
+    scored_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Define CvIngestJob model: durable queue of uploaded CVs waiting to be indexed
+class CvIngestJob(Base):
+    __tablename__ = "cv_ingest_jobs"
+    __table_args__ = (Index("ix_cv_ingest_jobs_status_created_at", "status", "created_at"),)
+
+    id = Column(String, primary_key=True)  # uuid4, returned to the uploader
+    filename = Column(String, nullable=False)  # secure upload filename (resume identifier)
+    filepath = Column(String, nullable=False)  # where the upload waits to be processed
+    cv_id = Column(String, nullable=False)  # assigned up front, used for the Qdrant points
+    content_hash = Column(String, nullable=True, index=True)  # sha256 of the PDF, to skip re-imports
+    batch_id = Column(String, nullable=True, index=True)  # set for bulk imports
+    status = Column(String, nullable=False, default="queued")  # queued | extracting | embedding | indexing | indexed | failed
+    error = Column(String, nullable=True)
+    warning = Column(String, nullable=True)  # e.g. the PDF was truncated at MAX_PDF_PAGES
+    attempts = Column(Integer, nullable=False, default=0)
+    chunk_count = Column(Integer, nullable=True)
+    extract_ms = Column(Integer, nullable=True)
+    embed_ms = Column(Integer, nullable=True)
+    index_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Refreshed while a worker holds the job; an expired lease means the worker is gone
+    heartbeat_at = Column(DateTime, nullable=True)
+
+# Define CvImportBatch model: one bulk CV import (its files are cv_ingest_jobs rows)
+class CvImportBatch(Base):
+    __tablename__ = "cv_import_batches"
+
+    id = Column(String, primary_key=True)  # uuid4, returned to the admin
+    source = Column(String, nullable=False)  # archive name or folder
+    status = Column(String, nullable=False, default="scanning")  # scanning | running | finished | failed
+    error = Column(String, nullable=True)
+    files = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+# Define RescoreRun model: a re-score run started from the admin API, with its progress
+class RescoreRun(Base):
+    __tablename__ = "rescore_runs"
+
+    id = Column(String, primary_key=True)  # uuid4, returned to the admin
+    job_ids = Column(String, nullable=True)  # comma separated; NULL re-scores every job
+    status = Column(String, nullable=False, default="running")  # running | finished | failed
+    error = Column(String, nullable=True)
+    applications = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    preselected = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    skipped_manual = Column(Integer, nullable=False, default=0)
+    unscored = Column(Integer, nullable=False, default=0)
+    score_rows = Column(Integer, nullable=False, default=0)
+    score_seconds = Column(Float, nullable=False, default=0.0)
+    elapsed_seconds = Column(Float, nullable=False, default=0.0)
+    applications_per_second = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+# Define MetricCounter model: dashboard counters kept up to date on every write
+class MetricCounter(Base):
+    __tablename__ = "metric_counters"
+
+    # totals (users/jobs/applications) | status | job | day | result | preselection
+    metric = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)  # e.g. "rejected", a job id or "2024-05-31"
+    value = Column(Integer, nullable=False, default=0)
+
+# Define MetricPlot model: latest PNG rendering of each admin metric plot
+class MetricPlot(Base):
+    __tablename__ = "metric_plots"
+
+    kind = Column(String, primary_key=True)  # by_status_bar | per_job_bar | result_outcome_pie | time_series_daily
+    version = Column(String, nullable=False)  # fingerprint of the data the image was drawn from
+    png = Column(LargeBinary, nullable=False)
+    rendered_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Define CollectionVersion model: write counter of a vector store collection,
+# shared by every process so search result caches see each other's writes
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+
+    name = Column(String, primary_key=True)  # e.g. "cv_collection"
+    version = Column(Integer, nullable=False, default=0)
+
+_VERSION_BUMP = text(
+    "INSERT INTO collection_versions (name, version) VALUES (:name, 1)"
+    " ON CONFLICT (name) DO UPDATE SET version = collection_versions.version + 1"
+)
+
+def bump_collection_version(name: str):
+    """Record a write to a vector store collection"""
+    with engine.begin() as connection:
+        connection.execute(_VERSION_BUMP, {"name": name})
+
+def get_collection_version(name: str) -> int:
+    """Number of writes recorded for a vector store collection"""
+    with engine.connect() as connection:
+        version = connection.execute(
+            text("SELECT version FROM collection_versions WHERE name = :name"), {"name": name}
+        ).scalar()
+    return version or 0
+
+# Incremental maintenance of metric_counters. Mapper events collect +1/-1 deltas
+# for every inserted, updated or deleted row (including cascaded deletes) and the
+# session writes them with one upsert at the end of the flush, so counters commit
+# or roll back together with the rows they count. Bulk writes (bulk_*_mappings,
+# query.update/delete) bypass these events and must call record_metric_deltas.
+_METRIC_DELTAS_KEY = "metric_deltas"
+
+_COUNTER_UPSERT = text(
+    "INSERT INTO metric_counters (metric, key, value) VALUES (:metric, :key, :delta)"
+    " ON CONFLICT (metric, key) DO UPDATE SET value = metric_counters.value + excluded.value"
+)
+
+def metric_keys(target, values) -> list:
+    """(metric, key) counters a row contributes to, given its column values"""
+    if isinstance(target, User):
+        return [("totals", "users")]
+    if isinstance(target, Job):
+        return [("totals", "jobs")]
+    if isinstance(target, Application):
+        created_at = values.get("created_at") or datetime.utcnow()
+        return [
+            ("totals", "applications"),
+            ("status", values.get("status") or "pending"),
+            ("job", str(values.get("job_id"))),
+            ("day", created_at.date().isoformat()),
+        ]
+    if isinstance(target, ApplicationStage) and values.get("name") in ("result", "preselection"):
+        return [(values["name"], values.get("status") or "pending")]
+    return []
+
+_METRIC_COLUMNS = ("status", "job_id", "created_at", "name")
+
+def _column_values(target, previous: bool = False) -> dict:
+    """Current column values of a row, or the values before this flush's changes"""
+    state = inspect(target)
+    values = {}
+    for column in _METRIC_COLUMNS:
+        if column not in state.mapper.column_attrs:
+            continue
+        value = getattr(target, column)
+        if previous:
+            history = state.attrs[column].history
+            if history.deleted:
+                value = history.deleted[0]
+        values[column] = value
+    return values
+
+def _add_deltas(target, keys, sign: int):
+    session = object_session(target)
+    if session is None or not keys:
+        return
+    deltas = session.info.setdefault(_METRIC_DELTAS_KEY, {})
+    for key in keys:
+        deltas[key] = deltas.get(key, 0) + sign
+
+def _counted_after_insert(mapper, connection, target):
+    _add_deltas(target, metric_keys(target, _column_values(target)), 1)
+
+def _counted_after_update(mapper, connection, target):
+    before = metric_keys(target, _column_values(target, previous=True))
+    after = metric_keys(target, _column_values(target))
+    if before != after:
+        _add_deltas(target, before, -1)
+        _add_deltas(target, after, 1)
+
+def _counted_after_delete(mapper, connection, target):
+    _add_deltas(target, metric_keys(target, _column_values(target, previous=True)), -1)
+
+for _model in (User, Job, Application, ApplicationStage):
+    event.listen(_model, "after_insert", _counted_after_insert)
+    event.listen(_model, "after_update", _counted_after_update)
+    event.listen(_model, "after_delete", _counted_after_delete)
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# active_history loads the old value of an expired attribute before it is
+# overwritten, so updates after a commit still know which counter to decrement
+for _attribute in (Application.status, Application.job_id, ApplicationStage.status, ApplicationStage.name):
+    event.listen(_attribute, "set", _keep_previous_value, active_history=True, retval=True)
+
+def record_metric_deltas(session, deltas: dict):
+    """Add {(metric, key): delta} to the counters inside the session's transaction"""
+    rows = [{"metric": metric, "key": key, "delta": delta} for (metric, key), delta in deltas.items() if delta]
+    if rows:
+        session.connection().execute(_COUNTER_UPSERT, rows)
+
+@event.listens_for(OrmSession, "after_flush")
+def _write_metric_deltas(session, flush_context):
+    deltas = session.info.pop(_METRIC_DELTAS_KEY, None)
+    if deltas:
+        record_metric_deltas(session, deltas)
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_metric_deltas(session):
+    session.info.pop(_METRIC_DELTAS_KEY, None)
+
 def create_tables():
     """Create all tables in the database"""
     Base.metadata.create_all(bind=engine)
@@ -156,6 +401,26 @@ def create_tables():
     except Exception as e:
         print(f"⚠️ Could not verify/add resume_pdf column: {e}")
 
+    # Lightweight migration: ensure cv_id column exists in meta_users and fill it
+    # for profiles whose upload went through the ingest queue
+    try:
+        inspector = inspect(engine)
+        column_names = {col["name"] for col in inspector.get_columns("meta_users")}
+        if "cv_id" not in column_names:
+            with engine.begin() as connection:
+                connection.execute(text("ALTER TABLE meta_users ADD COLUMN cv_id VARCHAR NULL"))
+            print("✅ Added missing column cv_id to meta_users")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "UPDATE meta_users SET cv_id = ("
+                " SELECT cv_ingest_jobs.cv_id FROM cv_ingest_jobs"
+                " WHERE cv_ingest_jobs.filename = meta_users.resume_pdf AND cv_ingest_jobs.status = 'indexed'"
+                " ORDER BY cv_ingest_jobs.created_at DESC LIMIT 1"
+                ") WHERE cv_id IS NULL AND resume_pdf IS NOT NULL"
+            ))
+    except Exception as e:
+        print(f"⚠️ Could not verify/add cv_id column: {e}")
+
     # Lightweight migration: ensure posted_date column exists in jobs
     try:
         inspector = inspect(engine)
@@ -177,6 +442,22 @@ def create_tables():
     except Exception as e:
         print(f"⚠️ Could not verify/add posted_date column: {e}")
 
+    # Counters start from the current rows the first time metric_counters exists
+    try:
+        from auth.metrics_rollup import rebuild_if_empty
+        rebuild_if_empty()
+    except Exception as e:
+        print(f"⚠️ Could not initialize metric counters: {e}")
+
+    # Lightweight migration: create_all only adds indexes for new tables, so
+    # make sure the indexes declared on existing tables are there as well
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                print(f"⚠️ Could not verify/create index {index.name}: {e}")
+
     # No-destructive check: ensure new tables exist (already done by create_all above)
 
 def create_admin_user():
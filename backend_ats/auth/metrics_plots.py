@@ -0,0 +1,270 @@
+import os
+import io
+import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from io import BytesIO
+from typing import Any, Dict, Iterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import from auth module when run as a command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.create_db import engine, MetricPlot
+from auth import metrics_rollup
+from auth.metrics_timeseries import DEFAULT_BUCKETS
+
+# Load environment variables
+load_dotenv()
+
+PLOT_KINDS = ("by_status_bar", "per_job_bar", "result_outcome_pie", "time_series_daily")
+# "inline": a background thread of the API process re-renders changed plots; "worker": only
+# the render worker (python -m auth.metrics_plots) draws them and the API never imports matplotlib
+PLOT_RENDER_MODE = os.getenv("PLOT_RENDER_MODE", "inline").lower()
+# How often the render worker checks the counters
+PLOT_RENDER_INTERVAL_SECONDS = float(os.getenv("PLOT_RENDER_INTERVAL_SECONDS", "10"))
+
+# Column names of the CSV export, per kind
+SERIES_COLUMNS = {
+    "by_status_bar": ("status", "applications"),
+    "per_job_bar": ("job", "applications"),
+    "result_outcome_pie": ("outcome", "applications"),
+    "time_series_daily": ("day", "applications"),
+}
+
+Session = sessionmaker(bind=engine)
+
+# pyplot keeps global state, so renderings never run concurrently
+_render_lock = threading.Lock()
+
+# Inline mode: plots waiting for the in-process renderer thread
+_pending_kinds = set()
+_pending_changed = threading.Condition()
+_renderer_thread: Optional[threading.Thread] = None
+
+def plot_data(session, kind: str) -> Dict[str, Any]:
+    """The numbers a plot shows, read from the metric counters"""
+    if kind == "by_status_bar":
+        counts = metrics_rollup.status_counts(metrics_rollup.read_counters(session, "status"))
+        return {"labels": list(counts.keys()), "values": list(counts.values())}
+    if kind == "per_job_bar":
+        rows = sorted(
+            metrics_rollup.applications_per_job(session, metrics_rollup.read_counters(session, "job")),
+            key=lambda row: (-row["applications"], row["title_job"])
+        )
+        return {"labels": [row["title_job"] for row in rows], "values": [row["applications"] for row in rows]}
+    if kind == "result_outcome_pie":
+        breakdown = metrics_rollup.result_breakdown(metrics_rollup.read_counters(session, "result", "preselection"))
+        return {
+            "labels": ["Aceptados", "Rechazados en proceso", "Rechazados en preselección"],
+            "values": [breakdown["accepted"], breakdown["rejected_process"], breakdown["rejected_preselection"]],
+        }
+    if kind == "time_series_daily":
+        # Last DEFAULT_BUCKETS["day"] days from the per-day counters, including the ones without applications
+        days = metrics_rollup.daily_counts(session, DEFAULT_BUCKETS["day"])
+        return {"labels": list(days.keys()), "values": list(days.values())}
+    raise ValueError("Unknown plot kind")
+
+def data_version(kind: str, data: Dict[str, Any]) -> str:
+    """Fingerprint of a plot's data; used as the cache key and the ETag"""
+    payload = json.dumps([kind, data], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+def render_png(kind: str, data: Dict[str, Any]) -> bytes:
+    """Draw one plot with matplotlib and return the PNG bytes"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Patch
+
+    labels, values = data["labels"], data["values"]
+    buf = BytesIO()
+    try:
+        if kind == 'by_status_bar':
+            fig, ax = plt.subplots(figsize=(8, 4))
+            ax.bar(labels, values, color='#00d6ab')
+            ax.set_ylabel('Postulaciones')
+            ax.set_title('Postulaciones por estado')
+            fig.tight_layout()
+        elif kind == 'per_job_bar':
+            if not labels:
+                fig, ax = plt.subplots(figsize=(5, 3.5))
+                ax.text(0.5, 0.5, 'Sin datos', ha='center', va='center', fontsize=12)
+                ax.axis('off')
+            else:
+                height = max(4, 0.5 * len(labels))
+                fig, ax = plt.subplots(figsize=(10, height))
+                y_pos = list(range(len(labels)))
+                ax.barh(y_pos, values, color='#00b9cd')
+                ax.set_yticks(y_pos)
+                ax.set_yticklabels(labels, fontsize=9)
+                ax.invert_yaxis()  # mantiene el primer elemento arriba
+                ax.set_xlabel('Postulaciones')
+                ax.set_title('Postulaciones por vacante')
+                fig.tight_layout()
+        elif kind == 'result_outcome_pie':
+            colors = ['#00d6ab', '#ef476f', '#ffd166']
+            fig, ax = plt.subplots(figsize=(7, 5))
+            if sum(values) == 0:
+                ax.text(0.5, 0.5, 'Sin datos', ha='center', va='center', fontsize=12)
+                ax.axis('off')
+            else:
+                def autopct(pct):
+                    return f"{pct:.1f}%" if pct > 0 else ''
+
+                wedges, _, autotexts = ax.pie(
+                    values,
+                    colors=colors,
+                    autopct=autopct,
+                    startangle=90,
+                    pctdistance=0.7,
+                    textprops={'color': '#1f1f1f', 'fontsize': 10}
+                )
+                for autotext in autotexts:
+                    autotext.set_fontweight('bold')
+
+                legend_labels = [f"{label} ({value})" for label, value in zip(labels, values)]
+                legend_handles = [Patch(facecolor=color, edgecolor='none') for color in colors]
+                ax.legend(
+                    legend_handles,
+                    legend_labels,
+                    loc='center left',
+                    bbox_to_anchor=(1.05, 0.5),
+                    frameon=False,
+                    borderaxespad=0,
+                    fontsize=10
+                )
+                ax.axis('equal')
+            fig.tight_layout()
+        elif kind == 'time_series_daily':
+            positions = list(range(len(labels)))
+            fig, ax = plt.subplots(figsize=(8, 4))
+            ax.plot(positions, values, color='#00d6ab', marker='o')
+            ax.set_xticks(positions)
+            ax.set_xticklabels(labels, rotation=45, ha='right')
+            ax.set_ylabel('Postulaciones')
+            ax.set_title('Postulaciones por día')
+            fig.tight_layout()
+        else:
+            raise ValueError("Unknown plot kind")
+        fig.savefig(buf, format='png', dpi=150)
+    finally:
+        plt.close('all')
+    return buf.getvalue()
+
+def series_payload(kind: str, data: Dict[str, Any], version: str) -> Dict[str, Any]:
+    """Compact JSON body for client-side charting"""
+    return {"kind": kind, "version": version, "labels": data["labels"], "values": data["values"]}
+
+def series_csv(kind: str, data: Dict[str, Any]) -> Iterator[str]:
+    """Stream a plot's data as CSV, one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in [SERIES_COLUMNS[kind]] + list(zip(data["labels"], data["values"])):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+def stored_plot(session, kind: str) -> Optional[MetricPlot]:
+    """Latest rendering of a plot, whatever data version it was drawn from"""
+    return session.query(MetricPlot).filter(MetricPlot.kind == kind).first()
+
+def _render_and_store(session, kind: str, data: Dict[str, Any], version: str) -> bytes:
+    # Concurrent renderers of the same plot wait and then find it stored
+    with _render_lock:
+        plot = stored_plot(session, kind)
+        if plot is not None and plot.version == version:
+            return plot.png
+        png = render_png(kind, data)
+        session.merge(MetricPlot(kind=kind, version=version, png=png))
+        session.commit()
+        return png
+
+def _render_pending():
+    """Inline mode renderer thread: draw the scheduled plots from their latest data"""
+    while True:
+        with _pending_changed:
+            while not _pending_kinds:
+                _pending_changed.wait()
+            kinds = sorted(_pending_kinds)
+            _pending_kinds.clear()
+        session = Session()
+        try:
+            for kind in kinds:
+                data = plot_data(session, kind)
+                _render_and_store(session, kind, data, data_version(kind, data))
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Plot rendering failed: {e}")
+        finally:
+            session.close()
+
+def schedule_render(kind: str):
+    """Queue a plot for the in-process renderer thread, starting it on first use"""
+    global _renderer_thread
+    with _pending_changed:
+        _pending_kinds.add(kind)
+        if _renderer_thread is None or not _renderer_thread.is_alive():
+            _renderer_thread = threading.Thread(target=_render_pending, name="plot-renderer", daemon=True)
+            _renderer_thread.start()
+        _pending_changed.notify()
+
+def get_png(session, kind: str, data: Dict[str, Any], version: str) -> Optional[MetricPlot]:
+    """Rendering of a plot for the API; never draws on the request thread.
+
+    Returns the stored image when it matches `version`. Otherwise it returns
+    the previous image (still labelled with its own version), or None, until
+    the plot is re-rendered: by the in-process renderer thread in inline mode,
+    which is scheduled here, or by the render worker in worker mode.
+    """
+    plot = stored_plot(session, kind)
+    if plot is not None and plot.version == version:
+        return plot
+    if PLOT_RENDER_MODE == "inline":
+        schedule_render(kind)
+    return plot
+
+def refresh_all(session) -> int:
+    """Re-render the plots whose data changed since their last rendering"""
+    rendered = 0
+    for kind in PLOT_KINDS:
+        data = plot_data(session, kind)
+        version = data_version(kind, data)
+        plot = stored_plot(session, kind)
+        if plot is None or plot.version != version:
+            _render_and_store(session, kind, data, version)
+            rendered += 1
+    return rendered
+
+def run_worker(interval: float = PLOT_RENDER_INTERVAL_SECONDS, once: bool = False):
+    """Render worker: keep metric_plots in step with the counters"""
+    print(f"ℹ️ Plot render worker started (every {interval:g}s)")
+    while True:
+        session = Session()
+        try:
+            started = time.perf_counter()
+            rendered = refresh_all(session)
+            if rendered:
+                print(f"✅ Rendered {rendered} plots in {round(time.perf_counter() - started, 2)}s")
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Plot rendering failed: {e}")
+        finally:
+            session.close()
+        if once:
+            return
+        time.sleep(interval)
+
+# Run the render worker as a command: python -m auth.metrics_plots [--once]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the admin metric plots whenever their data changes")
+    parser.add_argument("--interval", type=float, default=PLOT_RENDER_INTERVAL_SECONDS, help="Seconds between checks")
+    parser.add_argument("--once", action="store_true", help="Render what changed and exit")
+    args = parser.parse_args()
+    run_worker(args.interval, once=args.once)
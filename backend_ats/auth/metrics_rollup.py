@@ -0,0 +1,141 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import from auth module when run as a command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.create_db import engine, User, Job, Application, ApplicationStage, MetricCounter
+
+STATUS_ORDER = ['pending', 'in_progress', 'scheduled', 'completed', 'rejected', 'accepted']
+
+Session = sessionmaker(bind=engine)
+
+def read_counters(session, *metrics: str) -> Dict[str, Dict[str, int]]:
+    """Return {metric: {key: value}} for the given metrics (all when none given)"""
+    query = session.query(MetricCounter.metric, MetricCounter.key, MetricCounter.value)
+    if metrics:
+        query = query.filter(MetricCounter.metric.in_(metrics))
+    counters: Dict[str, Dict[str, int]] = {metric: {} for metric in metrics}
+    for metric, key, value in query.all():
+        counters.setdefault(metric, {})[key] = int(value or 0)
+    return counters
+
+def daily_counts(session, days: int) -> Dict[str, int]:
+    """Applications per day ({"YYYY-MM-DD": count}) over the last `days` days,
+    read from the ("day", date) counters; days without applications are 0"""
+    last = datetime.utcnow().date()
+    period = [(last - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+    rows = session.query(MetricCounter.key, MetricCounter.value).filter(
+        MetricCounter.metric == "day", MetricCounter.key >= period[0], MetricCounter.key <= period[-1]
+    ).all()
+    values = {key: int(value or 0) for key, value in rows}
+    return {day: values.get(day, 0) for day in period}
+
+def status_counts(counters: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    """Applications per status, in dashboard order"""
+    status = counters.get("status", {})
+    return {name: status.get(name, 0) for name in STATUS_ORDER}
+
+def result_breakdown(counters: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    """Outcome of the result stage, splitting preselection rejections from later ones"""
+    result = counters.get("result", {})
+    accepted = result.get("completed", 0) + result.get("accepted", 0)
+    rejected_total = result.get("rejected", 0)
+    rejected_preselection = counters.get("preselection", {}).get("rejected", 0)
+    total = sum(result.values())
+    return {
+        "accepted": accepted,
+        "rejected_process": max(0, rejected_total - rejected_preselection),
+        "rejected_preselection": rejected_preselection,
+        "pending": max(0, total - accepted - rejected_total),
+    }
+
+def applications_per_job(session, counters: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Every job with its application count (jobs without applications count 0)"""
+    per_job = counters.get("job", {})
+    return [
+        {"job_id": job_id, "title_job": title_job, "applications": per_job.get(str(job_id), 0)}
+        for job_id, title_job in session.query(Job.id, Job.title_job).order_by(Job.id).all()
+    ]
+
+def get_summary(session) -> Dict[str, Any]:
+    """Dashboard summary read from the counters (one small query plus the job titles)"""
+    counters = read_counters(session, "totals", "status", "job", "result", "preselection")
+    totals = counters["totals"]
+    return {
+        "totals": {
+            "users": totals.get("users", 0),
+            "jobs": totals.get("jobs", 0),
+            "applications": totals.get("applications", 0),
+        },
+        "applications_by_status": status_counts(counters),
+        "applications_per_job": applications_per_job(session, counters),
+        "result_breakdown": result_breakdown(counters),
+    }
+
+def _aggregate_counters(session) -> Dict[tuple, int]:
+    """Recount every metric from the source tables"""
+    counts: Dict[tuple, int] = {
+        ("totals", "users"): session.query(func.count(User.id)).scalar() or 0,
+        ("totals", "jobs"): session.query(func.count(Job.id)).scalar() or 0,
+        ("totals", "applications"): session.query(func.count(Application.id)).scalar() or 0,
+    }
+    status_field = func.coalesce(Application.status, 'pending')
+    for status, total in session.query(status_field, func.count(Application.id)).group_by(status_field).all():
+        counts[("status", status)] = total
+    for job_id, total in session.query(Application.job_id, func.count(Application.id)).group_by(Application.job_id).all():
+        counts[("job", str(job_id))] = total
+    day_field = func.date(Application.created_at)
+    for day, total in session.query(day_field, func.count(Application.id)).group_by(day_field).all():
+        if day is not None:
+            counts[("day", str(day)[:10])] = total
+    stage_status = func.coalesce(ApplicationStage.status, 'pending')
+    stage_rows = (
+        session.query(ApplicationStage.name, stage_status, func.count(ApplicationStage.id))
+        .filter(ApplicationStage.name.in_(("result", "preselection")))
+        .group_by(ApplicationStage.name, stage_status)
+        .all()
+    )
+    for name, status, total in stage_rows:
+        counts[(name, status)] = total
+    return {key: int(value) for key, value in counts.items() if value}
+
+def rebuild() -> Dict[str, int]:
+    """Replace all counters with a fresh count, in one transaction"""
+    session = Session()
+    try:
+        counts = _aggregate_counters(session)
+        session.query(MetricCounter).delete(synchronize_session=False)
+        session.bulk_insert_mappings(MetricCounter, [
+            {"metric": metric, "key": key, "value": value} for (metric, key), value in counts.items()
+        ])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    summary = {"counters": len(counts)}
+    print(f"✅ Metric counters rebuilt: {summary}")
+    return summary
+
+def rebuild_if_empty():
+    """Seed the counters from existing rows when the table has just been created"""
+    session = Session()
+    try:
+        if session.query(MetricCounter.metric).first() is not None:
+            return
+    finally:
+        session.close()
+    rebuild()
+
+# Rebuild when run as a command: python -m auth.metrics_rollup
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recount the admin dashboard metrics from the source tables")
+    parser.parse_args()
+    rebuild()
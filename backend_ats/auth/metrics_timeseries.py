@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func
+
+from auth.create_db import Application
+
+GRANULARITIES = ("day", "week", "month")
+# Default window when no start date is given, per granularity
+DEFAULT_BUCKETS = {"day": 30, "week": 12, "month": 12}
+MAX_BUCKETS = 1000
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the bucket containing `day` (weeks start on Monday, like date_trunc)"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+def _bucket_expression(dialect: str, granularity: str):
+    """SQL expression truncating Application.created_at to its bucket"""
+    if dialect == "postgresql":
+        return func.date_trunc(granularity, Application.created_at)
+    if dialect == "sqlite":
+        if granularity == "week":
+            # Back to the Monday of the week (a Monday stays where it is)
+            return func.date(Application.created_at, "-6 days", "weekday 1")
+        if granularity == "month":
+            return func.strftime("%Y-%m-01", Application.created_at)
+        return func.date(Application.created_at)
+    raise ValueError(f"Time series are not supported on {dialect}")
+
+def _parse_day(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+
+def application_time_series(session, granularity: str = "day", start: Optional[str] = None,
+                            end: Optional[str] = None) -> Dict[str, Any]:
+    """Applications created per day, week or month between two dates, gaps filled with 0.
+
+    Counting happens in the database (one GROUP BY over the created_at range,
+    served by the created_at index), so the cost depends on the range, not on
+    the number of applications ever created. The range is widened to whole
+    buckets.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    end_day = _parse_day(end, "to") or datetime.utcnow().date()
+    start_day = _parse_day(start, "from")
+    if start_day is None:
+        start_day = bucket_start(end_day, granularity)
+        for _ in range(DEFAULT_BUCKETS[granularity] - 1):
+            start_day = bucket_start(start_day - timedelta(days=1), granularity)
+    if start_day > end_day:
+        raise ValueError("from must not be after to")
+
+    buckets: List[date] = []
+    current = bucket_start(start_day, granularity)
+    while current <= end_day:
+        buckets.append(current)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f"The range spans more than {MAX_BUCKETS} {granularity}s; use a coarser granularity")
+        current = next_bucket(current, granularity)
+
+    bucket = _bucket_expression(session.get_bind().dialect.name, granularity)
+    rows = (
+        session.query(bucket.label("bucket"), func.count(Application.id))
+        .filter(
+            Application.created_at >= datetime.combine(buckets[0], datetime.min.time()),
+            Application.created_at < datetime.combine(current, datetime.min.time())
+        )
+        .group_by(bucket)
+        .all()
+    )
+    counts = {str(value)[:10]: int(total) for value, total in rows if value is not None}
+    points = [{"period": day.isoformat(), "applications": counts.get(day.isoformat(), 0)} for day in buckets]
+    return {
+        "granularity": granularity,
+        "from": buckets[0].isoformat(),
+        "to": (current - timedelta(days=1)).isoformat(),
+        "total": sum(point["applications"] for point in points),
+        "points": points,
+    }
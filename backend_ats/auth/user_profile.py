@@ -19,7 +19,8 @@ load_dotenv()
 # Create session
 Session = sessionmaker(bind=engine)
 
-def save_user_profile(user_id: int, fullname: str, celular: str, resume_pdf: Optional[str] = None):
+def save_user_profile(user_id: int, fullname: str, celular: str, resume_pdf: Optional[str] = None,
+                      cv_id: Optional[str] = None):
     """Save or update user profile information in meta_users table"""
     session = Session()
     
@@ -36,8 +37,14 @@ def save_user_profile(user_id: int, fullname: str, celular: str, resume_pdf: Opt
             # Update existing profile
             existing_profile.fullname = fullname
             existing_profile.celular = celular
+            if cv_id is not None:
+                existing_profile.cv_id = cv_id
+            elif resume_pdf is not None and resume_pdf != existing_profile.resume_pdf:
+                # A different resume without a known vector store id
+                existing_profile.cv_id = None
             if resume_pdf is not None:
                 existing_profile.resume_pdf = resume_pdf
+            cv_id = existing_profile.cv_id
             existing_profile.updated_at = datetime.utcnow()
             message = "Profile updated successfully"
         else:
@@ -46,7 +53,8 @@ def save_user_profile(user_id: int, fullname: str, celular: str, resume_pdf: Opt
                 user_id=user_id,
                 fullname=fullname,
                 celular=celular,
-                resume_pdf=resume_pdf
+                resume_pdf=resume_pdf,
+                cv_id=cv_id
             )
             session.add(new_profile)
             message = "Profile created successfully"
@@ -60,7 +68,8 @@ def save_user_profile(user_id: int, fullname: str, celular: str, resume_pdf: Opt
                 "user_id": user_id,
                 "fullname": fullname,
                 "celular": celular,
-                "resume_pdf": resume_pdf
+                "resume_pdf": resume_pdf,
+                "cv_id": cv_id
             }
         }
     
@@ -98,7 +107,8 @@ def get_user_profile(user_id: int):
                 "user_id": profile.user_id,
                 "fullname": profile.fullname,
                 "celular": profile.celular,
-                "resume_pdf": getattr(profile, "resume_pdf", None)
+                "resume_pdf": getattr(profile, "resume_pdf", None),
+                "cv_id": getattr(profile, "cv_id", None)
             }
         }
     
@@ -116,6 +126,7 @@ def handle_profile_request(request_data):
         fullname = data.get("fullname")
         celular = data.get("celular")
         resume_pdf = data.get("resume_pdf")
+        cv_id = data.get("cv_id")
         
         # Validate required fields
         if not all([user_id, fullname, celular]):
@@ -124,7 +135,7 @@ def handle_profile_request(request_data):
                 "message": "All fields are required: user_id, fullname, celular"
             })
         
-        result = save_user_profile(user_id, fullname, celular, resume_pdf)
+        result = save_user_profile(user_id, fullname, celular, resume_pdf, cv_id)
         return json.dumps(result)
     
     except Exception as e:
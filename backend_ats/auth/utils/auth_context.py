@@ -0,0 +1,55 @@
+import os
+import sys
+from functools import wraps
+from typing import Optional
+from flask import g, jsonify, request
+
+# Add parent directory to path to import from auth module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from auth.create_db import User
+from auth.utils.token_validator import validate_auth_header
+
+def _authenticate(admin: bool):
+    """Verify the request's bearer token; returns an error response or None"""
+    auth_result = validate_auth_header(request.headers.get('Authorization'))
+    if not auth_result.get('valid'):
+        return jsonify({"error": auth_result.get('message', 'Unauthorized')}), 401
+    claims = auth_result['payload']
+    if admin and not claims.get('is_admin'):
+        return jsonify({"error": "Forbidden"}), 403
+    g.auth_claims = claims
+    g.user_id = claims.get('uid')
+    return None
+
+def require_auth(view):
+    """Route decorator: 401 unless the request carries a valid token.
+    The claims are available as g.auth_claims for the rest of the request.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        error = _authenticate(admin=False)
+        if error is not None:
+            return error
+        return view(*args, **kwargs)
+    return wrapper
+
+def require_admin(view):
+    """Route decorator: like require_auth, and 403 unless the token is an admin's"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        error = _authenticate(admin=True)
+        if error is not None:
+            return error
+        return view(*args, **kwargs)
+    return wrapper
+
+def current_user_id(session) -> Optional[int]:
+    """id of the authenticated user, from the uid claim.
+
+    Tokens issued before the claim existed are resolved by email, once per request.
+    """
+    if g.get('user_id') is None:
+        row = session.query(User.id).filter(User.email == g.auth_claims.get('sub')).first()
+        g.user_id = row.id if row else None
+    return g.user_id
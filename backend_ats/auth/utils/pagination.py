@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# Page size limits for keyset-paginated listings
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at, row_id):
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def parse_datetime_arg(args, name):
+    """Parse an optional ISO date/datetime query argument; raises ValueError if malformed"""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime")
+
+def parse_page_args(args):
+    """Return (limit, cursor) from query arguments.
+
+    Pagination is opt-in: without `limit` or `cursor` the whole listing is
+    returned (limit None), as older clients expect.
+    """
+    limit = args.get("limit")
+    cursor = args.get("cursor")
+    if limit is None and cursor is None:
+        return None, None
+    try:
+        limit = int(limit) if limit is not None else MAX_PAGE_SIZE
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+def apply_created_range(query, model, args):
+    """Filter a query on model.created_at using created_from / created_to arguments"""
+    created_from = parse_datetime_arg(args, "created_from")
+    created_to = parse_datetime_arg(args, "created_to")
+    if created_from is not None:
+        query = query.filter(model.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(model.created_at <= created_to)
+    return query
+
+def apply_keyset_page(query, model, limit, cursor):
+    """Order newest first by (created_at, id) and seek past the cursor.
+
+    Fetches one extra row so the caller can tell whether another page exists.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor is not None:
+        created_at, row_id = cursor
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+def split_page(rows, limit):
+    """Trim the extra row fetched by apply_keyset_page and compute the next cursor"""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
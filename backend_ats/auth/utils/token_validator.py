@@ -1,7 +1,9 @@
 import os
 import sys
 import jwt
-from datetime import datetime
+import time
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 # Add parent directory to path to import from auth module
@@ -12,16 +14,46 @@ load_dotenv()
 
 # Get JWT secret key from environment or use default
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default_secret_key")
+# Decoded claims of recently seen tokens, kept until each token expires
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+_claims_cache = OrderedDict()  # token -> payload
+_claims_lock = threading.Lock()
+
+def _cached_claims(token):
+    with _claims_lock:
+        payload = _claims_cache.get(token)
+        if payload is None:
+            return None
+        if "exp" in payload and time.time() >= payload["exp"]:
+            del _claims_cache[token]
+            return None
+        _claims_cache.move_to_end(token)
+        return payload
+
+def _cache_claims(token, payload):
+    if TOKEN_CACHE_SIZE <= 0:
+        return
+    with _claims_lock:
+        _claims_cache[token] = payload
+        _claims_cache.move_to_end(token)
+        while len(_claims_cache) > TOKEN_CACHE_SIZE:
+            _claims_cache.popitem(last=False)
 
 def decode_token(token):
-    """Decode and validate a JWT token"""
+    """Decode and validate a JWT token.
+
+    The signature and expiry are verified once; the claims are then served
+    from a bounded LRU until the token's exp, so repeated requests with the
+    same token skip the HMAC check.
+    """
+    payload = _cached_claims(token)
+    if payload is not None:
+        return {"valid": True, "payload": payload}
     try:
+        # jwt.decode rejects expired tokens itself (ExpiredSignatureError)
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        
-        # Check if token has expired
-        if "exp" in payload and datetime.utcnow().timestamp() > payload["exp"]:
-            return {"valid": False, "message": "Token has expired"}
-        
+        _cache_claims(token, payload)
         return {"valid": True, "payload": payload}
     
     except jwt.ExpiredSignatureError:
@@ -44,6 +76,7 @@ def get_user_from_token(token):
     
     # Extract user information from payload
     user_info = {
+        "id": payload.get("uid"),
         "email": payload.get("sub"),
         "name": payload.get("name"),
         "is_admin": payload.get("is_admin", False)
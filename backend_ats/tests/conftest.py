@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+# Tests run against throwaway local state: a SQLite database, the in-process
+# vector store, no embedding cache, no ingest workers and a dummy OpenAI key
+# (tests that need the API start a stub server)
+_TMP_DIR = tempfile.mkdtemp(prefix="ats_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP_DIR, 'ats.sqlite3')}")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("EMBEDDING_PROVIDER", "openai")
+os.environ["EMBEDDING_CACHE_ENABLED"] = "0"
+os.environ.setdefault("CV_UPLOAD_FOLDER", os.path.join(_TMP_DIR, "uploads"))
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
+os.environ.setdefault("VECTOR_STORE_PATH", os.path.join(_TMP_DIR, "vectors"))
+os.environ.setdefault("CV_INGEST_WORKERS", "0")
+
+# Import the backend packages (architecture, auth) from backend_ats
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,103 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from auth.SignIn import create_access_token
+from auth.create_db import engine, User, MetaUser, Job, Application, ApplicationStage, CvJobSimilarity
+
+MANY = 25
+STAGES = ("application", "preselection", "interview", "test", "result")
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements the engine executes inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _token(user):
+    return create_access_token({"sub": user.email, "uid": user.id, "name": user.name, "is_admin": user.is_admin})
+
+def _add_candidate(session, name, status, count):
+    """A candidate with a scored resume and `count` applications (each to its own job)"""
+    candidate = User(name=name, email=f"{name}@queries.test", identity_document=f"Q-{name}")
+    session.add(candidate)
+    session.flush()
+    session.add(MetaUser(user_id=candidate.id, fullname=name, celular="1", resume_pdf=f"{name}.pdf", cv_id=f"cv-{name}"))
+    started = datetime.utcnow() - timedelta(days=1)
+    for i in range(count):
+        job = Job(title_job=f"{name} job {i}", description="desc", perfil_ideal="python sql")
+        session.add(job)
+        session.flush()
+        session.add(CvJobSimilarity(cv_id=f"cv-{name}", job_id=job.id, score=0.9))
+        application = Application(user_id=candidate.id, job_id=job.id, status=status,
+                                  created_at=started + timedelta(minutes=i))
+        session.add(application)
+        session.flush()
+        session.add_all([
+            ApplicationStage(application_id=application.id, name=stage, status="pending", sort_order=order)
+            for order, stage in enumerate(STAGES, start=1)
+        ])
+    return candidate
+
+@pytest.fixture(scope="module")
+def client():
+    app = create_app()
+    app.testing = True
+    # Let the startup cv_id backfill finish so its queries are not counted
+    for thread in threading.enumerate():
+        if thread.name == "cv-id-backfill":
+            thread.join()
+    return app.test_client()
+
+@pytest.fixture(scope="module")
+def tokens(client):
+    """Tokens of an admin, a candidate with one application and one with MANY.
+
+    The two candidates' applications have different statuses, so the admin
+    listing can be narrowed to either set with ?status=.
+    """
+    session = sessionmaker(bind=engine)()
+    try:
+        admin = User(name="admin", email="admin@queries.test", identity_document="Q-admin", is_admin=True)
+        session.add(admin)
+        one = _add_candidate(session, "one", "scheduled", 1)
+        many = _add_candidate(session, "many", "accepted", MANY)
+        session.commit()
+        return {"admin": _token(admin), 1: _token(one), MANY: _token(many)}
+    finally:
+        session.close()
+
+def _get(client, url, token):
+    with count_queries() as statements:
+        response = client.get(url, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json(), len(statements)
+
+def test_admin_listing_query_count_is_constant(client, tokens):
+    one, one_queries = _get(client, "/api/admin/applications?status=scheduled", tokens["admin"])
+    many, many_queries = _get(client, "/api/admin/applications?status=accepted", tokens["admin"])
+
+    assert (len(one), len(many)) == (1, MANY)
+    assert all(row["similarity_percent"] == 90.0 and len(row["timeline"]) == len(STAGES) for row in one + many)
+    assert many_queries == one_queries
+
+def test_my_applications_query_count_is_constant(client, tokens):
+    one, one_queries = _get(client, "/api/applications", tokens[1])
+    many, many_queries = _get(client, "/api/applications", tokens[MANY])
+
+    assert (len(one), len(many)) == (1, MANY)
+    assert [stage["name"] for stage in many[0]["timeline"]] == list(STAGES)
+    assert many_queries == one_queries
@@ -0,0 +1,71 @@
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from architecture import similarity
+from auth.create_db import engine, create_tables, User, MetaUser
+
+STORED = {"legacy.pdf": "cv-legacy"}
+
+def _profile(session, name, resume_pdf, cv_id=None):
+    user = User(name=name, email=f"{name}@cv-ids.test", identity_document=f"C-{name}")
+    session.add(user)
+    session.flush()
+    profile = MetaUser(user_id=user.id, fullname=name, celular="1", resume_pdf=resume_pdf, cv_id=cv_id)
+    session.add(profile)
+    return profile
+
+def test_legacy_profiles_are_backfilled(monkeypatch):
+    create_tables()
+    lookups = []
+    monkeypatch.setattr(similarity, "find_cv_id_by_filename", lambda name: lookups.append(name) or STORED.get(name))
+    session = sessionmaker(bind=engine)()
+    try:
+        legacy = [_profile(session, f"legacy{i}", "legacy.pdf") for i in range(2)]
+        lost = _profile(session, "lost", "lost.pdf")
+        current = _profile(session, "current", "legacy.pdf", cv_id="cv-current")
+        session.commit()
+
+        summary = similarity.backfill_resume_cv_ids()
+
+        session.expire_all()
+        assert summary == {"profiles": 3, "resolved": 2}
+        assert [profile.cv_id for profile in legacy + [lost, current]] == ["cv-legacy", "cv-legacy", None, "cv-current"]
+        assert sorted(lookups) == ["legacy.pdf", "lost.pdf"]
+    finally:
+        session.close()
+
+def test_resolved_cv_id_is_stored_on_the_profile(monkeypatch):
+    create_tables()
+    monkeypatch.setattr(similarity, "find_cv_id_by_filename", STORED.get)
+    session = sessionmaker(bind=engine)()
+    try:
+        profile = _profile(session, "late", "legacy.pdf")
+        session.commit()
+
+        assert similarity.resume_cv_id(profile) == "cv-legacy"
+        session.commit()
+        session.expire_all()
+        assert profile.cv_id == "cv-legacy"
+    finally:
+        session.close()
+
+def test_create_app_backfills_legacy_profiles(monkeypatch):
+    from app import create_app
+
+    create_tables()
+    monkeypatch.setattr(similarity, "find_cv_id_by_filename", STORED.get)
+    session = sessionmaker(bind=engine)()
+    try:
+        profile = _profile(session, "startup", "legacy.pdf")
+        session.commit()
+
+        create_app()
+        for thread in threading.enumerate():
+            if thread.name == "cv-id-backfill":
+                thread.join()
+
+        session.expire_all()
+        assert profile.cv_id == "cv-legacy"
+    finally:
+        session.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from architecture import embedding_cache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_DISK_ITEMS", 10)
+    monkeypatch.setattr(embedding_cache, "_connection", None)
+    embedding_cache.clear()
+    yield embedding_cache
+    embedding_cache._connection.close()
+
+def _rows(cache):
+    return cache._get_connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+def test_writes_under_the_limit_never_count_the_table(cache):
+    statements = []
+    cache._get_connection().set_trace_callback(statements.append)
+
+    cache.put_many({f"key-{i}": [float(i)] for i in range(5)})
+    cache.put_many({"key-0": [9.0], "key-5": [5.0]})
+
+    assert not [sql for sql in statements if sql.startswith("SELECT COUNT(*) FROM embeddings")
+                and "WHERE" not in sql]
+    assert cache._disk_items == _rows(cache) == 6
+
+def test_overflow_evicts_the_least_recently_used(cache):
+    cache.put_many({f"old-{i}": [float(i)] for i in range(8)})
+    cache._memory.clear()
+    cache.get_many(["old-0"])  # read back from disk: kept
+
+    cache.put_many({f"new-{i}": [float(i)] for i in range(4)})
+
+    assert cache._disk_items == _rows(cache) == 9
+    kept = set(cache.get_many([f"old-{i}" for i in range(8)] + [f"new-{i}" for i in range(4)]))
+    assert "old-0" in kept and len(kept) == 9
+    assert {f"new-{i}" for i in range(4)} <= kept
@@ -0,0 +1,100 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from architecture import model
+from architecture.embedding_providers import OpenAIEmbeddingProvider
+
+DIMENSIONS = 4
+
+def fake_vector(text: str):
+    """Deterministic vector for a text, so results can be checked by value"""
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0, 0.0]
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/embeddings like the OpenAI API, failing any request
+    that contains an input starting with "FAIL" """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        self.server.requests.append(inputs)
+        self.server.dimensions.append(body.get("dimensions"))
+        if any(text.startswith("FAIL") for text in inputs):
+            payload = {"error": {"message": "invalid input", "type": "invalid_request_error"}}
+            status = 400
+        else:
+            payload = {
+                "object": "list",
+                "model": body["model"],
+                # Out of order on purpose: the client must place vectors by index
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": fake_vector(text)}
+                    for i, text in reversed(list(enumerate(inputs)))
+                ],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            }
+            status = 200
+        encoded = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    server.requests = []
+    server.dimensions = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setenv("EMBEDDING_DIMENSIONS", str(DIMENSIONS))
+    monkeypatch.setattr(model, "embedding_provider", OpenAIEmbeddingProvider("text-embedding-3-small"))
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_batches_keep_input_order(fake_server):
+    texts = [f"chunk {i} with python and sql" for i in range(10)]
+
+    embeddings = model.create_embeddings(texts, max_items=4)
+
+    assert embeddings == [fake_vector(text) for text in texts]
+    assert [len(inputs) for inputs in fake_server.requests] == [4, 4, 2]
+    # EMBEDDING_DIMENSIONS is sent, so the API returns vectors of the collection's size
+    assert fake_server.dimensions == [DIMENSIONS] * 3
+
+def test_failing_item_falls_back_to_single_requests(fake_server):
+    texts = ["first chunk", "FAIL this one", "", "third chunk"]
+
+    embeddings = model.create_embeddings(texts)
+
+    assert embeddings == [fake_vector("first chunk"), [], [], fake_vector("third chunk")]
+    # One batched attempt (empty text left out), then one retry per item
+    assert fake_server.requests == [
+        ["first chunk", "FAIL this one", "third chunk"],
+        ["first chunk"], ["FAIL this one"], ["third chunk"],
+    ]
+
+def test_duplicate_texts_are_sent_once(fake_server):
+    embeddings = model.create_embeddings(["same text", "other text", "same text"])
+
+    assert embeddings[0] == embeddings[2] == fake_vector("same text")
+    assert fake_server.requests == [["same text", "other text"]]
+
+def test_token_limit_splits_batches():
+    texts = ["word " * 30, "word " * 30, "word " * 30]
+    tokens = model.count_tokens(texts[0])
+
+    batches = model.build_embedding_batches(texts, max_items=10, max_tokens=2 * tokens)
+
+    assert batches == [[0, 1], [2]]
@@ -0,0 +1,40 @@
+import pytest
+
+from architecture import lexical_index
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical_index, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical.sqlite3"))
+    monkeypatch.setattr(lexical_index, "LEXICAL_INDEX_ENABLED", True)
+    monkeypatch.setattr(lexical_index, "_connection", None)
+    yield lexical_index
+    lexical_index._connection.close()
+
+def _document_frequency(index):
+    return dict(index._get_connection().execute("SELECT term, df FROM terms"))
+
+def test_stopwords_are_not_indexed():
+    assert lexical_index.tokenize("Experiencia en Python y C++ con la gestión de IT") == [
+        "experiencia", "python", "c++", "gestion", "it"
+    ]
+
+def test_common_terms_are_skipped(index, monkeypatch):
+    monkeypatch.setattr(index, "LEXICAL_MAX_DF_MIN", 0)
+    index.index_cv("cv-a", [(1, 0, "Analista de datos con SQL"), (2, 1, "Datos y Kubernetes")])
+    index.index_cv("cv-b", [(3, 0, "Ingeniero de datos"), (4, 0, "Datos en la nube, SQL")])
+
+    assert [hit["id"] for hit in index.search("datos kubernetes")] == [2]
+    assert index.search("datos") == []
+    # "sql" is in half of the chunks, which is still under the cutoff
+    assert sorted(hit["id"] for hit in index.search("sql")) == [1, 4]
+
+def test_document_frequencies_follow_deletes(index):
+    index.index_cv("cv-a", [(1, 0, "python sql"), (2, 1, "python")])
+    index.index_cv("cv-b", [(3, 0, "python flask")])
+    assert _document_frequency(index) == {"python": 3, "sql": 1, "flask": 1}
+
+    index.index_cv("cv-a", [(1, 0, "java")])
+    assert _document_frequency(index) == {"python": 1, "flask": 1, "java": 1}
+
+    index.delete_cv("cv-b")
+    assert _document_frequency(index) == {"java": 1}
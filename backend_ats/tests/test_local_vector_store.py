@@ -0,0 +1,63 @@
+import os
+
+from qdrant_client.http import models
+
+from architecture.local_vector_store import LocalVectorStore
+
+NAME = "cvs"
+
+def _points(ids, cv_id):
+    return [
+        models.PointStruct(id=point_id, vector=[1.0, float(point_id), 0.0], payload={"cv_id": cv_id})
+        for point_id in ids
+    ]
+
+def _store(path, compact_min_points=1000):
+    store = LocalVectorStore(str(path), compact_min_points=compact_min_points)
+    if NAME not in [collection.name for collection in store.get_collections().collections]:
+        store.create_collection(NAME, models.VectorParams(size=3, distance=models.Distance.COSINE))
+        store.create_payload_index(NAME, "cv_id", models.PayloadSchemaType.KEYWORD)
+    return store
+
+def _cv_filter(cv_id):
+    return models.Filter(must=[models.FieldCondition(key="cv_id", match=models.MatchValue(value=cv_id))])
+
+def _ids(store, cv_id=None):
+    records, _ = store.scroll(NAME, scroll_filter=_cv_filter(cv_id) if cv_id else None, limit=100)
+    return [record.id for record in records]
+
+def test_writes_are_logged_and_replayed(tmp_path):
+    store = _store(tmp_path)
+    store.upsert(NAME, _points([1, 2, 3], "a"))
+    store.upsert(NAME, _points([4, 5], "b"))
+    store.delete(NAME, models.FilterSelector(filter=_cv_filter("a")))
+    store.upsert(NAME, _points([2], "b"))
+
+    # Only the log grew: the snapshot still holds the empty collection
+    assert os.path.getsize(tmp_path / f"{NAME}.log") > 0
+    reopened = _store(tmp_path)
+
+    assert _ids(reopened) == [4, 5, 2]
+    assert _ids(reopened, "b") == [4, 5, 2] and _ids(reopened, "a") == []
+    assert reopened.get_collection(NAME).points_count == 3
+    hit = reopened.search(NAME, query_vector=[1.0, 5.0, 0.0], limit=1)[0]
+    assert hit.id == 5 and abs(hit.score - 1.0) < 1e-6
+
+def test_log_is_compacted_into_the_snapshot(tmp_path):
+    store = _store(tmp_path, compact_min_points=4)
+    store.upsert(NAME, _points([1, 2, 3], "a"))
+    assert os.path.exists(tmp_path / f"{NAME}.log")
+
+    store.upsert(NAME, _points([4], "b"))
+    assert not os.path.exists(tmp_path / f"{NAME}.log")
+
+    store.delete(NAME, models.PointIdsList(points=[2]))
+    store.close()
+
+    assert not os.path.exists(tmp_path / f"{NAME}.log")
+    reopened = _store(tmp_path)
+    assert _ids(reopened) == [1, 3, 4]
+    assert [record.vector for record in reopened.retrieve(NAME, [3], with_vectors=True)][0][1] > 0.9
+    # Updating a snapshot row writes through the copy-on-write map, not the file
+    reopened.upsert(NAME, _points([3], "c"))
+    assert _ids(reopened, "c") == [3] and _ids(_store(tmp_path), "c") == [3]
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from auth import metrics_rollup
+from auth.create_db import engine, create_tables, User, Job, Application
+from auth.metrics_timeseries import application_time_series
+
+def test_daily_counters_match_the_time_series():
+    create_tables()
+    session = sessionmaker(bind=engine)()
+    try:
+        candidate = User(name="daily", email="daily@metrics.test", identity_document="M-1")
+        job = Job(title_job="Daily job", description="desc")
+        session.add_all([candidate, job])
+        session.flush()
+        today = datetime.utcnow()
+        for created_at in (today, today, today - timedelta(days=2)):
+            session.add(Application(user_id=candidate.id, job_id=job.id, status="pending", created_at=created_at))
+        session.commit()
+        moved = session.query(Application).filter(Application.user_id == candidate.id).first()
+        moved.created_at = today - timedelta(days=5)
+        session.commit()
+
+        days = metrics_rollup.daily_counts(session, 30)
+        series = application_time_series(session, "day")
+
+        assert len(days) == 30 and list(days)[-1] == today.date().isoformat()
+        assert [{"period": day, "applications": count} for day, count in days.items()] == series["points"]
+        assert days[(today - timedelta(days=5)).date().isoformat()] >= 1
+    finally:
+        session.close()
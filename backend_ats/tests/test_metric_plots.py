@@ -0,0 +1,39 @@
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from auth import metrics_plots
+from auth.create_db import engine, create_tables, MetricPlot
+
+def test_inline_mode_serves_the_previous_image_and_renders_in_background(monkeypatch):
+    create_tables()
+    rendered_on = []
+
+    def render_png(kind, data):
+        rendered_on.append(threading.current_thread().name)
+        return b"new-png"
+
+    monkeypatch.setattr(metrics_plots, "PLOT_RENDER_MODE", "inline")
+    monkeypatch.setattr(metrics_plots, "render_png", render_png)
+    session = sessionmaker(bind=engine)()
+    try:
+        session.merge(MetricPlot(kind="by_status_bar", version="old-version", png=b"old-png"))
+        session.commit()
+        data = metrics_plots.plot_data(session, "by_status_bar")
+        version = metrics_plots.data_version("by_status_bar", data)
+
+        plot = metrics_plots.get_png(session, "by_status_bar", data, version)
+        assert (plot.version, plot.png) == ("old-version", b"old-png")
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            session.expire_all()
+            plot = metrics_plots.stored_plot(session, "by_status_bar")
+            if plot.version == version:
+                break
+            time.sleep(0.05)
+        assert (plot.version, plot.png) == (version, b"new-png")
+        assert rendered_on == ["plot-renderer"]
+    finally:
+        session.close()
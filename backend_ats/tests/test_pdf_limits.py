@@ -0,0 +1,21 @@
+from architecture import model
+
+def test_page_limit_is_reported(tmp_path):
+    path = str(tmp_path / "long.pdf")
+    model._write_synthetic_pdf(path, pages=5, lines_per_page=3)
+    stats = {}
+
+    pages = list(model.iter_pdf_pages(path, max_pages=2, stats=stats))
+
+    assert len(pages) == 2 and "Pagina 1 linea 2" in pages[1]
+    assert stats == {"pages": 2, "page_count": 5, "truncated": "pages"}
+    assert model.truncation_warning(stats) == "Only the first 2 of 5 pages were indexed (MAX_PDF_PAGES)"
+
+def test_whole_document_has_no_warning(tmp_path):
+    path = str(tmp_path / "short.pdf")
+    model._write_synthetic_pdf(path, pages=3, lines_per_page=3)
+
+    cv_data = model.prepare_cv(path)
+
+    assert (cv_data["pages"], cv_data["page_count"], cv_data["truncated"]) == (3, 3, None)
+    assert cv_data["warning"] is None and cv_data["chunk_count"] == 1
@@ -0,0 +1,26 @@
+from architecture import query_cache, vectordb
+from auth.create_db import create_tables, bump_collection_version
+
+def test_query_is_embedded_as_typed(monkeypatch):
+    sent = []
+    monkeypatch.setattr(query_cache, "create_embeddings", lambda texts: sent.append(texts) or [[0.5, 0.5]])
+    query_cache.clear()
+
+    first = query_cache.embed_query("  Ingeniero DevOps con AWS ")
+    second = query_cache.embed_query("ingeniero   devops con aws")
+
+    assert first == second == [0.5, 0.5]
+    assert sent == [["Ingeniero DevOps con AWS"]]
+
+def test_writes_of_other_processes_change_the_version():
+    create_tables()
+    before = vectordb.cv_collection_version()
+
+    # Another process (e.g. a bulk import run from the command line) writes to the collection
+    bump_collection_version(vectordb.QDRANT_COLLECTION_NAME)
+    after_other = vectordb.cv_collection_version()
+    vectordb._bump_cv_collection_version()
+    after_own = vectordb.cv_collection_version()
+
+    assert after_other == (before[0] + 1, before[1])
+    assert after_own == (before[0] + 2, before[1] + 1)
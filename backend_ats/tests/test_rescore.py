@@ -0,0 +1,82 @@
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from architecture import rescore, similarity
+from auth.create_db import (
+    engine, create_tables, User, Job, Application, ApplicationStage, CvJobSimilarity, RescoreRun
+)
+
+def _wait(run_id):
+    for thread in threading.enumerate():
+        if thread.name == f"rescore-{run_id}":
+            thread.join()
+
+def test_run_status_is_stored_in_the_database():
+    create_tables()
+    session = sessionmaker(bind=engine)()
+    try:
+        job = Job(title_job="Rescore job", description="desc")  # no profile: nothing to score
+        candidate = User(name="rescored", email="rescored@rescore.test", identity_document="R-1")
+        session.add_all([job, candidate])
+        session.flush()
+        application = Application(user_id=candidate.id, job_id=job.id, status="in_progress")
+        session.add(application)
+        session.flush()
+        session.add(ApplicationStage(application_id=application.id, name="preselection", status="pending", sort_order=2))
+        session.commit()
+        job_id = job.id
+    finally:
+        session.close()
+
+    run_id = rescore.start_rescore([job_id])
+    _wait(run_id)
+    status = rescore.get_rescore_status(run_id)
+
+    assert status["status"] == "finished" and status["error"] is None
+    assert status["job_ids"] == [job_id]
+    assert (status["applications"], status["processed"], status["unscored"]) == (1, 1, 1)
+    assert status["finished_at"] is not None
+    assert rescore.get_rescore_status("missing-run") is None
+
+def test_run_of_a_dead_process_is_reported_failed():
+    create_tables()
+    session = sessionmaker(bind=engine)()
+    try:
+        stale = datetime.utcnow() - timedelta(seconds=rescore.RESCORE_STALE_SECONDS + 60)
+        session.add(RescoreRun(id="dead-run", status="running", created_at=stale, updated_at=stale))
+        session.add(RescoreRun(id="live-run", status="running"))
+        session.commit()
+    finally:
+        session.close()
+
+    dead = rescore.get_rescore_status("dead-run")
+    assert dead["status"] == "failed" and dead["error"] and dead["finished_at"] is not None
+    assert rescore.get_rescore_status("live-run")["status"] == "running"
+
+def test_scores_are_upserted_over_a_concurrent_write():
+    create_tables()
+    session = sessionmaker(bind=engine)()
+    try:
+        job = Job(title_job="Upsert job", description="desc")
+        session.add(job)
+        session.flush()
+        session.add_all([
+            CvJobSimilarity(cv_id="cv-raced", job_id=job.id, score=0.1),
+            CvJobSimilarity(cv_id="cv-gone", job_id=job.id, score=0.2,
+                            updated_at=datetime.utcnow() - timedelta(minutes=1)),
+        ])
+        session.commit()
+        similarity._write_scores(session, [
+            {"cv_id": "cv-raced", "job_id": job.id, "score": 0.7, "chunk_index": 2, "updated_at": datetime.utcnow()}
+        ])
+        similarity._delete_scores_before(session, CvJobSimilarity.job_id == job.id, datetime.utcnow() - timedelta(seconds=30))
+        session.commit()
+
+        rows = session.query(CvJobSimilarity.cv_id, CvJobSimilarity.score, CvJobSimilarity.chunk_index).filter(
+            CvJobSimilarity.job_id == job.id
+        ).all()
+        assert rows == [("cv-raced", 0.7, 2)]
+    finally:
+        session.close()
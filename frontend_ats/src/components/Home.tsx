@@ -11,6 +11,7 @@ const Home: React.FC = () => {
     message: string;
   } | null>(null);
   const [uploadedFilename, setUploadedFilename] = useState<string | null>(null);
+  const [uploadedCvId, setUploadedCvId] = useState<string | null>(null);
   const [matchResults, setMatchResults] = useState<Array<{ job: { id: number; title_job: string; description: string }, similarity_percent: number | null }>>([]);
   const [selectedJobId, setSelectedJobId] = useState<number | null>(null);
   const [candidate, setCandidate] = useState({ name: '', email: '', celular: '' } as { name: string; email: string; celular: string; identity_document?: string });
@@ -62,9 +63,10 @@ const Home: React.FC = () => {
         message: `CV procesado con éxito! ${response.chunks} secciones analizadas.`
       });
       setUploadedFilename(response.filename);
+      setUploadedCvId(response.cv_id);
       // Fetch matches for admin workflow
       try {
-        const matches = await adminService.matchJobsFromCv(response.filename);
+        const matches = await adminService.matchJobsFromCv(response.cv_id, response.filename);
         setMatchResults(matches.filter(m => (m.similarity_percent ?? 0) >= 80));
       } catch {}
     } catch (error) {
@@ -135,9 +137,9 @@ const Home: React.FC = () => {
                 <div className="form-row"><label>Celular</label><input value={candidate.celular} onChange={(e) => setCandidate({ ...candidate, celular: e.target.value })} /></div>
                 <div className="form-actions" style={{ marginTop: 12 }}>
                   <button className="btn-gradient" disabled={!canSubmitCandidate} onClick={async () => {
-                    if (!uploadedFilename || !selectedJobId) return;
+                    if (!uploadedCvId || !selectedJobId) return;
                     try {
-                      await adminService.createApplicationFromCv({ filename: uploadedFilename, job_id: selectedJobId, candidate: { name: candidate.name, email: candidate.email, celular: candidate.celular } });
+                      await adminService.createApplicationFromCv({ cv_id: uploadedCvId, filename: uploadedFilename ?? undefined, job_id: selectedJobId, candidate: { name: candidate.name, email: candidate.email, celular: candidate.celular } });
                       setCandidate({ name: '', email: '', celular: '' });
                       alert('Postulación creada');
                     } catch {
@@ -67,7 +67,7 @@ const InitialSetup: React.FC<InitialSetupProps> = ({ onComplete }) => {
       const resumeFilename = uploadResult.filename || null;
 
       // Guardar el perfil del usuario incluyendo el resume_pdf
-      await saveUserProfile(userId, { fullname, celular, resume_pdf: resumeFilename });
+      await saveUserProfile(userId, { fullname, celular, resume_pdf: resumeFilename, cv_id: uploadResult.cv_id });
       
       // Actualizar el objeto de usuario en localStorage
       const updatedUser = {
@@ -1,14 +1,38 @@
 import React, { useEffect, useState } from 'react';
 import authService from '../services/authService';
 
+type Series = { kind: string; version: string; labels: string[]; values: number[] };
+
+// Horizontal bar chart drawn from a metrics series (no charting library needed)
+const SeriesBars: React.FC<{ series: Series; colors?: string[] }> = ({ series, colors }) => {
+  const max = Math.max(1, ...series.values);
+  const total = series.values.reduce((sum, value) => sum + value, 0);
+  return (
+    <div style={{ display: 'flex', flexDirection: 'column', gap: 8 }}>
+      {series.labels.map((label, index) => {
+        const value = series.values[index] ?? 0;
+        return (
+          <div key={`${label}-${index}`} style={{ display: 'grid', gridTemplateColumns: 'minmax(120px,40%) 1fr 64px', alignItems: 'center', gap: 8 }}>
+            <span style={{ fontSize: 13, overflow: 'hidden', textOverflow: 'ellipsis', whiteSpace: 'nowrap' }} title={label}>{label}</span>
+            <div style={{ background: '#eef2f5', borderRadius: 4, height: 14 }}>
+              <div style={{ width: `${(value / max) * 100}%`, background: colors?.[index] ?? '#00b9cd', borderRadius: 4, height: '100%' }} />
+            </div>
+            <span style={{ fontSize: 13, textAlign: 'right' }}>{value}{total > 0 ? ` (${Math.round((value / total) * 100)}%)` : ''}</span>
+          </div>
+        );
+      })}
+    </div>
+  );
+};
+
 const Metrics: React.FC = () => {
   const breadcrumbs = [
     { label: '', active: true }
   ];
 
   const [summary, setSummary] = useState<any>(null);
-  const [plotPerJob, setPlotPerJob] = useState<string>('');
-  const [plotResultOutcome, setPlotResultOutcome] = useState<string>('');
+  const [perJob, setPerJob] = useState<Series | null>(null);
+  const [resultOutcome, setResultOutcome] = useState<Series | null>(null);
   const [error, setError] = useState<string>('');
 
   useEffect(() => {
@@ -22,20 +46,23 @@ const Metrics: React.FC = () => {
       })
       .then(setSummary)
       .catch(() => setError('No se pudieron cargar las métricas'));
-    // Fetch plots
-    const fetchPlot = (kind: string, setter: (v: string) => void) => {
-      fetch(`/api/admin/metrics/plots/${kind}`, { headers })
+    // Fetch chart data (ETag: the browser cache revalidates and unchanged series cost a 304)
+    const fetchSeries = (kind: string, setter: (v: Series | null) => void) => {
+      fetch(`/api/admin/metrics/series/${kind}`, { headers })
         .then(async (r) => {
           if (!r.ok) throw new Error(await r.text());
           return r.json();
         })
-        .then((d) => setter(d.image_base64 || ''))
-        .catch(() => setter(''));
+        .then(setter)
+        .catch(() => setter(null));
     };
-    fetchPlot('per_job_bar', setPlotPerJob);
-    fetchPlot('result_outcome_pie', setPlotResultOutcome);
+    fetchSeries('per_job_bar', setPerJob);
+    fetchSeries('result_outcome_pie', setResultOutcome);
   }, []);
 
+  const hasData = (series: Series | null): series is Series =>
+    !!series && series.values.some((value) => value > 0);
+
   return (
     <div className="page-container">
       <div className="header">
@@ -61,8 +88,8 @@ const Metrics: React.FC = () => {
         )}
 
         <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit,minmax(420px,1fr))', gap: 24 }}>
-          <div className="home-card" style={{ padding: 24 }}><h3 className="home-card-title">Postulaciones por vacante</h3>{plotPerJob ? <img src={plotPerJob} alt="per job" style={{ width: '100%', maxHeight: 520, objectFit: 'contain' }} /> : <div className="home-muted">Sin datos</div>}</div>
-          <div className="home-card" style={{ padding: 24 }}><h3 className="home-card-title">Resultados del proceso</h3>{plotResultOutcome ? <img src={plotResultOutcome} alt="result outcome" style={{ width: '100%', maxHeight: 520, objectFit: 'contain' }} /> : <div className="home-muted">Sin datos</div>}</div>
+          <div className="home-card" style={{ padding: 24 }}><h3 className="home-card-title">Postulaciones por vacante</h3>{hasData(perJob) ? <SeriesBars series={perJob} /> : <div className="home-muted">Sin datos</div>}</div>
+          <div className="home-card" style={{ padding: 24 }}><h3 className="home-card-title">Resultados del proceso</h3>{hasData(resultOutcome) ? <SeriesBars series={resultOutcome} colors={['#00d6ab', '#ef476f', '#ffd166']} /> : <div className="home-muted">Sin datos</div>}</div>
         </div>
       </div>
     </div>
@@ -58,15 +58,18 @@ const Profile: React.FC = () => {
       const user = JSON.parse(storedUser);
 
       let newResume = resumeFilename;
+      let newCvId: string | undefined;
       if (selectedFile) {
         const uploadResult = await uploadCV(selectedFile);
         newResume = uploadResult.filename || null;
+        newCvId = uploadResult.cv_id;
       }
 
       const result = await saveUserProfile(user.id, {
         fullname,
         celular,
         resume_pdf: newResume ?? undefined,
+        cv_id: newCvId,
       });
 
       if (result.success && result.profile) {
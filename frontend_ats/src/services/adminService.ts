@@ -108,7 +108,7 @@ export const adminService = {
     return res.json();
   },
 
-  async matchJobsFromCv(filename: string): Promise<Array<{ job: { id: number; title_job: string; description: string }; similarity_percent: number | null }>>{
+  async matchJobsFromCv(cvId: string, filename?: string): Promise<Array<{ job: { id: number; title_job: string; description: string }; similarity_percent: number | null }>>{
     const token = authService.getToken();
     const res = await fetch(`/api/admin/cv/match`, {
       method: 'POST',
@@ -116,13 +116,13 @@ export const adminService = {
         'Content-Type': 'application/json',
         ...(token ? { Authorization: `Bearer ${token}` } : {}),
       },
-      body: JSON.stringify({ filename }),
+      body: JSON.stringify({ cv_id: cvId, filename }),
     });
     if (!res.ok) throw new Error('Failed to match jobs from CV');
     return res.json();
   },
 
-  async createApplicationFromCv(payload: { filename: string; job_id: number; candidate: { name: string; email: string; celular: string; identity_document?: string } }): Promise<{ success: boolean; application_id?: number }>{
+  async createApplicationFromCv(payload: { cv_id: string; filename?: string; job_id: number; candidate: { name: string; email: string; celular: string; identity_document?: string } }): Promise<{ success: boolean; application_id?: number }>{
     const token = authService.getToken();
     const res = await fetch(`/api/admin/applications/from_cv`, {
       method: 'POST',
@@ -2,12 +2,39 @@ import axios from 'axios';
 
 interface UploadResponse {
   success: boolean;
-  cv_id: number;
+  job_id: string;
+  cv_id: string;
+  status: string;
+  status_url: string;
   message: string;
   filename: string;
-  chunks: number;
+  chunks?: number | null;
 }
 
+interface UploadStatusResponse {
+  job_id: string;
+  status: 'queued' | 'extracting' | 'embedding' | 'indexing' | 'indexed' | 'failed' | string;
+  filename: string;
+  cv_id: string;
+  chunks: number | null;
+  error: string | null;
+}
+
+const UPLOAD_POLL_INTERVAL_MS = 1000;
+const UPLOAD_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+const waitForIngestion = async (statusUrl: string): Promise<UploadStatusResponse> => {
+  const deadline = Date.now() + UPLOAD_POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const { data } = await axios.get<UploadStatusResponse>(statusUrl);
+    if (data.status === 'indexed') return data;
+    if (data.status === 'failed') throw new Error(data.error || 'Failed to process CV');
+    await new Promise((resolve) => setTimeout(resolve, UPLOAD_POLL_INTERVAL_MS));
+  }
+  throw new Error('CV processing is taking longer than expected. Please try again later.');
+};
+
+// Uploads are processed in the background; resolve once the CV is indexed
 export const uploadCV = async (file: File): Promise<UploadResponse> => {
   const formData = new FormData();
   formData.append('file', file);
@@ -19,11 +46,13 @@ export const uploadCV = async (file: File): Promise<UploadResponse> => {
       },
     });
     
-    return response.data;
+    const status = await waitForIngestion(response.data.status_url);
+    return { ...response.data, status: status.status, chunks: status.chunks };
   } catch (error) {
     if (axios.isAxiosError(error) && error.response) {
       throw new Error(error.response.data.error || 'Failed to upload CV');
     }
+    if (error instanceof Error) throw error;
     throw new Error('Failed to upload CV. Please try again.');
   }
 };
@@ -4,6 +4,7 @@ interface ProfileData {
   fullname: string;
   celular: string;
   resume_pdf?: string | null;
+  cv_id?: string | null;
 }
 
 interface ProfileResponse {
@@ -14,6 +15,7 @@ interface ProfileResponse {
     fullname: string;
     celular: string;
     resume_pdf?: string | null;
+    cv_id?: string | null;
   };
 }
 
@@ -26,6 +28,7 @@ interface ProfileCheckResponse {
     fullname: string;
     celular: string;
     resume_pdf?: string | null;
+    cv_id?: string | null;
   };
 }
 
@@ -35,7 +38,8 @@ export const saveUserProfile = async (userId: number, profileData: ProfileData):
       user_id: userId,
       fullname: profileData.fullname,
       celular: profileData.celular,
-      resume_pdf: profileData.resume_pdf ?? null
+      resume_pdf: profileData.resume_pdf ?? null,
+      cv_id: profileData.cv_id ?? null
     });
     
     return response.data;